@@ -1,8 +1,49 @@
 import os
 import json
-import requests
 from typing import Dict, List, Any, Optional, Generator
 
+from ai_engine import provider_health, replay
+from ai_engine.http_client import get_session
+
+
+BOCHA_AI_SEARCH_URL = "https://api.bocha.cn/v1/ai-search"
+
+# Modal card content types returned as structured data
+MODAL_CARD_TYPES = ["baike_pro", "medical_common", "medical_pro", "weather_china", "weather_international"]
+
+
+def _build_request(query: str, count: int, freshness: str, answer: bool,
+                   stream: bool, api_key: Optional[str]) -> tuple:
+    """Build (headers, payload) for an AI search request."""
+    # Use environment variable if key not provided
+    if not api_key:
+        api_key = os.getenv("BOCHA_API_KEY", "sk-accd71cb3f8b48789e34040d18337912")
+    
+    headers = {
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json"
+    }
+    
+    payload = {
+        "query": query,
+        "freshness": freshness,
+        "answer": answer,
+        "stream": stream,
+        "count": count
+    }
+    return headers, payload
+
+
+def _parse_sse_line(line: str) -> Optional[Dict[str, Any]]:
+    """Parse one SSE line into its JSON event, or None if it isn't a data line."""
+    if not line.startswith("data:"):
+        return None
+    try:
+        return json.loads(line[5:])  # content after "data:"
+    except json.JSONDecodeError:
+        return None
+
+
 def bocha_ai_search(
     query: str,
     count: int = 10,
@@ -25,111 +66,193 @@ def bocha_ai_search(
     Returns:
         Dict containing processing 'messages' and other metadata.
     """
-    # Use environment variable if key not provided
-    if not api_key:
-        api_key = os.getenv("BOCHA_API_KEY", "sk-accd71cb3f8b48789e34040d18337912")
+    if stream:
+        # Collect the incremental stream into the full response shape
+        collected_messages = []
+        final_answer = ""
         
-    api_url = "https://api.bocha.cn/v1/ai-search"
-    
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json"
-    }
+        for msg in iter_bocha_ai_search(query, count, freshness, answer, api_key):
+            if msg.get("type") == "error":
+                return {
+                    "code": 500,
+                    "error": msg.get("content", {}),
+                    "msg": str(msg.get("content", "")),
+                    "messages": collected_messages
+                }
+            collected_messages.append(msg)
+            # Accumulate answer if it's a text answer
+            if msg.get("type") == "answer" and msg.get("content_type") == "text":
+                final_answer += msg.get("content", "")
+        
+        return {
+            "code": 200,
+            "messages": collected_messages,
+            "full_answer": final_answer
+        }
     
-    payload = {
-        "query": query,
-        "freshness": freshness,
-        "answer": answer,
-        "stream": stream,
-        "count": count
-    }
+    headers, payload = _build_request(query, count, freshness, answer, False, api_key)
+    return replay.call(
+        "bocha", payload, lambda: _bocha_ai_search_live(headers, payload),
+        ok=lambda response: response.get("code", 200) == 200
+    )
+
+
+def _bocha_ai_search_live(headers: Dict[str, str], payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Non-stream AI search request guarded by the provider health registry."""
+    if not provider_health.acquire("bocha", timeout=5):
+        return {
+            "code": 503,
+            "msg": f"Bocha {provider_health.block_reason('bocha')}",
+            "messages": []
+        }
     
     try:
-        response = requests.post(
-            api_url, 
+        response = get_session().post(
+            BOCHA_AI_SEARCH_URL, 
             json=payload, 
             headers=headers, 
-            timeout=60,
-            stream=stream
+            timeout=60
         )
         response.raise_for_status()
+        provider_health.record_success("bocha")
         
-        if stream:
-            # For stream mode, we'd typically yield generators, but here we'll 
-            # collect everything for simplicity in the current architecture
-            # unless specific stream usage is needed.
-            # Implementing a collector for stream mode:
-            collected_messages = []
-            final_answer = ""
-            
-            for line in response.iter_lines():
-                if not line:
-                    continue
-                    
-                decoded_line = line.decode('utf-8')
-                if decoded_line.startswith("data:"):
-                    json_str = decoded_line[5:] # content after "data:"
-                    try:
-                        data = json.loads(json_str)
-                        event = data.get("event")
-                        
-                        if event == "message":
-                            msg = data.get("message", {})
-                            collected_messages.append(msg)
-                            # Accumulate answer if it's a text answer
-                            if msg.get("type") == "answer" and msg.get("content_type") == "text":
-                                final_answer += msg.get("content", "")
-                                
-                        elif event == "done":
-                            break
-                        elif event == "error":
-                            return {"error": data.get("error_information", {}), "code": 500}
-                    except json.JSONDecodeError:
-                        continue
-                        
-            return {
-                "code": 200,
-                "messages": collected_messages,
-                "full_answer": final_answer
-            }
-            
-        else:
-            # Non-stream mode returns the full JSON
-            return response.json()
+        # Non-stream mode returns the full JSON
+        return response.json()
             
     except Exception as e:
+        provider_health.record_failure("bocha")
         return {
             "code": 500,
             "msg": f"Request failed: {str(e)}",
             "messages": []
         }
 
-def parse_bocha_response(response_data: Dict[str, Any]) -> Dict[str, Any]:
+
+def iter_bocha_ai_search(
+    query: str,
+    count: int = 10,
+    freshness: str = "noLimit",
+    answer: bool = True,
+    api_key: Optional[str] = None
+) -> Generator[Dict[str, Any], None, None]:
     """
-    Parse the raw Bocha AI Search response into structured data.
+    Stream a Bocha AI Search, yielding each message as it arrives.
     
-    Returns:
-        Dict with:
-        - web_sources: List of parsed webpage objects
-        - answer: The AI summary answer
-        - modal_cards: Structured data cards (medical, baike, etc.)
-        - raw_messages: Original messages
+    Source messages (webpages, cards) arrive first, followed by answer
+    fragments. Feed the messages into a BochaStreamParser to get parsed
+    sources as soon as they are available. Closing the generator early
+    releases the connection.
+    
+    Yields:
+        Bocha message dicts (type, content_type, content). Request or
+        stream errors are yielded as {"type": "error", "content": ...}
+        and end the stream.
     """
-    messages = response_data.get("messages", [])
+    headers, payload = _build_request(query, count, freshness, answer, True, api_key)
+    yield from replay.call_stream(
+        "bocha", payload, lambda: _iter_bocha_ai_search_live(headers, payload),
+        ok=lambda items: not any(item.get("type") == "error" for item in items)
+    )
+
+
+def _iter_bocha_ai_search_live(headers: Dict[str, str],
+                               payload: Dict[str, Any]) -> Generator[Dict[str, Any], None, None]:
+    """
+    Streaming AI search request guarded by the provider health registry.
     
-    web_sources = []
-    modal_cards = []
-    answer_parts = []
+    The call counts as a success once the stream completed or sources
+    arrived (also if the consumer stops reading early), otherwise as a
+    failure, so a half-open circuit probe is always resolved.
+    """
+    if not provider_health.acquire("bocha", timeout=5):
+        yield {"type": "error", "content": f"Bocha {provider_health.block_reason('bocha')}"}
+        return
     
-    for msg in messages:
+    sources_seen = False
+    completed = False
+    failed = False
+    try:
+        # Closing the response releases the pooled connection, also when
+        # raise_for_status() fails or the consumer stops reading early
+        with get_session().post(
+            BOCHA_AI_SEARCH_URL,
+            json=payload,
+            headers=headers,
+            timeout=60,
+            stream=True
+        ) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                data = _parse_sse_line(line.decode("utf-8"))
+                if data is None:
+                    continue
+                
+                event = data.get("event")
+                if event == "message":
+                    message = data.get("message", {})
+                    sources_seen = sources_seen or message.get("type") == "source"
+                    yield message
+                elif event == "done":
+                    break
+                elif event == "error":
+                    failed = True
+                    yield {"type": "error", "content": data.get("error_information", {})}
+                    return
+            completed = True
+    except Exception as e:
+        failed = True
+        yield {"type": "error", "content": f"Request failed: {str(e)}"}
+    finally:
+        if not failed and (completed or sources_seen):
+            provider_health.record_success("bocha")
+        else:
+            provider_health.record_failure("bocha")
+
+
+class BochaStreamParser:
+    """
+    Incremental counterpart of parse_bocha_response().
+    
+    Feed messages from iter_bocha_ai_search() one at a time; each call
+    returns what the message added, and result() returns the same
+    structure parse_bocha_response() would for all messages so far.
+    
+    Usage:
+        parser = BochaStreamParser()
+        for msg in iter_bocha_ai_search(query):
+            update = parser.feed(msg)
+            if update["web_sources"]:
+                ...  # sources are available before the answer finishes
+        parsed = parser.result()
+    """
+    
+    def __init__(self):
+        self.web_sources: List[Dict[str, Any]] = []
+        self.modal_cards: List[Dict[str, Any]] = []
+        self.messages: List[Dict[str, Any]] = []
+        self._answer_parts: List[str] = []
+    
+    def feed(self, msg: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Parse one message.
+        
+        Returns:
+            Dict with the newly added web_sources, modal_cards and answer_delta
+        """
+        self.messages.append(msg)
+        update = {"web_sources": [], "modal_cards": [], "answer_delta": ""}
+        
         msg_type = msg.get("type")
         content_type = msg.get("content_type")
         content_str = msg.get("content", "")
         
         # Parse Answer
         if msg_type == "answer" and content_type == "text":
-            answer_parts.append(content_str)
-            continue
+            self._answer_parts.append(content_str)
+            update["answer_delta"] = content_str
+            return update
             
         # Parse Sources (Webpages, Images, Cards)
         if msg_type == "source":
@@ -148,28 +271,56 @@ def parse_bocha_response(response_data: Dict[str, Any]) -> Dict[str, Any]:
                 if isinstance(content_data, dict):
                     if "value" in content_data and isinstance(content_data["value"], list):
                         # Extract all webpages from the value array
-                        for page in content_data["value"]:
-                            if isinstance(page, dict):
-                                web_sources.append(page)
+                        pages = [page for page in content_data["value"] if isinstance(page, dict)]
                     else:
                         # Single webpage object without value wrapper
-                        web_sources.append(content_data)
+                        pages = [content_data]
                 elif isinstance(content_data, list):
                     # Direct list of webpages
-                    web_sources.extend(content_data)
+                    pages = content_data
+                else:
+                    pages = []
+                self.web_sources.extend(pages)
+                update["web_sources"] = pages
                 
-            elif content_type in ["baike_pro", "medical_common", "medical_pro", "weather_china", "weather_international"]:
+            elif content_type in MODAL_CARD_TYPES:
                 # These are modal cards, usually lists of objects
-                modal_cards.append({
+                card = {
                     "type": content_type,
                     "data": content_data
-                })
-                
-    full_answer = "".join(answer_parts)
+                }
+                self.modal_cards.append(card)
+                update["modal_cards"] = [card]
+        
+        return update
     
-    return {
-        "web_sources": web_sources,
-        "answer": full_answer,
-        "modal_cards": modal_cards,
-        "raw_messages": messages
-    }
+    @property
+    def answer(self) -> str:
+        """The answer text received so far."""
+        return "".join(self._answer_parts)
+    
+    def result(self) -> Dict[str, Any]:
+        """Return the parsed response in parse_bocha_response() format."""
+        return {
+            "web_sources": list(self.web_sources),
+            "answer": self.answer,
+            "modal_cards": list(self.modal_cards),
+            "raw_messages": list(self.messages)
+        }
+
+
+def parse_bocha_response(response_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Parse the raw Bocha AI Search response into structured data.
+    
+    Returns:
+        Dict with:
+        - web_sources: List of parsed webpage objects
+        - answer: The AI summary answer
+        - modal_cards: Structured data cards (medical, baike, etc.)
+        - raw_messages: Original messages
+    """
+    parser = BochaStreamParser()
+    for msg in response_data.get("messages", []):
+        parser.feed(msg)
+    return parser.result()
@@ -0,0 +1,284 @@
+"""
+Crawl Cache Module - URL cache over stored CrawledContent rows
+
+DeepReadTool persisted every crawl to CrawledContent but never read it
+back, so the same URL was fetched and summarized again on every call.
+This module puts the stored rows in front of the Jina / Firecrawl /
+BeautifulSoup chain:
+
+1. A successful row younger than the TTL (counted from its last
+   validation) is served directly
+2. A stale row with an ETag or Last-Modified validator is revalidated
+   with a conditional GET against the origin; a 304 refreshes the row's
+   validation time and the stored summary is served without a re-crawl
+   or re-summarization
+3. Otherwise the page is crawled again
+
+Validators come from origin responses: the direct BeautifulSoup fetch,
+and revalidation responses that returned a new version (so the re-crawl
+that follows is stored with them). Reader services (Jina, Firecrawl) do
+not expose the origin's headers, so when one of them wins, a HEAD
+request to the origin captures the validators in the background
+(capture_validators()) and stores them on the saved row, off the deep
+read's critical path. Origins that send neither header are re-crawled
+after the TTL.
+
+Page content stored with search results (crawl method "tavily") is
+always served, also when the cache is disabled.
+
+Configuration (environment):
+- CRAWL_CACHE_ENABLED: set to false to disable (default true)
+- CRAWL_CACHE_TTL: seconds a crawl is served without revalidation
+  (default 86400)
+- CRAWL_REVALIDATE_ENABLED: set to false to re-crawl stale rows without
+  revalidating them or capturing validators (default true)
+- CRAWL_REVALIDATE_TIMEOUT: conditional GET timeout in seconds (default 10)
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Dict, Optional, Tuple
+
+
+# Origin validators noted during fetches, waiting to be stored with the crawl
+_MAX_PENDING = 1000
+_pending: Dict[str, Tuple[str, str]] = {}
+_pending_lock = threading.Lock()
+
+# Background HEAD requests for validators of reader-service crawls
+_capture_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="crawl-validators")
+
+_stats = {"fresh_hits": 0, "revalidated": 0, "changed": 0, "misses": 0}
+_stats_lock = threading.Lock()
+
+
+def is_enabled() -> bool:
+    """Return whether the crawl cache is enabled via environment."""
+    return os.getenv("CRAWL_CACHE_ENABLED", "true").lower() not in ("0", "false", "no", "off")
+
+
+def is_revalidation_enabled() -> bool:
+    """Return whether stale rows are revalidated via environment."""
+    return is_enabled() and os.getenv("CRAWL_REVALIDATE_ENABLED", "true").lower() not in ("0", "false", "no", "off")
+
+
+def get_ttl() -> int:
+    """Read CRAWL_CACHE_TTL (seconds, default one day)."""
+    try:
+        return int(os.getenv("CRAWL_CACHE_TTL", "86400"))
+    except ValueError:
+        return 86400
+
+
+def _count(outcome: str) -> None:
+    with _stats_lock:
+        _stats[outcome] += 1
+
+
+def lookup(url: str):
+    """
+    Find the latest successful crawl of a URL.
+
+    Returns:
+        A CrawledContent row with usable content, or None
+    """
+    try:
+        from ai_engine.db import setup_django
+
+        setup_django()
+        from apps.reports.models import CrawledContent
+
+        rows = CrawledContent.objects.filter(url=url[:2000], success=True, content_length__gt=100)
+        if not is_enabled():
+            rows = rows.filter(crawl_method=CrawledContent.CrawlMethod.TAVILY)
+        return rows.order_by("-created_at").first()
+    except Exception as e:
+        print(f"⚠️ Crawl cache lookup failed: {e}")
+        return None
+
+
+def is_fresh(row) -> bool:
+    """Whether a row was crawled or last validated within the TTL."""
+    if not is_enabled():
+        # Only search-provided content reaches here; it is not revalidated
+        return True
+
+    from django.utils import timezone
+
+    checked = row.validated_at or row.created_at
+    return checked >= timezone.now() - timedelta(seconds=get_ttl())
+
+
+def get_fresh(url: str):
+    """
+    Get a servable crawl of a URL, revalidating a stale one if possible.
+
+    Returns:
+        A fresh (or just revalidated) CrawledContent row, or None if the
+        URL has to be crawled
+    """
+    row = lookup(url)
+    if row is None:
+        _count("misses")
+        return None
+    if is_fresh(row):
+        _count("fresh_hits")
+        return row
+    if revalidate(row):
+        _count("revalidated")
+        return row
+    _count("changed")
+    return None
+
+
+def revalidate(row) -> bool:
+    """
+    Check a stale row against the origin with a conditional GET.
+
+    On 304 the row's validated_at (and any rotated validators) is saved.
+    On 200 the new validators are noted for the re-crawl of the URL.
+
+    Returns:
+        True if the origin confirmed the stored version is current
+    """
+    if not (row.etag or row.last_modified) or not is_revalidation_enabled():
+        return False
+
+    from ai_engine import replay
+
+    request = {"url": row.url, "etag": row.etag, "last_modified": row.last_modified}
+    try:
+        result = replay.call(
+            "revalidate", request,
+            lambda: _conditional_get(row.url, row.etag, row.last_modified),
+            ok=lambda response: response["status"] < 500
+        )
+    except Exception as e:
+        print(f"⚠️ Revalidation of {row.url[:80]} failed: {e}")
+        return False
+
+    if result["status"] == 304:
+        from django.utils import timezone
+
+        row.validated_at = timezone.now()
+        row.etag = result.get("etag") or row.etag
+        row.last_modified = result.get("last_modified") or row.last_modified
+        try:
+            row.save(update_fields=["validated_at", "etag", "last_modified"])
+        except Exception as e:
+            print(f"Database save error: {e}")
+        return True
+
+    if 200 <= result["status"] < 300:
+        note_validators(row.url, result.get("etag", ""), result.get("last_modified", ""))
+    return False
+
+
+def _conditional_get(url: str, etag: str, last_modified: str) -> Dict:
+    """Send a conditional GET without downloading the body."""
+    from ai_engine.http_client import get_session
+
+    headers = {"User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7)"}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+
+    timeout = float(os.getenv("CRAWL_REVALIDATE_TIMEOUT", "10"))
+    with get_session().get(url, headers=headers, timeout=timeout, stream=True) as response:
+        return {
+            "status": response.status_code,
+            "etag": response.headers.get("ETag", ""),
+            "last_modified": response.headers.get("Last-Modified", ""),
+        }
+
+
+def capture_validators(url: str) -> None:
+    """
+    Fetch an origin's validators with a HEAD request in the background,
+    for crawls that went through a reader service.
+
+    Returns immediately. Skipped if revalidation is disabled or
+    validators are already noted for the URL.
+    """
+    if not is_revalidation_enabled():
+        return
+    with _pending_lock:
+        if url in _pending:
+            return
+    _capture_executor.submit(_capture_and_store, url)
+
+
+def _capture_and_store(url: str) -> None:
+    """HEAD the origin and store its validators on the latest crawl of the URL."""
+    from ai_engine import replay
+
+    try:
+        result = replay.call(
+            "validators", {"url": url}, lambda: _head(url),
+            ok=lambda response: response["status"] < 500
+        )
+    except Exception as e:
+        print(f"⚠️ Validator capture for {url[:80]} failed: {e}")
+        return
+    etag, last_modified = result.get("etag", ""), result.get("last_modified", "")
+    if not (200 <= result["status"] < 300) or not (etag or last_modified):
+        return
+
+    try:
+        from ai_engine.db import setup_django
+
+        setup_django()
+        from apps.reports.models import CrawledContent
+
+        row = (
+            CrawledContent.objects
+            .filter(url=url[:2000], success=True, etag="", last_modified="")
+            .order_by("-created_at")
+            .first()
+        )
+        if row is not None:
+            row.etag, row.last_modified = etag[:256], last_modified[:64]
+            row.save(update_fields=["etag", "last_modified"])
+            return
+    except Exception as e:
+        print(f"Database save error: {e}")
+    # The crawl is not saved yet: hand the validators to its save
+    note_validators(url, etag, last_modified)
+
+
+def _head(url: str) -> Dict:
+    """Send a HEAD request for an origin's validators."""
+    from ai_engine.http_client import get_session
+
+    headers = {"User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7)"}
+    timeout = float(os.getenv("CRAWL_REVALIDATE_TIMEOUT", "10"))
+    response = get_session().head(url, headers=headers, timeout=timeout, allow_redirects=True)
+    return {
+        "status": response.status_code,
+        "etag": response.headers.get("ETag", ""),
+        "last_modified": response.headers.get("Last-Modified", ""),
+    }
+
+
+def note_validators(url: str, etag: str, last_modified: str) -> None:
+    """Remember origin validators seen while fetching a URL until its crawl is saved."""
+    if not (etag or last_modified):
+        return
+    with _pending_lock:
+        if len(_pending) >= _MAX_PENDING:
+            _pending.clear()
+        _pending[url] = (etag[:256], last_modified[:64])
+
+
+def take_validators(url: str) -> Tuple[str, str]:
+    """Pop the validators noted for a URL; ("", "") if none."""
+    with _pending_lock:
+        return _pending.pop(url, ("", ""))
+
+
+def get_stats() -> Dict[str, int]:
+    """Return crawl cache outcome counters of this process."""
+    with _stats_lock:
+        return dict(_stats)
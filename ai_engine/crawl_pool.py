@@ -0,0 +1,232 @@
+"""
+Crawl Pool Module - Concurrent deep reads with per-host politeness
+
+DeepReadTool reads one URL at a time, each blocking for up to 30s on
+Jina plus an LLM summary, so reading a chapter's top sources took the
+sum of all reads. CrawlPool reads a batch of URLs concurrently and
+streams results back as they finish, so a batch takes about as long as
+its slowest page.
+
+Politeness:
+- A global cap on concurrent reads and a per-domain cap
+- robots.txt is fetched once per host and cached; disallowed URLs are
+  skipped
+- Requests to the same domain are spaced by the robots.txt Crawl-delay,
+  or CRAWL_POOL_DOMAIN_DELAY if it is larger
+
+Configuration (environment):
+- CRAWL_POOL_MAX_CONCURRENCY: concurrent reads per batch (default 8)
+- CRAWL_POOL_PER_DOMAIN: concurrent reads per domain (default 2)
+- CRAWL_POOL_DOMAIN_DELAY: minimum seconds between request starts to
+  one domain (default 0.5)
+- CRAWL_POOL_RESPECT_ROBOTS: set to false to skip robots.txt (default true)
+- CRAWL_POOL_ROBOTS_TTL: robots.txt cache lifetime in seconds (default 86400)
+
+Usage:
+    async for result in CrawlPool().stream(urls):
+        if result.ok:
+            print(result.url, result.content)
+"""
+import os
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+from urllib.robotparser import RobotFileParser
+
+
+USER_AGENT = "DeepSonar"
+
+# host -> (parser or None for "allow all", fetched_at)
+_robots_cache: Dict[str, Tuple[Optional[RobotFileParser], float]] = {}
+_robots_lock = threading.Lock()
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
+
+@dataclass
+class CrawlResult:
+    """Outcome of reading one URL."""
+    url: str
+    content: str = ""
+    error: str = ""
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return not self.error
+
+
+def _host(url: str) -> str:
+    return (urlsplit(url).hostname or "").lower()
+
+
+def _fetch_robots(origin: str) -> Dict:
+    """GET an origin's robots.txt (recorded/replayed like other providers)."""
+    from ai_engine import replay
+
+    def live():
+        from ai_engine.http_client import get_session
+
+        response = get_session().get(
+            f"{origin}/robots.txt", headers={"User-Agent": USER_AGENT}, timeout=5
+        )
+        return {"status": response.status_code, "text": response.text if response.ok else ""}
+
+    return replay.call("robots", {"origin": origin}, live, ok=lambda result: result["status"] < 500)
+
+
+def get_robots(url: str) -> Optional[RobotFileParser]:
+    """
+    Get the cached robots.txt rules for a URL's host.
+
+    Returns:
+        A parser, or None if everything is allowed (no robots.txt,
+        unreachable host or fetch error)
+    """
+    parts = urlsplit(url)
+    host = (parts.hostname or "").lower()
+    ttl = _env_float("CRAWL_POOL_ROBOTS_TTL", 86400)
+    with _robots_lock:
+        cached = _robots_cache.get(host)
+    if cached and time.time() - cached[1] < ttl:
+        return cached[0]
+
+    parser = None
+    try:
+        result = _fetch_robots(f"{parts.scheme or 'https'}://{parts.netloc}")
+        parser = RobotFileParser()
+        if result["status"] in (401, 403):
+            parser.disallow_all = True
+        elif 200 <= result["status"] < 300:
+            parser.parse(result["text"].splitlines())
+        else:
+            parser = None
+    except Exception as e:
+        print(f"⚠️ robots.txt fetch failed for {host}: {e}")
+        parser = None
+
+    with _robots_lock:
+        _robots_cache[host] = (parser, time.time())
+    return parser
+
+
+def _deep_read(url: str) -> str:
+    """Default reader: DeepReadTool (crawl cache, Jina, Firecrawl, BeautifulSoup + summary)."""
+    from ai_engine.tools import DeepReadTool
+
+    summary = DeepReadTool()._run(url)
+    if summary.startswith("Failed to read"):
+        raise RuntimeError(summary)
+    return summary
+
+
+class CrawlPool:
+    """
+    Reads batches of URLs concurrently within global and per-domain limits.
+
+    Create one pool per batch inside the event loop that consumes it;
+    stream() and read_all() release the pool's threads when done.
+    """
+
+    def __init__(
+        self,
+        reader: Optional[Callable[[str], str]] = None,
+        max_concurrency: Optional[int] = None,
+        per_domain: Optional[int] = None,
+        domain_delay: Optional[float] = None,
+        respect_robots: Optional[bool] = None,
+    ):
+        self.reader = reader or _deep_read
+        self.max_concurrency = max_concurrency or _env_int("CRAWL_POOL_MAX_CONCURRENCY", 8)
+        self.per_domain = per_domain or _env_int("CRAWL_POOL_PER_DOMAIN", 2)
+        self.domain_delay = (
+            _env_float("CRAWL_POOL_DOMAIN_DELAY", 0.5) if domain_delay is None else domain_delay
+        )
+        if respect_robots is None:
+            respect_robots = os.getenv("CRAWL_POOL_RESPECT_ROBOTS", "true").lower() not in ("0", "false", "no", "off")
+        self.respect_robots = respect_robots
+
+        # Own threads, so reads are not capped by the loop's default executor
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="crawl-pool")
+        self._global: Optional[asyncio.Semaphore] = None
+        self._domains: Dict[str, asyncio.Semaphore] = {}
+        self._next_start: Dict[str, float] = {}
+
+    async def _check_robots(self, url: str) -> Tuple[bool, float]:
+        """Return (allowed, crawl delay) for a URL."""
+        if not self.respect_robots:
+            return True, self.domain_delay
+        parser = await asyncio.to_thread(get_robots, url)
+        if parser is None:
+            return True, self.domain_delay
+        delay = parser.crawl_delay(USER_AGENT) or 0
+        return parser.can_fetch(USER_AGENT, url), max(float(delay), self.domain_delay)
+
+    async def _wait_turn(self, host: str, delay: float) -> None:
+        """Space request starts to one domain by at least delay seconds."""
+        # Reserve the next start slot before sleeping (no await in between)
+        now = time.monotonic()
+        start = max(now, self._next_start.get(host, now))
+        self._next_start[host] = start + delay
+        if start > now:
+            await asyncio.sleep(start - now)
+
+    async def read(self, url: str) -> CrawlResult:
+        """Read one URL within the pool's limits."""
+        started = time.perf_counter()
+        host = _host(url)
+        if not host:
+            return CrawlResult(url, error="invalid URL")
+
+        allowed, delay = await self._check_robots(url)
+        if not allowed:
+            return CrawlResult(url, error="disallowed by robots.txt")
+
+        if self._global is None:
+            self._global = asyncio.Semaphore(self.max_concurrency)
+        domain_slot = self._domains.setdefault(host, asyncio.Semaphore(self.per_domain))
+
+        async with self._global, domain_slot:
+            await self._wait_turn(host, delay)
+            try:
+                loop = asyncio.get_running_loop()
+                content = await loop.run_in_executor(self._executor, self.reader, url)
+            except Exception as e:
+                return CrawlResult(url, error=str(e), elapsed=time.perf_counter() - started)
+        return CrawlResult(url, content=content or "", elapsed=time.perf_counter() - started)
+
+    async def stream(self, urls: List[str]) -> AsyncIterator[CrawlResult]:
+        """
+        Read URLs concurrently, yielding each result as soon as it is done.
+
+        Duplicate URLs are read once.
+        """
+        unique = list(dict.fromkeys(url for url in urls if url))
+        tasks = [asyncio.ensure_future(self.read(url)) for url in unique]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+            self._executor.shutdown(wait=False)
+
+    async def read_all(self, urls: List[str]) -> Dict[str, CrawlResult]:
+        """Read URLs concurrently and return all results keyed by URL."""
+        return {result.url: result async for result in self.stream(urls)}
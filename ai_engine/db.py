@@ -0,0 +1,27 @@
+"""
+Django bootstrap helper for the AI engine.
+
+The AI engine runs inside the Chainlit process as well as under Django,
+so database access has to make sure Django is configured first.
+"""
+import os
+import sys
+from pathlib import Path
+
+
+def setup_django() -> None:
+    """
+    Configure Django (once) so that backend models can be imported.
+
+    Adds the backend directory to sys.path and calls django.setup()
+    if the app registry is not ready yet.
+    """
+    backend_dir = Path(__file__).resolve().parent.parent / "backend"
+    if str(backend_dir) not in sys.path:
+        sys.path.insert(0, str(backend_dir))
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+
+    import django
+    if not django.apps.apps.ready:
+        django.setup()
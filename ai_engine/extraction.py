@@ -0,0 +1,408 @@
+"""
+Extraction Module - Main-content extraction from HTML pages
+
+DeepReadTool's BeautifulSoup fallback (html.parser, first 200 lines) and
+WebCrawlerTool's regex tag stripping were slow on large pages and kept
+navigation, sidebars and footers. This module is the shared replacement:
+
+1. Parse with lxml when installed (C parser), otherwise with a small
+   builder over the standard library's html.parser; both yield
+   ElementTree-style trees, so one algorithm serves both. lxml (listed
+   in requirements.txt) is needed for acceptable throughput: the
+   pure-Python fallback is about 15x slower than the regex stripping it
+   replaced (bench: ~700 vs ~11,000 pages/s) and is meant for
+   environments where lxml can't be installed
+2. Drop non-content elements (scripts, forms, nav/aside/footer) and
+   blocks whose class/id look like navigation, ads, comments or sharing
+3. Score paragraph containers readability-style (text length, commas
+   including Chinese punctuation, class/id hints), damp them by link
+   density and pick the best container plus related siblings
+4. Render plain text or Markdown (headings, list items, table rows),
+   joining inline text without inserting spaces between CJK characters
+
+Usage:
+    from ai_engine.extraction import extract
+    markdown = extract(html, markdown=True)
+"""
+import re
+from html.parser import HTMLParser
+from typing import Dict, List, Optional
+from xml.etree.ElementTree import Element
+
+
+# Elements that never hold main content
+_JUNK_TAGS = {
+    "script", "style", "noscript", "template", "iframe", "svg", "canvas", "form",
+    "button", "input", "select", "textarea", "nav", "footer", "aside",
+    "menu", "dialog", "object", "embed", "link", "meta", "head",
+}
+_VOID_TAGS = {
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta",
+    "param", "source", "track", "wbr",
+}
+_BLOCK_TAGS = {
+    "address", "article", "blockquote", "dd", "div", "dl", "dt", "figcaption",
+    "figure", "h1", "h2", "h3", "h4", "h5", "h6", "li", "main", "ol", "p", "pre",
+    "section", "table", "tbody", "td", "tfoot", "th", "thead", "tr", "ul",
+}
+# Starting one of these implicitly closes an open <p>
+_CLOSES_P = _BLOCK_TAGS - {"td", "th", "tr", "tbody", "thead", "tfoot", "dd", "dt", "li"}
+_HEADINGS = {"h1": 1, "h2": 2, "h3": 3, "h4": 4, "h5": 5, "h6": 6}
+_PARAGRAPH_TAGS = {"p", "pre", "td", "blockquote", "li", "dd"}
+
+_NEGATIVE = re.compile(
+    r"comment|\bheader\b|masthead|footer|footnote|\bnav\b|navbar|navigation|sidebar|side-bar|menu|\bshare\b"
+    r"|social|related|recommend|advert|\bads?\b|\bad-|banner|breadcrumb|copyright|login|signup|subscribe|popup|modal"
+    r"|cookie|widget|toolbar|pagination|pager|tags?-?list|hot-?list|rank-?list",
+    re.IGNORECASE,
+)
+_POSITIVE = re.compile(
+    r"article|content|main|post|entry|story|text|body|detail|news|blog|page-?content"
+    r"|zhengwen|wenzhang|neirong",
+    re.IGNORECASE,
+)
+
+_CJK = r"\u2e80-\u2fff\u3000-\u303f\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uff00-\uffef"
+_CJK_GAP = re.compile(rf"(?<=[{_CJK}])\s+(?=[{_CJK}])")
+_WHITESPACE = re.compile(r"\s+")
+_COMMAS = re.compile(r"[,，、；;。]")
+
+# Minimum characters for the chosen content; below this the page body is used
+MIN_CONTENT_CHARS = 200
+
+
+class _TreeBuilder(HTMLParser):
+    """Build an ElementTree-style tree with html.parser (no lxml needed)."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.root = Element("html")
+        self.stack = [self.root]
+
+    def _append_text(self, data: str) -> None:
+        parent = self.stack[-1]
+        if len(parent):
+            last = parent[-1]
+            last.tail = (last.tail or "") + data
+        else:
+            parent.text = (parent.text or "") + data
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "html":
+            return
+        if tag in _CLOSES_P and any(el.tag == "p" for el in self.stack[1:]):
+            self._close("p")
+        elif tag == "li":
+            self._close_nearest("li", stop={"ul", "ol"})
+        elif tag in ("td", "th"):
+            self._close_nearest("td", stop={"tr", "table"})
+            self._close_nearest("th", stop={"tr", "table"})
+        elif tag == "tr":
+            self._close_nearest("tr", stop={"table", "tbody", "thead", "tfoot"})
+
+        element = Element(tag, {k: v or "" for k, v in attrs})
+        self.stack[-1].append(element)
+        if tag not in _VOID_TAGS:
+            self.stack.append(element)
+
+    def handle_startendtag(self, tag, attrs):
+        self.stack[-1].append(Element(tag, {k: v or "" for k, v in attrs}))
+
+    def handle_endtag(self, tag):
+        if tag in _VOID_TAGS or tag == "html":
+            return
+        self._close(tag)
+
+    def _close(self, tag: str) -> None:
+        for i in range(len(self.stack) - 1, 0, -1):
+            if self.stack[i].tag == tag:
+                del self.stack[i:]
+                return
+
+    def _close_nearest(self, tag: str, stop: set) -> None:
+        for i in range(len(self.stack) - 1, 0, -1):
+            if self.stack[i].tag in stop:
+                return
+            if self.stack[i].tag == tag:
+                del self.stack[i:]
+                return
+
+    def handle_data(self, data):
+        self._append_text(data)
+
+
+def _parse_stdlib(html: str) -> Element:
+    builder = _TreeBuilder()
+    builder.feed(html)
+    builder.close()
+    return builder.root
+
+
+def parse_html(html: str):
+    """
+    Parse an HTML document into an ElementTree-style tree.
+
+    Uses lxml.html when installed, else the standard library parser.
+    """
+    try:
+        import lxml.html
+    except ImportError:
+        return _parse_stdlib(html)
+
+    # lxml rejects str input that carries an XML encoding declaration
+    html = re.sub(r"^\s*<\?xml[^>]*>", "", html)
+    try:
+        return lxml.html.document_fromstring(html)
+    except Exception:
+        return _parse_stdlib(html)
+
+
+def get_parser_name() -> str:
+    """Name of the parser backend in use ("lxml" or "html.parser")."""
+    try:
+        import lxml.html  # noqa: F401
+        return "lxml"
+    except ImportError:
+        return "html.parser"
+
+
+def _tag(element) -> str:
+    """Lowercase tag name, or "" for comments and processing instructions."""
+    tag = element.tag
+    return tag.lower() if isinstance(tag, str) else ""
+
+
+def _class_id(element) -> str:
+    return f"{element.get('class', '')} {element.get('id', '')}"
+
+
+def _is_junk(element) -> bool:
+    tag = _tag(element)
+    if not tag or tag in _JUNK_TAGS:
+        return True
+    if element.get("hidden") is not None or element.get("aria-hidden") == "true":
+        return True
+    if "display:none" in element.get("style", "").replace(" ", "").lower():
+        return True
+    if tag in ("body", "article", "main"):
+        return False
+    names = _class_id(element)
+    return bool(_NEGATIVE.search(names)) and not _POSITIVE.search(names)
+
+
+def _prune(element) -> None:
+    """Remove junk descendants in place, keeping the text that follows them."""
+    for child in list(element):
+        if _is_junk(child):
+            if child.tail:
+                previous = None
+                for sibling in element:
+                    if sibling is child:
+                        break
+                    previous = sibling
+                if previous is not None:
+                    previous.tail = (previous.tail or "") + child.tail
+                else:
+                    element.text = (element.text or "") + child.tail
+            element.remove(child)
+        else:
+            _prune(child)
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace and drop spaces between CJK characters."""
+    text = _WHITESPACE.sub(" ", text or "").strip()
+    return _CJK_GAP.sub("", text)
+
+
+def _text(element) -> str:
+    """All text of an element's subtree."""
+    return "".join(element.itertext())
+
+
+def _link_density(element, text_length: int) -> float:
+    if not text_length:
+        return 0.0
+    link_chars = sum(len(normalize_text(_text(a))) for a in element.iter() if _tag(a) == "a")
+    return min(link_chars / text_length, 1.0)
+
+
+def _class_weight(element) -> int:
+    names = _class_id(element)
+    weight = 0
+    if _NEGATIVE.search(names):
+        weight -= 25
+    if _POSITIVE.search(names):
+        weight += 25
+    return weight
+
+
+def _initial_score(element) -> float:
+    tag = _tag(element)
+    score = {"article": 10, "main": 10, "div": 5, "section": 3, "pre": 3, "td": 3,
+             "blockquote": 3, "ul": -3, "ol": -3, "dl": -3, "th": -5}.get(tag, 0)
+    if tag in _HEADINGS:
+        score = -5
+    return score + _class_weight(element)
+
+
+def _find_content(root) -> List:
+    """
+    Pick the main-content elements of a pruned tree.
+
+    Returns:
+        The best-scoring container, plus siblings that look like part of
+        the same article, in document order
+    """
+    parents: Dict = {}
+    for parent in root.iter():
+        for child in parent:
+            parents[child] = parent
+
+    scores: Dict = {}
+    for element in root.iter():
+        tag = _tag(element)
+        is_text_div = tag == "div" and not any(_tag(child) in _BLOCK_TAGS for child in element)
+        if tag not in _PARAGRAPH_TAGS and not is_text_div:
+            continue
+        text = normalize_text(_text(element))
+        if len(text) < 25:
+            continue
+
+        score = 1 + len(_COMMAS.findall(text)) + min(len(text) / 100, 3)
+        parent = parents.get(element)
+        for level, ancestor in enumerate((parent, parents.get(parent))):
+            if ancestor is None or not _tag(ancestor):
+                break
+            if ancestor not in scores:
+                scores[ancestor] = _initial_score(ancestor)
+            scores[ancestor] += score / (1 if level == 0 else 2)
+
+    if not scores:
+        return []
+
+    lengths: Dict = {}
+    best, best_score = None, float("-inf")
+    for element, score in scores.items():
+        length = len(normalize_text(_text(element)))
+        lengths[element] = length
+        final = score * (1 - _link_density(element, length))
+        scores[element] = final
+        if final > best_score:
+            best, best_score = element, final
+
+    # Siblings that belong to the same article (split containers, lead paragraphs)
+    parent = parents.get(best)
+    if parent is None:
+        return [best]
+    threshold = max(10.0, best_score * 0.2)
+    selected = []
+    for sibling in parent:
+        if sibling is best:
+            selected.append(sibling)
+            continue
+        if not _tag(sibling):
+            continue
+        if scores.get(sibling, float("-inf")) >= threshold:
+            selected.append(sibling)
+        elif _tag(sibling) == "p":
+            text = normalize_text(_text(sibling))
+            density = _link_density(sibling, len(text))
+            if (len(text) > 80 and density < 0.25) or (0 < len(text) <= 80 and density == 0 and _COMMAS.search(text)):
+                selected.append(sibling)
+    return selected
+
+
+def _render(element, markdown: bool, blocks: List[str]) -> None:
+    """Append text blocks for an element's subtree to blocks."""
+    tag = _tag(element)
+
+    if tag in _HEADINGS or tag in ("p", "li", "pre", "blockquote", "dt", "dd", "figcaption", "tr") \
+            or (tag == "div" and not any(_tag(child) in _BLOCK_TAGS for child in element)):
+        if tag == "tr":
+            cells = [normalize_text(_text(cell)) for cell in element if _tag(cell) in ("td", "th")]
+            text = " | ".join(cell for cell in cells if cell)
+            if markdown and text:
+                text = f"| {text} |"
+        else:
+            text = normalize_text(_text(element))
+        if not text:
+            return
+        if markdown and tag in _HEADINGS:
+            text = f"{'#' * _HEADINGS[tag]} {text}"
+        elif markdown and tag == "li":
+            text = f"- {text}"
+        elif markdown and tag == "blockquote":
+            text = f"> {text}"
+        blocks.append(text)
+        return
+
+    # Container: loose text goes into its own blocks between child blocks
+    loose = [element.text or ""]
+    for child in element:
+        if _tag(child) in _BLOCK_TAGS or _tag(child) in ("br", "hr"):
+            text = normalize_text("".join(loose))
+            if text:
+                blocks.append(text)
+            loose = []
+            if _tag(child) not in ("br", "hr"):
+                _render(child, markdown, blocks)
+        else:
+            loose.append(_text(child))
+        loose.append(child.tail or "")
+    text = normalize_text("".join(loose))
+    if text:
+        blocks.append(text)
+
+
+def get_title(root) -> str:
+    """Document title from <title> or the first <h1>."""
+    for tag in ("title", "h1"):
+        for element in root.iter():
+            if _tag(element) == tag:
+                title = normalize_text(_text(element))
+                if title:
+                    return title
+    return ""
+
+
+def extract(html: str, markdown: bool = False, max_chars: Optional[int] = None) -> str:
+    """
+    Extract the main content of an HTML page.
+
+    Args:
+        html: The HTML document
+        markdown: Render headings, list items and table rows as Markdown
+        max_chars: Optional cap on the returned text
+
+    Returns:
+        Main content as text blocks separated by newlines ("" if none)
+    """
+    if not html:
+        return ""
+
+    root = parse_html(html)
+    _prune(root)
+
+    body = next((el for el in root.iter() if _tag(el) == "body"), root)
+    blocks: List[str] = []
+    for element in _find_content(body):
+        _render(element, markdown, blocks)
+
+    text = "\n".join(blocks)
+    if len(text) < MIN_CONTENT_CHARS:
+        # No clear article container (listings, short pages): keep the whole pruned body
+        blocks = []
+        _render(body, markdown, blocks)
+        text = "\n".join(blocks)
+
+    # The headline often sits outside the article container
+    heading = next((el for el in body.iter() if _tag(el) == "h1"), None)
+    if heading is not None:
+        title = normalize_text(_text(heading))
+        if title and title not in text:
+            text = f"{'# ' if markdown else ''}{title}\n{text}"
+
+    if max_chars and len(text) > max_chars:
+        text = text[:max_chars]
+    return text
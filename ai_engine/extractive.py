@@ -0,0 +1,198 @@
+"""
+Extractive Summarizer Module - CPU-only summaries without an LLM call
+
+A cheap alternative to the ARK summaries in BochaWebSearchTool (snippets)
+and DeepReadTool (crawled pages), for peak hours and lower membership
+tiers. Text is split into sentences (Chinese and English punctuation),
+sentences are scored with TextRank over token overlap, and sentences
+containing numbers or named entities get a boost, since those carry the
+facts a report cites. The best sentences are returned in document order.
+
+The mode is chosen per pipeline stage ("snippet" or "page"):
+- SUMMARY_MODE: "llm" (default) or "extractive" for all stages
+- SUMMARY_MODE_SNIPPET / SUMMARY_MODE_PAGE: per-stage override
+Tools can also pin a mode through their summary_mode field.
+"""
+import os
+import re
+import math
+from typing import List, Optional
+
+from ai_engine.ranking import tokenize
+
+
+LLM = "llm"
+EXTRACTIVE = "extractive"
+
+# Sentence ends: Chinese/fullwidth punctuation, or English punctuation
+# followed by whitespace
+_SENTENCE_END = re.compile(r"(?<=[。！？；])|(?<=[.!?;])\s+|\n+")
+_MARKDOWN_PREFIX = re.compile(r"^\s*(?:#{1,6}\s+|[-*+]\s+|\d+[.)、]\s*|>\s*)")
+_LINK = re.compile(r"!?\[([^\]]*)\]\([^)]*\)")
+_ABBREVIATION = re.compile(r"\b(?:Inc|Co|Corp|Ltd|Mr|Ms|Dr|St|vs|No|e\.g|i\.e|U\.S)\.$")
+_NUMBER = re.compile(r"\d|[一二三四五六七八九十百千万亿]+(?:%|倍|亿|万|元|美元)|百分之")
+_ENTITY = re.compile(
+    r"《[^》]+》|“[^”]{2,20}”"
+    r"|[\u4e00-\u9fff]{2,12}(?:公司|集团|银行|大学|研究院|研究所|协会|委员会|部|局|中心|基金)"
+    r"|\b[A-Z][a-zA-Z0-9&]+(?:\s+[A-Z][a-zA-Z0-9&]+)*\b"
+)
+
+# Scoring boosts and limits
+NUMBER_BOOST = 0.3
+ENTITY_BOOST = 0.2
+MAX_SENTENCES = 300
+MIN_SENTENCE_CHARS = 8
+# Skip sentences whose tokens overlap a chosen sentence this much (Jaccard)
+REDUNDANCY_THRESHOLD = 0.7
+
+
+def get_summary_mode(stage: str, override: Optional[str] = None) -> str:
+    """
+    Resolve the summary mode for a pipeline stage.
+
+    Args:
+        stage: "snippet" or "page"
+        override: Mode pinned by the caller (e.g. a tool field); wins if set
+
+    Returns:
+        "llm" or "extractive"
+    """
+    mode = override or os.getenv(f"SUMMARY_MODE_{stage.upper()}") or os.getenv("SUMMARY_MODE", LLM)
+    mode = mode.strip().lower()
+    return mode if mode in (LLM, EXTRACTIVE) else LLM
+
+
+def split_sentences(text: str) -> List[str]:
+    """
+    Split mixed Chinese/English text into sentences.
+
+    Markdown headings, list markers and link syntax are stripped; very
+    short fragments (navigation, labels) are dropped.
+    """
+    text = _LINK.sub(r"\1", text or "")
+    parts = []
+    for part in _SENTENCE_END.split(text):
+        part = _MARKDOWN_PREFIX.sub("", part or "").strip()
+        if not part:
+            continue
+        if parts and _ABBREVIATION.search(parts[-1]):
+            # "Tesla Inc. reported..." was split after the abbreviation
+            parts[-1] = f"{parts[-1]} {part}"
+        else:
+            parts.append(part)
+    return [sentence for sentence in parts if len(sentence) >= MIN_SENTENCE_CHARS]
+
+
+def _overlap(a: set, b: set) -> float:
+    """TextRank sentence similarity: shared tokens over log lengths."""
+    if len(a) < 2 or len(b) < 2:
+        return 0.0
+    shared = len(a & b)
+    return shared / (math.log(len(a)) + math.log(len(b))) if shared else 0.0
+
+
+def textrank(sentences: List[str], damping: float = 0.85,
+             iterations: int = 30, tolerance: float = 1e-4) -> List[float]:
+    """
+    Score sentences with TextRank (PageRank over a similarity graph).
+
+    Returns:
+        One score per sentence
+    """
+    n = len(sentences)
+    if n == 0:
+        return []
+    if n == 1:
+        return [1.0]
+
+    token_sets = [set(tokenize(sentence)) for sentence in sentences]
+    weights = [[0.0] * n for _ in range(n)]
+    for i in range(n):
+        for j in range(i + 1, n):
+            w = _overlap(token_sets[i], token_sets[j])
+            weights[i][j] = weights[j][i] = w
+    out_sums = [sum(row) for row in weights]
+
+    scores = [1.0] * n
+    for _ in range(iterations):
+        updated = []
+        for i in range(n):
+            rank = sum(
+                weights[j][i] / out_sums[j] * scores[j]
+                for j in range(n) if weights[j][i] and out_sums[j]
+            )
+            updated.append((1 - damping) + damping * rank)
+        delta = max(abs(a - b) for a, b in zip(updated, scores))
+        scores = updated
+        if delta < tolerance:
+            break
+    return scores
+
+
+def score_sentences(sentences: List[str]) -> List[float]:
+    """TextRank scores boosted for sentences with numbers or named entities."""
+    scores = textrank(sentences)
+    boosted = []
+    for sentence, score in zip(sentences, scores):
+        boost = 1.0
+        if _NUMBER.search(sentence):
+            boost += NUMBER_BOOST
+        if _ENTITY.search(sentence):
+            boost += ENTITY_BOOST
+        boosted.append(score * boost)
+    return boosted
+
+
+def summarize(text: str, max_chars: int = 500, max_sentences: Optional[int] = None) -> str:
+    """
+    Extract the most central, fact-bearing sentences of a text.
+
+    Args:
+        text: Plain text or markdown
+        max_chars: Character budget for the summary
+        max_sentences: Optional cap on the number of sentences
+
+    Returns:
+        Selected sentences in document order, one per line
+    """
+    sentences = split_sentences(text)[:MAX_SENTENCES]
+    if not sentences:
+        return (text or "").strip()[:max_chars]
+
+    scores = score_sentences(sentences)
+    order = sorted(range(len(sentences)), key=lambda i: (-scores[i], i))
+
+    chosen = []
+    chosen_tokens = []
+    used = 0
+    for i in order:
+        if max_sentences and len(chosen) >= max_sentences:
+            break
+        tokens = set(tokenize(sentences[i]))
+        if any(len(tokens & other) / max(len(tokens | other), 1) >= REDUNDANCY_THRESHOLD
+               for other in chosen_tokens):
+            # Repeated boilerplate or a syndicated copy of a chosen sentence
+            continue
+        length = len(sentences[i])
+        if used + length > max_chars:
+            if chosen:
+                continue
+            # Always return something, even if the best sentence is too long
+            chosen.append(i)
+            break
+        chosen.append(i)
+        chosen_tokens.append(tokens)
+        used += length
+
+    return "\n".join(sentences[i][:max_chars] for i in sorted(chosen))
+
+
+def summarize_snippet(snippet: str) -> str:
+    """Snippet-sized summary matching the LLM path (about 2 sentences, 200 chars)."""
+    return summarize(snippet, max_chars=200, max_sentences=2).replace("\n", " ")
+
+
+def summarize_page(content: str) -> str:
+    """Page-sized summary as key points, matching the LLM path's format."""
+    summary = summarize(content, max_chars=800)
+    return "\n".join(f"- {line}" for line in summary.splitlines())
@@ -0,0 +1,310 @@
+"""
+Fetch Module - Byte-capped streaming page fetcher with content sniffing
+
+DeepReadTool's basic crawler and WebCrawlerTool downloaded the whole
+response body before truncating it, including multi-megabyte pages and
+the PDFs, images and archives that show up in search results. This
+module streams the body instead:
+
+1. Content-Type and the first bytes (magic numbers) are checked before
+   the rest of the body is read
+2. PDFs are read up to their own cap and their text extracted with
+   pypdf (optional dependency: pip install pypdf)
+3. Other binary content is rejected immediately
+4. HTML and text are read only up to a byte cap and decoded
+   incrementally; the charset comes from the Content-Type header, a
+   byte-order mark, a <meta> declaration or charset detection
+
+Memory and time per fetch are bounded no matter how large or slow the
+page is: besides the byte caps, the body is read within a wall-clock
+deadline, since the per-read timeout alone lets a server that drips
+bytes hold a fetch for minutes.
+
+Configuration (environment):
+- FETCH_MAX_BYTES: HTML/text bytes to read (default 2 MB)
+- FETCH_MAX_SECONDS: wall-clock limit for reading a body (default 30);
+  HTML/text read so far is kept and marked truncated, PDFs are rejected
+- FETCH_MAX_PDF_BYTES: largest PDF to download (default 20 MB)
+- FETCH_PDF_MAX_PAGES: PDF pages to extract text from (default 30)
+
+Usage:
+    page = fetch_page(url)
+    text = extract(page.text) if page.is_html else page.text
+"""
+import io
+import os
+import re
+import time
+import codecs
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+
+CHUNK_SIZE = 16 * 1024
+SNIFF_BYTES = 2048
+
+# Leading bytes of binary formats that are never worth reading as a page
+_BINARY_MAGIC = [
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+    (b"RIFF", "audio/video or image/webp"),
+    (b"PK\x03\x04", "application/zip (or Office document)"),
+    (b"\xd0\xcf\x11\xe0", "application/msword (OLE)"),
+    (b"\x1f\x8b", "application/gzip"),
+    (b"7z\xbc\xaf\x27\x1c", "application/x-7z-compressed"),
+    (b"Rar!", "application/vnd.rar"),
+    (b"\x7fELF", "application/x-executable"),
+    (b"ID3", "audio/mpeg"),
+    (b"OggS", "audio/ogg"),
+    (b"\x00\x00\x01\x00", "image/x-icon"),
+]
+_TEXT_TYPES = ("text/", "application/xhtml", "application/xml", "application/json", "application/rss", "application/atom")
+_META_CHARSET = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?\s*([a-zA-Z0-9_.:-]+)""", re.IGNORECASE)
+# Declared charsets mapped to the superset that decodes real-world pages
+_CHARSET_ALIASES = {"gb2312": "gb18030", "gbk": "gb18030", "x-gbk": "gb18030", "iso-8859-1": "cp1252", "latin-1": "cp1252"}
+
+
+class UnsupportedContentError(Exception):
+    """Raised when a URL serves content that cannot be read as a page."""
+
+
+@dataclass
+class FetchedPage:
+    """A fetched and decoded page."""
+    url: str
+    status: int
+    content_type: str
+    kind: str  # "html", "text" or "pdf"
+    text: str
+    encoding: str = ""
+    bytes_read: int = 0
+    truncated: bool = False
+    etag: str = ""
+    last_modified: str = ""
+
+    @property
+    def is_html(self) -> bool:
+        return self.kind == "html"
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
+
+def get_max_bytes() -> int:
+    """Read FETCH_MAX_BYTES (default 2 MB)."""
+    return _env_int("FETCH_MAX_BYTES", 2 * 1024 * 1024)
+
+
+def get_max_seconds() -> float:
+    """Read FETCH_MAX_SECONDS (default 30)."""
+    try:
+        return float(os.getenv("FETCH_MAX_SECONDS", "30"))
+    except ValueError:
+        return 30.0
+
+
+def _mime(content_type: str) -> str:
+    return (content_type or "").split(";", 1)[0].strip().lower()
+
+
+def _header_charset(content_type: str) -> Optional[str]:
+    match = re.search(r"charset\s*=\s*[\"']?([^\s;\"']+)", content_type or "", re.IGNORECASE)
+    return match.group(1) if match else None
+
+
+def sniff_kind(content_type: str, head: bytes) -> str:
+    """
+    Classify a response from its Content-Type and first bytes.
+
+    Magic bytes win over the header, since servers often mislabel files.
+
+    Returns:
+        "html", "text", "pdf" or "binary"
+    """
+    if head.lstrip()[:5] == b"%PDF-":
+        return "pdf"
+    for magic, _ in _BINARY_MAGIC:
+        if head.startswith(magic):
+            return "binary"
+    if head[4:8] == b"ftyp":
+        return "binary"  # MP4 / MOV / HEIC
+
+    mime = _mime(content_type)
+    # Windows executables; too short a magic to trust for text responses
+    if head.startswith(b"MZ") and not mime.startswith(_TEXT_TYPES):
+        return "binary"
+    if mime == "application/pdf":
+        return "pdf"
+    if re.search(rb"<(?:!doctype\s+html|html|head|body|meta|title|div|p)[\s>]", head[:SNIFF_BYTES], re.IGNORECASE):
+        return "html"
+    if mime.startswith(_TEXT_TYPES) or not mime:
+        return "html" if "html" in mime else "text"
+    # Unknown or binary type: read it only if it looks like text
+    return "binary" if b"\x00" in head else "text"
+
+
+def _binary_type(content_type: str, head: bytes) -> str:
+    for magic, name in _BINARY_MAGIC:
+        if head.startswith(magic):
+            return name
+    if head.startswith(b"MZ"):
+        return "application/x-msdownload"
+    return _mime(content_type) or "unknown"
+
+
+def detect_encoding(content_type: str, head: bytes) -> str:
+    """
+    Choose the charset to decode a text body with.
+
+    Order: Content-Type charset, byte-order mark, <meta> charset,
+    charset_normalizer detection (if installed), UTF-8.
+    """
+    charset = _header_charset(content_type)
+    if not charset:
+        for bom, name in ((codecs.BOM_UTF8, "utf-8-sig"), (codecs.BOM_UTF16_LE, "utf-16"), (codecs.BOM_UTF16_BE, "utf-16")):
+            if head.startswith(bom):
+                return name
+        match = _META_CHARSET.search(head[:SNIFF_BYTES * 2])
+        if match:
+            charset = match.group(1).decode("ascii", "ignore")
+    if not charset:
+        try:
+            from charset_normalizer import from_bytes
+
+            best = from_bytes(head).best()
+            charset = best.encoding if best else None
+        except ImportError:
+            charset = None
+
+    charset = _CHARSET_ALIASES.get((charset or "utf-8").lower(), charset or "utf-8")
+    try:
+        codecs.lookup(charset)
+    except LookupError:
+        return "utf-8"
+    return charset
+
+
+def extract_pdf_text(data: bytes, max_pages: Optional[int] = None) -> str:
+    """
+    Extract the text of a PDF with pypdf.
+
+    Raises:
+        UnsupportedContentError: If pypdf is not installed or the PDF is unreadable
+    """
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        raise UnsupportedContentError("PDF content requires pypdf (pip install pypdf)")
+
+    max_pages = max_pages or _env_int("FETCH_PDF_MAX_PAGES", 30)
+    try:
+        reader = PdfReader(io.BytesIO(data))
+        pages = []
+        for page in reader.pages[:max_pages]:
+            text = (page.extract_text() or "").strip()
+            if text:
+                pages.append(text)
+    except Exception as e:
+        raise UnsupportedContentError(f"Unreadable PDF: {e}")
+    return "\n\n".join(pages)
+
+
+def fetch_page(url: str, timeout: float = 15, max_bytes: Optional[int] = None,
+               headers: Optional[Dict[str, str]] = None,
+               max_seconds: Optional[float] = None) -> FetchedPage:
+    """
+    Fetch a URL with a streaming, byte- and time-capped read.
+
+    Args:
+        url: Page URL
+        timeout: Connect/read timeout in seconds (per socket read)
+        max_bytes: HTML/text byte cap (default FETCH_MAX_BYTES)
+        headers: Extra request headers
+        max_seconds: Wall-clock limit for the whole fetch (default FETCH_MAX_SECONDS)
+
+    Returns:
+        FetchedPage with decoded text (HTML source, plain text or PDF text)
+
+    Raises:
+        requests.HTTPError: On error status codes
+        UnsupportedContentError: For binary content, oversized, slow or unreadable PDFs
+        TimeoutError: If the deadline passes before the first bytes were sniffed
+    """
+    from ai_engine.http_client import get_session
+
+    max_bytes = max_bytes or get_max_bytes()
+    deadline = time.monotonic() + (max_seconds or get_max_seconds())
+    with get_session().get(url, headers=headers, timeout=timeout, stream=True) as response:
+        response.raise_for_status()
+        content_type = response.headers.get("Content-Type", "")
+        chunks = response.iter_content(chunk_size=CHUNK_SIZE)
+
+        # Read just enough to sniff the format
+        head = b""
+        for chunk in chunks:
+            head += chunk
+            if len(head) >= SNIFF_BYTES:
+                break
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Fetch of {url} exceeded its time limit")
+
+        kind = sniff_kind(content_type, head)
+        page = FetchedPage(
+            url=response.url or url,
+            status=response.status_code,
+            content_type=content_type,
+            kind=kind,
+            text="",
+            etag=response.headers.get("ETag", ""),
+            last_modified=response.headers.get("Last-Modified", ""),
+        )
+
+        if kind == "binary":
+            raise UnsupportedContentError(f"Binary content ({_binary_type(content_type, head)}) at {url}")
+
+        if kind == "pdf":
+            max_pdf = _env_int("FETCH_MAX_PDF_BYTES", 20 * 1024 * 1024)
+            declared = int(response.headers.get("Content-Length") or 0)
+            if declared > max_pdf:
+                raise UnsupportedContentError(f"PDF too large ({declared} bytes) at {url}")
+            data = bytearray(head)
+            for chunk in chunks:
+                data += chunk
+                if len(data) > max_pdf:
+                    raise UnsupportedContentError(f"PDF larger than {max_pdf} bytes at {url}")
+                if time.monotonic() > deadline:
+                    raise UnsupportedContentError(f"PDF download exceeded its time limit at {url}")
+            page.bytes_read = len(data)
+            page.text = extract_pdf_text(bytes(data))
+            return page
+
+        # HTML / text: decode incrementally up to the byte cap
+        page.encoding = detect_encoding(content_type, head)
+        decoder = codecs.getincrementaldecoder(page.encoding)(errors="replace")
+        parts = [decoder.decode(head[:max_bytes])]
+        read = min(len(head), max_bytes)
+        page.truncated = len(head) > max_bytes
+        if not page.truncated:
+            for chunk in chunks:
+                if read + len(chunk) > max_bytes:
+                    parts.append(decoder.decode(chunk[:max_bytes - read]))
+                    read = max_bytes
+                    page.truncated = True
+                    break
+                parts.append(decoder.decode(chunk))
+                read += len(chunk)
+                if time.monotonic() > deadline:
+                    # Keep what arrived in time, like a byte-capped read
+                    page.truncated = True
+                    break
+        parts.append(decoder.decode(b"", final=True))
+
+        page.bytes_read = read
+        page.text = "".join(parts)
+        return page
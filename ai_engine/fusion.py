@@ -0,0 +1,192 @@
+"""
+Result Fusion Module - Merge and de-duplicate search hits across providers
+
+Syndicated copies of an article and URLs that differ only in tracking
+parameters or scheme each cost a [Ref-N] slot and prompt tokens. This
+module:
+
+1. Canonicalizes URLs (scheme, www., default ports, tracking params, fragments)
+2. Merges ranked hit lists from several providers with reciprocal-rank fusion
+3. Drops near-duplicate snippets using 64-bit SimHash over character 3-grams
+
+Hits are plain dicts with title/name, snippet/content and url keys, as
+produced by parse_tavily_response(), parse_bocha_response() or the
+raw_data entries of pre_search().
+"""
+import re
+import hashlib
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+
+# Query parameters that never change the page content
+TRACKING_PARAMS = {
+    "gclid", "fbclid", "msclkid", "yclid", "dclid", "spm", "from",
+    "ref", "referer", "share", "share_token", "scene", "srcid", "wfr",
+    "isappinstalled", "_t", "sessionid", "mpshare",
+}
+TRACKING_PREFIXES = ("utm_", "share_", "wt_")
+
+# Reciprocal-rank fusion constant (Cormack et al.)
+RRF_K = 60
+
+# Max Hamming distance between SimHashes considered near-duplicate
+NEAR_DUPLICATE_DISTANCE = 6
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    Canonicalize a URL for duplicate detection.
+
+    Drops the scheme, "www." prefix, default ports, fragments, trailing
+    slashes and tracking parameters; sorts the remaining parameters.
+
+    Returns:
+        Canonical form such as "example.com/a/b?id=1" (not a fetchable URL)
+    """
+    if not url:
+        return ""
+    parts = urlsplit(url.strip())
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+
+    path = re.sub(r"/{2,}", "/", parts.path or "").rstrip("/")
+    params = [
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PREFIXES)
+    ]
+    query = urlencode(sorted(params))
+    return urlunsplit(("", host, path, query, "")).lstrip("/")
+
+
+def _hit_text(hit: Dict) -> str:
+    return hit.get("snippet") or hit.get("content") or ""
+
+
+def _hit_title(hit: Dict) -> str:
+    return hit.get("name") or hit.get("title") or ""
+
+
+def simhash(text: str, ngram: int = 3) -> int:
+    """
+    Compute a 64-bit SimHash over character n-grams.
+
+    Character n-grams work for both Chinese (no word boundaries) and
+    English text.
+    """
+    text = re.sub(r"\s+", "", text.lower())
+    if not text:
+        return 0
+    if len(text) < ngram:
+        grams = [text]
+    else:
+        grams = [text[i:i + ngram] for i in range(len(text) - ngram + 1)]
+
+    weights = [0] * 64
+    for gram in grams:
+        h = int.from_bytes(hashlib.md5(gram.encode("utf-8")).digest()[:8], "big")
+        for bit in range(64):
+            weights[bit] += 1 if (h >> bit) & 1 else -1
+
+    fingerprint = 0
+    for bit in range(64):
+        if weights[bit] > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """Number of differing bits between two fingerprints."""
+    return bin(a ^ b).count("1")
+
+
+def merge_duplicate_urls(hits: List[Dict]) -> List[Dict]:
+    """
+    Collapse hits whose URLs canonicalize to the same key.
+
+    The first occurrence keeps its position; the longest snippet wins.
+    """
+    merged: Dict[str, Dict] = {}
+    for hit in hits:
+        key = canonicalize_url(hit.get("url", "")) or f"#{id(hit)}"
+        if key not in merged:
+            merged[key] = dict(hit)
+        elif len(_hit_text(hit)) > len(_hit_text(merged[key])):
+            kept_url = merged[key].get("url", "")
+            merged[key] = dict(hit, url=kept_url or hit.get("url", ""))
+    return list(merged.values())
+
+
+def drop_near_duplicates(hits: List[Dict], max_distance: int = NEAR_DUPLICATE_DISTANCE) -> List[Dict]:
+    """
+    Drop hits whose title+snippet SimHash is within max_distance of an
+    earlier hit. Order is preserved, so earlier (better-ranked) hits win.
+    """
+    kept: List[Dict] = []
+    fingerprints: List[int] = []
+    for hit in hits:
+        text = f"{_hit_title(hit)} {_hit_text(hit)}".strip()
+        if len(text) < 20:
+            # Too short for a meaningful fingerprint
+            kept.append(hit)
+            continue
+        fp = simhash(text)
+        if any(hamming_distance(fp, other) <= max_distance for other in fingerprints):
+            continue
+        fingerprints.append(fp)
+        kept.append(hit)
+    return kept
+
+
+def dedupe_sources(hits: List[Dict]) -> List[Dict]:
+    """Remove URL duplicates and near-duplicate snippets from one ranked list."""
+    return drop_near_duplicates(merge_duplicate_urls(hits))
+
+
+def rrf_fuse(ranked_lists: Dict[str, List[Dict]], k: int = RRF_K) -> List[Dict]:
+    """
+    Merge ranked hit lists from several providers with reciprocal-rank fusion.
+
+    Each hit scores sum(1 / (k + rank)) over the lists it appears in,
+    matched by canonical URL.
+
+    Args:
+        ranked_lists: Provider name -> hits in that provider's rank order
+        k: RRF constant; larger values flatten rank differences
+
+    Returns:
+        Hits sorted by fused score, each with "rrf_score" and "providers" keys
+    """
+    fused: Dict[str, Dict] = {}
+    for provider, hits in ranked_lists.items():
+        for rank, hit in enumerate(merge_duplicate_urls(hits), 1):
+            key = canonicalize_url(hit.get("url", "")) or f"#{provider}-{rank}"
+            entry = fused.get(key)
+            if entry is None:
+                entry = dict(hit, rrf_score=0.0, providers=[])
+                fused[key] = entry
+            elif len(_hit_text(hit)) > len(_hit_text(entry)):
+                entry.update({k_: v for k_, v in hit.items() if k_ != "url"})
+            entry["rrf_score"] += 1.0 / (k + rank)
+            entry["providers"].append(provider)
+
+    return sorted(fused.values(), key=lambda hit: hit["rrf_score"], reverse=True)
+
+
+def fuse_results(ranked_lists: Dict[str, List[Dict]], limit: Optional[int] = None) -> List[Dict]:
+    """
+    Full fusion stage: RRF merge across providers, then near-duplicate removal.
+
+    Args:
+        ranked_lists: Provider name -> hits in rank order
+        limit: Optional max number of hits to return
+
+    Returns:
+        Fused, de-duplicated hits in score order
+    """
+    hits = drop_near_duplicates(rrf_fuse(ranked_lists))
+    return hits[:limit] if limit else hits
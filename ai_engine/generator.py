@@ -10,8 +10,138 @@ import asyncio
 from typing import Dict, List, Tuple, Optional
 from litellm import completion
 
+from ai_engine import provider_health, replay
+from ai_engine.ranking import pack_search_data
 from ai_engine.utils import parse_chapter_output, generate_chapter_prompt
-from ai_engine.pre_search import pre_search, format_research_data
+from ai_engine.pre_search import pre_search, pre_search_many, format_research_data
+
+
+def _ark_completion(prompt: str, max_tokens: int) -> str:
+    """
+    Call the ARK LLM through litellm and return the message content.
+    
+    Guarded by the provider health registry and recorded/replayed
+    according to PROVIDER_MODE (see ai_engine.replay).
+    
+    Raises:
+        RuntimeError: If the ARK circuit is open or rate limited
+    """
+    model = "openai/" + os.getenv("ARK_MODEL_ENDPOINT", "ep-20250603140551-tp9lt")
+    request = {"model": model, "prompt": prompt, "max_tokens": max_tokens}
+    return replay.call("ark", request, lambda: _ark_completion_live(model, prompt, max_tokens))
+
+
+def _ark_completion_live(model: str, prompt: str, max_tokens: int) -> str:
+    if not provider_health.acquire("ark", timeout=5):
+        raise RuntimeError(f"ARK LLM {provider_health.block_reason('ark')}")
+    
+    try:
+        response = completion(
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
+            api_key=os.getenv("ARK_API_KEY"),
+            base_url=os.getenv("ARK_BASE_URL", "https://ark.cn-beijing.volces.com/api/v3"),
+            max_tokens=max_tokens
+        )
+    except Exception:
+        provider_health.record_failure("ark")
+        raise
+    
+    provider_health.record_success("ark")
+    return response.choices[0].message.content
+
+
+def get_research_token_budget() -> int:
+    """Token budget for a chapter's research context (0 = no packing)."""
+    try:
+        return int(os.getenv("CHAPTER_RESEARCH_TOKEN_BUDGET", "3000"))
+    except ValueError:
+        return 0
+
+
+def get_deep_read_count() -> int:
+    """Number of top sources per chapter to deep-read (CHAPTER_DEEP_READ_TOP_N, 0 = off)."""
+    try:
+        return max(int(os.getenv("CHAPTER_DEEP_READ_TOP_N", "0")), 0)
+    except ValueError:
+        return 0
+
+
+async def deep_read_sources(
+    raw_data: List[Dict],
+    limit: int,
+    session=None,
+    log_callback: Optional[callable] = None
+) -> str:
+    """
+    Deep-read a chapter's top sources concurrently.
+    
+    Pages are read through a CrawlPool (global/per-domain limits,
+    robots.txt); pages already read for the report's session are reused.
+    
+    Args:
+        raw_data: Chapter sources in priority order (ref_id, title, url)
+        limit: Maximum number of sources to read
+        session: Optional ResearchSession remembering crawls per report
+        log_callback: Optional async callback for progress updates
+        
+    Returns:
+        Formatted page summaries tagged with their [Ref-N] ids, or ""
+    """
+    from ai_engine.crawl_pool import CrawlPool
+    
+    items = {item["url"]: item for item in raw_data if item.get("url")}
+    urls = list(items)[:limit]
+    summaries: Dict[str, str] = {}
+    if session is not None:
+        for url in urls:
+            cached = session.get_crawl(url)
+            if cached:
+                summaries[url] = cached
+    
+    pending = [url for url in urls if url not in summaries]
+    async for result in CrawlPool().stream(pending):
+        if result.ok and result.content:
+            summaries[result.url] = result.content
+            if session is not None:
+                session.remember_crawl(result.url, result.content)
+            if log_callback:
+                await log_callback(f"   📖 已深度阅读 {items[result.url].get('ref_id', '')} ({result.elapsed:.1f}s)")
+        elif log_callback:
+            await log_callback(f"   ⚠️ 深度阅读失败 {result.url[:60]}: {result.error[:80]}")
+    
+    blocks = [
+        f"来源 {items[url].get('ref_id', '')} 全文要点（{items[url].get('title', '')}）\n{summaries[url]}"
+        for url in urls if url in summaries
+    ]
+    return "\n\n---\n\n".join(blocks)
+
+
+def build_chapter_query(topic: str, chapter_info: Dict) -> str:
+    """Build the search query used for a chapter."""
+    return f"{topic} {chapter_info.get('focus', '')}"
+
+
+async def prefetch_chapter_research(
+    topic: str,
+    outline: List[Dict],
+    search_count: int = 10
+) -> Dict[str, Dict]:
+    """
+    Fetch search results for every chapter of an outline in one batch.
+    
+    Args:
+        topic: The main report topic
+        outline: List of chapter info dicts with 'title' and 'focus' keys
+        search_count: Number of search results to fetch per chapter
+        
+    Returns:
+        Dict mapping each chapter's search query to its pre_search() result
+    """
+    import chainlit as cl
+    
+    queries = [build_chapter_query(topic, chapter_info) for chapter_info in outline]
+    return await cl.make_async(lambda: pre_search_many(queries, count=search_count))()
 
 
 async def generate_single_chapter(
@@ -20,7 +150,9 @@ async def generate_single_chapter(
     previous_summary: str = "",
     search_count: int = 10,
     log_callback: Optional[callable] = None,
-    report=None
+    report=None,
+    search_data: Optional[Dict] = None,
+    session=None
 ) -> Tuple[str, List[Dict]]:
     """
     Generate a single chapter with research data and structured references.
@@ -32,6 +164,10 @@ async def generate_single_chapter(
         search_count: Number of search results to fetch
         log_callback: Optional async callback for logging progress updates
         report: Optional Report instance to associate search results with
+        search_data: Optional prefetched pre_search() result; skips the search
+        session: Optional ResearchSession of the report; serves repeated
+            queries from memory and sends sources already given to an
+            earlier chapter as references only
         
     Returns:
         Tuple of (chapter_content, list_of_references)
@@ -48,27 +184,60 @@ async def generate_single_chapter(
             await log_callback(msg)
     
     # Construct search query from chapter context
-    search_query = f"{topic} {chapter_focus}"
-    
-    await log(f"   🔍 正在搜索: {search_query[:50]}...")
+    search_query = build_chapter_query(topic, chapter_info)
     
-    # Perform pre-search for this chapter
-    search_data = await cl.make_async(lambda: pre_search(search_query, count=search_count))()
+    if search_data is None:
+        await log(f"   🔍 正在搜索: {search_query[:50]}...")
+        
+        # Perform pre-search for this chapter
+        if session is not None:
+            search_data = await cl.make_async(lambda: session.search(search_query, count=search_count))()
+        else:
+            search_data = await cl.make_async(lambda: pre_search(search_query, count=search_count))()
+    elif session is not None:
+        session.remember(search_query, search_data)
     
     # Log search results count
     result_count = len(search_data.get('raw_data', [])) if search_data else 0
     await log(f"   📚 找到 {result_count} 条相关资料")
     
     # Save search results to database with report association
-    if search_data.get('raw_data') and report:
+    # (session hits were already saved by the chapter that searched them)
+    if search_data.get('raw_data') and report and not search_data.get('session_hit'):
         try:
             await cl.make_async(lambda: save_search_to_db(search_query, search_data, report))()
             await log(f"   💾 搜索结果已保存并关联到报告")
         except Exception as e:
             await log(f"   ⚠️ 搜索结果保存失败: {e}")
     
+    # Keep only the snippets most relevant to this chapter, within budget
+    token_budget = get_research_token_budget()
+    if session is not None and search_data.get('raw_data'):
+        # Sources an earlier chapter already received are passed as references only
+        search_data = session.compact(search_data, f"{chapter_title} {chapter_focus}", token_budget)
+        known_count = search_data.get('known_count', 0)
+        await log(f"   🎯 精选 {len(search_data['raw_data']) - known_count} 条新资料，"
+                  f"{known_count} 条前文已用来源仅保留引用")
+    elif token_budget > 0 and search_data.get('raw_data'):
+        search_data = pack_search_data(
+            search_data,
+            f"{chapter_title} {chapter_focus}",
+            token_budget
+        )
+        await log(f"   🎯 按相关度精选 {len(search_data['raw_data'])} 条资料")
+    
     research_context = format_research_data(search_query, search_data)
     
+    # Optionally read the full pages of the top sources, concurrently
+    deep_read_count = get_deep_read_count()
+    if deep_read_count and search_data.get('raw_data'):
+        await log(f"   📖 并行深度阅读前 {deep_read_count} 条来源...")
+        deep_notes = await deep_read_sources(
+            search_data['raw_data'], deep_read_count, session, log_callback
+        )
+        if deep_notes:
+            research_context += f"\n\n## 【深度阅读摘要】\n\n{deep_notes}\n"
+    
     await log(f"   ✍️ AI 正在撰写 {chapter_title}...")
     
     # Build the generation prompt
@@ -88,15 +257,8 @@ async def generate_single_chapter(
     try:
         await log(f"   🤖 调用大模型生成内容...")
         
-        response = await cl.make_async(lambda: completion(
-            model="openai/" + os.getenv("ARK_MODEL_ENDPOINT", "ep-20250603140551-tp9lt"),
-            messages=[{"role": "user", "content": full_prompt}],
-            api_key=os.getenv("ARK_API_KEY"),
-            base_url=os.getenv("ARK_BASE_URL", "https://ark.cn-beijing.volces.com/api/v3"),
-            max_tokens=2000
-        ))()
-        
-        raw_output = response.choices[0].message.content.strip()
+        raw_output = await cl.make_async(lambda: _ark_completion(full_prompt, max_tokens=2000))()
+        raw_output = raw_output.strip()
         
         await log(f"   📝 内容生成完成，正在解析...")
         
@@ -109,7 +271,7 @@ async def generate_single_chapter(
         if search_data.get('raw_data'):
             for i, item in enumerate(search_data['raw_data'], 1):
                 refs.append({
-                    "id": f"[Ref-{i}]",
+                    "id": item.get('ref_id', f"[Ref-{i}]"),
                     "url": item.get('url', ''),
                     "title": item.get('title', '参考来源')
                 })
@@ -158,15 +320,8 @@ async def generate_report_outline(topic: str) -> List[Dict]:
 """
     
     try:
-        response = await cl.make_async(lambda: completion(
-            model="openai/" + os.getenv("ARK_MODEL_ENDPOINT", "ep-20250603140551-tp9lt"),
-            messages=[{"role": "user", "content": outline_prompt}],
-            api_key=os.getenv("ARK_API_KEY"),
-            base_url=os.getenv("ARK_BASE_URL", "https://ark.cn-beijing.volces.com/api/v3"),
-            max_tokens=1000
-        ))()
-        
-        raw_output = response.choices[0].message.content.strip()
+        raw_output = await cl.make_async(lambda: _ark_completion(outline_prompt, max_tokens=1000))()
+        raw_output = raw_output.strip()
         
         # Extract JSON from response
         import json
@@ -0,0 +1,71 @@
+"""
+Shared HTTP Client Module - Pooled keep-alive sessions for outbound calls
+
+All search, crawl and reader providers in ai_engine go through this module
+instead of bare requests.get/post, so TCP+TLS connections are reused
+across calls instead of being re-established for every request.
+
+Provides:
+- get_session(): process-wide requests.Session with per-host pools
+
+Configuration (environment):
+- HTTP_DEFAULT_TIMEOUT: default timeout in seconds (default 30)
+- HTTP_POOL_HOSTS: number of per-host pools to keep (default 20)
+- HTTP_MAX_CONNECTIONS_PER_HOST: kept-alive connections per host (default 10)
+"""
+import os
+import threading
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+DEFAULT_TIMEOUT = float(os.getenv("HTTP_DEFAULT_TIMEOUT", "30"))
+POOL_HOSTS = int(os.getenv("HTTP_POOL_HOSTS", "20"))
+MAX_CONNECTIONS_PER_HOST = int(os.getenv("HTTP_MAX_CONNECTIONS_PER_HOST", "10"))
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+class _TimeoutSession(requests.Session):
+    """requests.Session that applies a default timeout to every request."""
+
+    def __init__(self, timeout: float):
+        super().__init__()
+        self.default_timeout = timeout
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.default_timeout)
+        return super().request(method, url, **kwargs)
+
+
+def get_session() -> requests.Session:
+    """
+    Get the shared pooled requests.Session.
+
+    Each host gets its own keep-alive pool of MAX_CONNECTIONS_PER_HOST
+    connections. When a pool is exhausted, extra connections are opened
+    and discarded after use instead of waiting: requests passes no pool
+    timeout to urllib3, so a blocking pool would wait forever behind
+    hedged losers and open streams.
+
+    Returns:
+        The process-wide session (thread-safe for plain request calls)
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = _TimeoutSession(DEFAULT_TIMEOUT)
+                adapter = HTTPAdapter(
+                    pool_connections=POOL_HOSTS,
+                    pool_maxsize=MAX_CONNECTIONS_PER_HOST,
+                    pool_block=False,
+                )
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _session = session
+    return _session
+
@@ -4,131 +4,382 @@ PreSearch Module - Multi-Source Search with Fallback
 This module implements a pre-search strategy that fetches search results
 BEFORE the crew runs, injecting them into task descriptions.
 
-Search Priority:
-1. Tavily (primary) - optimized for AI agents
-2. Bocha (fallback) - Chinese search with AI answers
+Search Providers (see ai_engine.search_providers):
+1. Tavily - optimized for AI agents
+2. Bocha - Chinese search with AI answers
+
+Providers are tried in the order chosen by the search registry, which
+routes by query language/market, measured latency, success rate and
+remaining quota (Bocha first for Chinese-market queries, Tavily first
+otherwise, until there are measurements).
 
 This bypasses CrewAI's tool calling mechanism which has compatibility
 issues with certain LLM APIs (like Volcengine ARK).
+
+Results persisted via save_search_to_db() double as a read-through cache
+(see ai_engine.search_cache), so repeat queries skip the network.
 """
 import os
-import requests
-from typing import Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Dict, List, Optional
+
+from ai_engine import search_cache
+from ai_engine.fusion import dedupe_sources, fuse_results
+from ai_engine.search_providers import get_registry, run_sync
+
+
+# Providers used by pre_search(), in default priority order
+PRE_SEARCH_PROVIDERS = ["tavily", "bocha"]
+
+# Shared worker pool for hedged searches. A loser still waiting for its
+# provider slot gives up once a winner exists; one already in flight runs
+# until its own timeout and its result is discarded.
+_search_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="pre-search")
+
+_hedge_stats_lock = threading.Lock()
+_hedge_stats = {"tavily": 0, "bocha": 0, "none": 0}
+
+# Per-provider cap on in-flight requests (PRE_SEARCH_MAX_CONCURRENCY_<PROVIDER>)
+_provider_slots: Dict[str, threading.BoundedSemaphore] = {}
+_provider_slots_lock = threading.Lock()
 
 
-def pre_search(query: str, count: int = 20) -> dict:
+def _get_provider_slot(provider: str) -> threading.BoundedSemaphore:
+    with _provider_slots_lock:
+        if provider not in _provider_slots:
+            _provider_slots[provider] = threading.BoundedSemaphore(
+                int(os.getenv(f"PRE_SEARCH_MAX_CONCURRENCY_{provider.upper()}", "4"))
+            )
+        return _provider_slots[provider]
+
+
+def pre_search(query: str, count: int = 20, freshness: str = "noLimit",
+               use_cache: bool = True, hedge_delay: Optional[float] = None,
+               fuse: Optional[bool] = None) -> dict:
     """
     Perform a robust AI search before crew execution.
     
     Search Priority:
-    1. Tavily Search API (if TAVILY_API_KEY configured)
-    2. Bocha AI Search (fallback)
+    0. Search cache (stored SearchResult rows within TTL)
+    1. Providers in routing order (see search_providers.SearchRegistry.rank);
+       providers that aren't configured or whose circuit is open are skipped
+    
+    In hedged mode (hedge_delay set, or PRE_SEARCH_HEDGE_DELAY configured),
+    the second provider is started after hedge_delay seconds if the first
+    hasn't answered yet, and the first acceptable result wins.
+    
+    In fusion mode (fuse=True, or PRE_SEARCH_FUSION=true), both providers
+    are queried concurrently and their hits merged with reciprocal-rank
+    fusion and near-duplicate removal (see ai_engine.fusion).
+    
+    Providers that recently came back empty, timed out or failed for the
+    same query are skipped (see search_cache.check_negative).
     
     Args:
         query: The search query
         count: Number of results to fetch
+        freshness: Time range (oneDay, oneWeek, oneMonth, oneYear, noLimit)
+        use_cache: Whether to answer from the search cache when possible
+        hedge_delay: Seconds to wait before starting the secondary provider
+            (0 = start both at once, None = use PRE_SEARCH_HEDGE_DELAY)
+        fuse: Whether to merge results from both providers
+            (None = use PRE_SEARCH_FUSION)
         
     Returns:
         Dict with search_results (formatted string), references (list), 
-        raw_data (list), and search_source (str)
+        raw_data (list), search_source (str), plus cache_key (str),
+        requested_count (int) and freshness (str) for live results
     """
-    # Try Tavily first (higher priority)
-    tavily_result = _try_tavily_search(query, count)
-    if tavily_result.get("raw_data"):
-        print(f"✅ Tavily search returned {len(tavily_result['raw_data'])} results")
-        return tavily_result
+    known_bad = {}
+    if use_cache and search_cache.is_enabled():
+        cached = search_cache.lookup(query, count, freshness)
+        if cached:
+            print(f"♻️ Search cache hit ({cached['search_source']}) for: {query[:50]}")
+            return cached
+        
+        for provider in PRE_SEARCH_PROVIDERS:
+            outcome = search_cache.check_negative(provider, query)
+            if outcome:
+                known_bad[provider] = outcome
+        if known_bad:
+            print(f"⏭️ Skipping known-bad providers {known_bad} for: {query[:50]}")
+    
+    if hedge_delay is None:
+        hedge_delay = _get_hedge_delay()
+    if fuse is None:
+        fuse = os.getenv("PRE_SEARCH_FUSION", "false").lower() in ("1", "true", "yes", "on")
     
-    # Fallback to Bocha
-    print("⚠️ Tavily search failed or returned no results, falling back to Bocha...")
-    bocha_result = _try_bocha_search(query, count)
-    return bocha_result
+    order = get_registry().rank([p for p in PRE_SEARCH_PROVIDERS if p not in known_bad], query)
+    if order and order != PRE_SEARCH_PROVIDERS[:len(order)]:
+        print(f"🧭 Search routing: {' → '.join(order)}")
+    
+    if not order:
+        result = _no_results(query)
+    elif len(order) == 1:
+        result = _try_search(order[0], query, count, freshness)
+    elif fuse:
+        result = _fused_search(query, count, freshness, order)
+    elif hedge_delay is not None:
+        result = _hedged_search(query, count, freshness, hedge_delay, order)
+    else:
+        result = _sequential_search(query, count, freshness, order)
+    
+    if result.get("raw_data"):
+        result["cache_key"] = search_cache.make_cache_key(
+            query, result["search_source"], count, freshness
+        )
+        result["requested_count"] = count
+        result["freshness"] = freshness
+    return result
+
 
+def _sequential_search(query: str, count: int, freshness: str, order: List[str]) -> dict:
+    """Try providers in routing order until one returns results."""
+    result = _no_results(query)
+    for i, provider in enumerate(order):
+        if i:
+            print(f"⚠️ {order[i - 1]} search failed or returned no results, falling back to {provider}...")
+        result = _try_search(provider, query, count, freshness)
+        if result.get("raw_data"):
+            print(f"✅ {provider} search returned {len(result['raw_data'])} results")
+            return result
+    return result
 
-def _try_tavily_search(query: str, count: int) -> dict:
+
+def _hedged_search(query: str, count: int, freshness: str, hedge_delay: float,
+                   order: List[str]) -> dict:
     """
-    Try searching with Tavily API.
+    Race the first provider in order against the second (started after
+    hedge_delay).
     
-    Returns:
-        Dict with search results or empty dict on failure
+    Returns the first result set with raw_data. If neither provider returns
+    results, the last "none"/"error" result is returned.
     """
-    try:
-        from ai_engine.tavily_api import tavily_search, parse_tavily_response
-        
-        api_key = os.getenv("TAVILY_API_KEY")
-        if not api_key:
-            print("⚠️ TAVILY_API_KEY not configured, skipping Tavily search")
-            return {"search_results": "", "references": [], "raw_data": []}
-        
-        print(f"🔍 Trying Tavily search for: {query[:50]}...")
-        
-        raw_response = tavily_search(
-            query,
-            max_results=min(count, 20),
-            search_depth="advanced",
-            include_answer=True,
-            api_key=api_key
-        )
-        
-        if not raw_response.get("success"):
-            print(f"⚠️ Tavily search failed: {raw_response.get('error', 'Unknown error')}")
-            return {"search_results": "", "references": [], "raw_data": []}
-        
-        parsed = parse_tavily_response(raw_response)
-        web_sources = parsed.get("web_sources", [])
-        ai_answer = parsed.get("answer", "")
+    primary_name, secondary_name = order[0], order[1]
+    decided = threading.Event()
+    primary = _search_executor.submit(
+        _try_search, primary_name, query, count, freshness, cancelled=decided
+    )
+    pending = {primary: primary_name}
+    secondary_started = False
+    fallback = None
+    
+    wait([primary], timeout=max(hedge_delay, 0))
+    
+    while True:
+        for future in [f for f in pending if f.done()]:
+            provider = pending.pop(future)
+            result = future.result()
+            if result.get("raw_data"):
+                decided.set()
+                for loser in pending:
+                    loser.cancel()
+                _record_hedge_winner(provider)
+                print(f"🏁 Hedged search won by {provider} ({len(result['raw_data'])} results)")
+                return result
+            if provider == secondary_name or fallback is None:
+                fallback = result
         
-        if not web_sources and not ai_answer:
-            return {"search_results": "", "references": [], "raw_data": []}
+        # Start the secondary once the hedge delay has passed or the primary failed
+        if not secondary_started:
+            secondary = _search_executor.submit(
+                _try_search, secondary_name, query, count, freshness, cancelled=decided
+            )
+            pending[secondary] = secondary_name
+            secondary_started = True
         
-        return _format_search_results(web_sources, ai_answer, query, "tavily")
+        if not pending:
+            break
+        wait(list(pending), return_when=FIRST_COMPLETED)
+    
+    _record_hedge_winner("none")
+    if fallback and fallback.get("search_source") in ("none", "error"):
+        return fallback
+    return _no_results(query)
+
+
+def _no_results(query: str) -> dict:
+    """Result returned when no provider has anything for a query."""
+    return {
+        "search_results": f"未找到与 '{query}' 相关的搜索结果。请基于您的专业知识进行分析。",
+        "references": [],
+        "raw_data": [],
+        "search_source": "none"
+    }
+
+
+def _failed_result(error: str) -> dict:
+    """Result returned when a provider call failed."""
+    return {
+        "search_results": f"搜索失败：{error}。请基于您的专业知识进行分析。",
+        "references": [],
+        "raw_data": [],
+        "search_source": "error"
+    }
+
+
+def pre_search_many(queries: List[str], count: int = 20, freshness: str = "noLimit",
+                    use_cache: bool = True) -> Dict[str, dict]:
+    """
+    Run pre_search() for a batch of queries concurrently.
+    
+    Queries that normalize to the same text (see search_cache.normalize_query)
+    are searched once and share the result. Concurrency per provider is
+    bounded by PRE_SEARCH_MAX_CONCURRENCY_<PROVIDER> (default 4).
+    
+    Args:
+        queries: Search queries, e.g. one per report chapter
+        count: Number of results to fetch per query
+        freshness: Time range (oneDay, oneWeek, oneMonth, oneYear, noLimit)
+        use_cache: Whether to answer from the search cache when possible
         
-    except Exception as e:
-        print(f"⚠️ Tavily search exception: {e}")
-        return {"search_results": "", "references": [], "raw_data": []}
+    Returns:
+        Dict mapping each original query to its pre_search() result
+    """
+    groups: Dict[str, List[str]] = {}
+    for query in queries:
+        groups.setdefault(search_cache.normalize_query(query), []).append(query)
+    
+    if not groups:
+        return {}
+    
+    print(f"🔍 Batch search: {len(queries)} queries, {len(groups)} unique")
+    
+    results: Dict[str, dict] = {}
+    # A dedicated pool: hedged searches submit into _search_executor, so
+    # running the batch there could starve it
+    with ThreadPoolExecutor(max_workers=len(groups), thread_name_prefix="pre-search-batch") as pool:
+        futures = {
+            pool.submit(pre_search, originals[0], count, freshness, use_cache): originals
+            for originals in groups.values()
+        }
+        for future, originals in futures.items():
+            result = future.result()
+            for query in originals:
+                results[query] = result
+    
+    return results
 
 
-def _try_bocha_search(query: str, count: int) -> dict:
+def _fused_search(query: str, count: int, freshness: str, order: List[str]) -> dict:
     """
-    Try searching with Bocha API (fallback).
+    Query all providers in order concurrently and fuse their hits.
+    
+    Falls back to whichever provider returned results if only one did.
+    """
+    futures = {
+        _search_executor.submit(_try_search, provider, query, count, freshness): provider
+        for provider in order
+    }
+    results = {provider: future.result() for future, provider in futures.items()}
+    
+    ranked = {provider: results[provider]["raw_data"] for provider in order if results[provider].get("raw_data")}
+    if len(ranked) < 2:
+        for provider in order:
+            if results[provider].get("raw_data"):
+                return results[provider]
+        return results[order[-1]]
+    
+    fused = fuse_results(ranked, limit=count)
+    ai_answer = next((results[p].get("ai_answer") for p in order if results[p].get("ai_answer")), "")
+    # Name the source in default priority order so cache keys stay stable
+    source = "+".join(p for p in PRE_SEARCH_PROVIDERS if p in ranked)
+    print(f"🔀 Fused {sum(len(hits) for hits in ranked.values())} hits into {len(fused)} sources")
+    return _format_search_results(fused, ai_answer, query, source)
+
+
+def _get_hedge_delay() -> Optional[float]:
+    """Read PRE_SEARCH_HEDGE_DELAY (seconds); unset or invalid disables hedging."""
+    value = os.getenv("PRE_SEARCH_HEDGE_DELAY", "").strip()
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def _record_hedge_winner(provider: str) -> None:
+    with _hedge_stats_lock:
+        _hedge_stats[provider] = _hedge_stats.get(provider, 0) + 1
+
+
+def get_hedge_stats() -> dict:
+    """Return how often each provider won a hedged search in this process."""
+    with _hedge_stats_lock:
+        return dict(_hedge_stats)
+
+
+def _try_search(provider: str, query: str, count: int, freshness: str = "noLimit",
+                cancelled: Optional[threading.Event] = None, **options) -> dict:
+    """
+    Search with one provider through the search registry.
+    
+    Counts above the provider's per-call cap are served by concurrent
+    sub-requests (see SearchRegistry.search_deep). Empty, timed-out and
+    failed searches are recorded in the negative cache.
+    
+    Args:
+        provider: Registered provider name (tavily, bocha, ...)
+        cancelled: Set once the result is no longer needed (a hedged search
+            was won); the search is skipped if that happens before it gets
+            a provider slot
+        options: Provider options, e.g. answer_wait for Bocha
     
     Returns:
-        Dict with search results
+        Formatted result dict; search_source is the provider on success,
+        "none" if nothing was found or the search was skipped, and "error"
+        if the call failed
     """
+    slot = _get_provider_slot(provider)
+    if cancelled is None:
+        slot.acquire()
+    else:
+        # Poll so a hedge loser queued behind the limit never takes a slot
+        while not slot.acquire(timeout=0.1):
+            if cancelled.is_set():
+                return _no_results(query)
+        if cancelled.is_set():
+            slot.release()
+            return _no_results(query)
+    
+    print(f"🔍 Trying {provider} search for: {query[:50]}...")
+    
     try:
-        from ai_engine.bocha_api import bocha_ai_search, parse_bocha_response
-        
-        print(f"🔍 Trying Bocha search for: {query[:50]}...")
-        
-        raw_response = bocha_ai_search(
-            query, 
-            count=count, 
-            answer=True,
-            stream=False
-        )
-        
-        parsed = parse_bocha_response(raw_response)
-        web_sources = parsed.get("web_sources", [])
-        ai_answer = parsed.get("answer", "")
-        
-        if not web_sources and not ai_answer:
-            return {
-                "search_results": f"未找到与 '{query}' 相关的搜索结果。请基于您的专业知识进行分析。",
-                "references": [],
-                "raw_data": [],
-                "search_source": "none"
-            }
-        
-        return _format_search_results(web_sources, ai_answer, query, "bocha")
-        
+        response = run_sync(get_registry().search_deep(provider, query, count, freshness, **options))
     except Exception as e:
         import traceback
         traceback.print_exc()
-        return {
-            "search_results": f"搜索失败：{str(e)}。请基于您的专业知识进行分析。",
-            "references": [],
-            "raw_data": [],
-            "search_source": "error"
-        }
+        return _failed_result(str(e))
+    finally:
+        slot.release()
+    
+    if response.error:
+        print(f"⚠️ {provider} search failed: {response.error}")
+        _record_failure(provider, query, response.error)
+        return _failed_result(response.error)
+    
+    if response.empty:
+        search_cache.record_negative(provider, query, "empty")
+        return _no_results(query)
+    
+    search_cache.clear_negative(provider, query)
+    return _format_search_results(
+        [hit.to_source() for hit in response.hits], response.answer, query, provider
+    )
+
+
+def _record_failure(provider: str, query: str, error) -> None:
+    """
+    Negative-cache a failed search as "timeout" or "error".
+    
+    Circuit-open and rate-limit rejections are provider-wide and already
+    tracked by provider_health, so they are not cached per query.
+    """
+    if "circuit open" in str(error):
+        return
+    search_cache.record_negative(provider, query, search_cache.classify_failure(error))
 
 
 def _format_search_results(web_sources: list, ai_answer: str, query: str, source: str) -> dict:
@@ -143,7 +394,11 @@ def _format_search_results(web_sources: list, ai_answer: str, query: str, source
         
     Returns:
         Formatted dict with search_results, references, raw_data, search_source
+        and ai_answer
     """
+    # Drop tracking-param URL duplicates and syndicated near-duplicates
+    web_sources = dedupe_sources(web_sources)
+    
     results = []
     references = []
     raw_data = []
@@ -174,12 +429,17 @@ def _format_search_results(web_sources: list, ai_answer: str, query: str, source
         
         references.append(f"{ref_id} {title}, 链接: {url}")
         
-        raw_data.append({
+        item = {
             "ref_id": ref_id,
             "title": title,
             "snippet": snippet,
             "url": url
-        })
+        }
+        if page.get("raw_content"):
+            # Full page text returned by the provider (Tavily include_raw_content);
+            # save_search_to_db() moves it into CrawledContent
+            item["raw_content"] = page["raw_content"]
+        raw_data.append(item)
     
     search_results = "\n\n---\n\n".join(results)
     
@@ -187,7 +447,8 @@ def _format_search_results(web_sources: list, ai_answer: str, query: str, source
         "search_results": search_results,
         "references": references,
         "raw_data": raw_data,
-        "search_source": source
+        "search_source": source,
+        "ai_answer": ai_answer
     }
 
 
@@ -221,34 +482,93 @@ def save_search_to_db(keyword: str, search_data: dict, report=None):
     Args:
         keyword: The search keyword
         search_data: Dict containing raw_data, search_results, references, search_source
+            and optionally cache_key, requested_count and freshness (set by
+            pre_search for live results)
         report: Optional Report instance to associate with the search result
+    
+    Page contents that came with the results (raw_content) are stored as
+    CrawledContent rows with method "tavily" instead of in results_json, so
+    DeepReadTool can serve those URLs without crawling them.
     """
     try:
-        import sys
-        from pathlib import Path
-        
-        backend_dir = Path(__file__).resolve().parent.parent / "backend"
-        if str(backend_dir) not in sys.path:
-            sys.path.insert(0, str(backend_dir))
-        
-        os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
-        
-        import django
-        if not django.apps.apps.ready:
-            django.setup()
+        from ai_engine.db import setup_django
         
+        setup_django()
         from apps.reports.models import SearchResult
         
         formatted = f"关键词: {keyword}\n\n{search_data['search_results']}"
         search_source = search_data.get("search_source", "bocha")
         
-        SearchResult.objects.create(
+        # Cache hits are re-saved for report association only, without a
+        # cache key, so that they don't extend the original entry's TTL
+        cache_key = "" if search_data.get("cache_hit") else search_data.get("cache_key", "")
+        
+        raw_data = search_data["raw_data"]
+        save_raw_contents(raw_data, report)
+        results_json = [
+            {k: v for k, v in item.items() if k != "raw_content"} for item in raw_data
+        ]
+        
+        row = SearchResult.objects.create(
             keyword=keyword,
             report=report,
-            results_count=len(search_data["raw_data"]),
-            results_json=search_data["raw_data"],
+            results_count=len(raw_data),
+            results_json=results_json,
             formatted_results=formatted,
-            search_source=search_source
+            search_source=search_source,
+            cache_key=cache_key,
+            requested_count=search_data.get("requested_count", 0) if cache_key else 0,
+            freshness=search_data.get("freshness", "") if cache_key else ""
+        )
+        
+        if cache_key and row.results_count:
+            from ai_engine.query_index import get_query_index
+            get_query_index().add(row.id, row.keyword, row.created_at)
+    except Exception as e:
+        print(f"Database save error: {e}")
+
+
+def save_raw_contents(raw_data: list, report=None) -> int:
+    """
+    Store page contents returned by the search provider as crawls.
+    
+    URLs that already have a successful crawl are skipped.
+    
+    Returns:
+        Number of CrawledContent rows created
+    """
+    pages = {
+        item["url"][:2000]: item["raw_content"]
+        for item in raw_data
+        if item.get("url") and len(item.get("raw_content") or "") > 100
+    }
+    if not pages:
+        return 0
+    
+    try:
+        from ai_engine.db import setup_django
+        
+        setup_django()
+        from apps.reports.models import CrawledContent
+        
+        known = set(
+            CrawledContent.objects
+            .filter(url__in=list(pages), success=True)
+            .values_list("url", flat=True)
         )
+        rows = [
+            CrawledContent(
+                url=url,
+                report=report,
+                raw_content=content[:50000],
+                content_length=len(content),
+                crawl_method=CrawledContent.CrawlMethod.TAVILY,
+                success=True
+            )
+            for url, content in pages.items() if url not in known
+        ]
+        CrawledContent.objects.bulk_create(rows)
+        return len(rows)
     except Exception as e:
         print(f"Database save error: {e}")
+        return 0
@@ -0,0 +1,289 @@
+"""
+Provider Health Registry - Circuit breaker and rate limiter per provider
+
+Tracks the health of external providers (Tavily, Bocha, ARK LLM, ...) in a
+small SQLite file shared by the Chainlit and Django processes, so that
+once a provider is failing every process fails fast instead of waiting
+out the full request timeout.
+
+Each provider has:
+- A token bucket rate limiter (PROVIDER_RATE_<NAME> tokens/sec,
+  PROVIDER_BURST_<NAME> bucket size)
+- A circuit breaker: after PROVIDER_FAILURE_THRESHOLD consecutive failures
+  the circuit opens for PROVIDER_COOLDOWN seconds, then a single half-open
+  probe is let through; its outcome closes or re-opens the circuit.
+
+The store lives at PROVIDER_HEALTH_DB (default backend/db/provider_health.sqlite3).
+If the store is unavailable, calls are allowed (fail open).
+
+Usage:
+    if not provider_health.acquire("tavily", timeout=5):
+        return error(f"Tavily {provider_health.block_reason('tavily')}")
+    try:
+        ...
+        provider_health.record_success("tavily")
+    except Exception:
+        provider_health.record_failure("tavily")
+"""
+import os
+import time
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Default (rate per second, burst) per provider
+DEFAULT_LIMITS = {
+    "tavily": (5.0, 10),
+    "bocha": (5.0, 10),
+    "jina": (5.0, 10),
+    "duckduckgo": (1.0, 3),
+    "ark": (10.0, 20),
+}
+
+_local = threading.local()
+
+
+def _db_path() -> Path:
+    default = Path(__file__).resolve().parent.parent / "backend" / "db" / "provider_health.sqlite3"
+    return Path(os.getenv("PROVIDER_HEALTH_DB", str(default)))
+
+
+def _connect() -> sqlite3.Connection:
+    """Get this thread's connection to the health store, creating the schema."""
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        path = _db_path()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(path), timeout=5, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS provider_health (
+                provider TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                refilled_at REAL NOT NULL,
+                state TEXT NOT NULL,
+                failures INTEGER NOT NULL,
+                opened_at REAL NOT NULL,
+                probe_at REAL NOT NULL
+            )
+            """
+        )
+        _local.conn = conn
+    return conn
+
+
+def _limits(provider: str):
+    rate, burst = DEFAULT_LIMITS.get(provider, (5.0, 10))
+    name = provider.upper()
+    rate = float(os.getenv(f"PROVIDER_RATE_{name}", rate))
+    burst = float(os.getenv(f"PROVIDER_BURST_{name}", burst))
+    return rate, burst
+
+
+def _failure_threshold() -> int:
+    return int(os.getenv("PROVIDER_FAILURE_THRESHOLD", "5"))
+
+
+def _cooldown() -> float:
+    return float(os.getenv("PROVIDER_COOLDOWN", "60"))
+
+
+def _load(conn: sqlite3.Connection, provider: str, now: float) -> Dict:
+    row = conn.execute(
+        "SELECT tokens, refilled_at, state, failures, opened_at, probe_at "
+        "FROM provider_health WHERE provider = ?",
+        (provider,),
+    ).fetchone()
+    if row is None:
+        _, burst = _limits(provider)
+        return {"tokens": burst, "refilled_at": now, "state": CLOSED,
+                "failures": 0, "opened_at": 0.0, "probe_at": 0.0}
+    keys = ("tokens", "refilled_at", "state", "failures", "opened_at", "probe_at")
+    return dict(zip(keys, row))
+
+
+def _save(conn: sqlite3.Connection, provider: str, record: Dict) -> None:
+    conn.execute(
+        "INSERT OR REPLACE INTO provider_health "
+        "(provider, tokens, refilled_at, state, failures, opened_at, probe_at) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (provider, record["tokens"], record["refilled_at"], record["state"],
+         record["failures"], record["opened_at"], record["probe_at"]),
+    )
+
+
+def _try_acquire(provider: str) -> Tuple[bool, float]:
+    """
+    Try to take a token for a call.
+
+    Returns:
+        Tuple of (allowed, seconds until a token is available; -1 if the
+        circuit is open and waiting is pointless)
+    """
+    conn = _connect()
+    now = time.time()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        record = _load(conn, provider, now)
+        cooldown = _cooldown()
+        probing = False
+
+        if record["state"] == OPEN:
+            if now - record["opened_at"] < cooldown:
+                conn.execute("ROLLBACK")
+                return False, -1
+            probing = True
+        elif record["state"] == HALF_OPEN:
+            # Only one probe at a time; a probe that never reported back
+            # is considered lost after one cooldown period
+            if now - record["probe_at"] < cooldown:
+                conn.execute("ROLLBACK")
+                return False, -1
+            probing = True
+
+        rate, burst = _limits(provider)
+        tokens = min(burst, record["tokens"] + (now - record["refilled_at"]) * rate)
+        record["refilled_at"] = now
+        if tokens < 1:
+            record["tokens"] = tokens
+            _save(conn, provider, record)
+            conn.execute("COMMIT")
+            return False, (1 - tokens) / rate if rate > 0 else -1
+
+        record["tokens"] = tokens - 1
+        if probing:
+            record["state"] = HALF_OPEN
+            record["probe_at"] = now
+        _save(conn, provider, record)
+        conn.execute("COMMIT")
+        return True, 0.0
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def acquire(provider: str, timeout: float = 0.0) -> bool:
+    """
+    Check whether a call to a provider may go out now.
+
+    Args:
+        provider: Provider name (tavily, bocha, jina, ark, ...)
+        timeout: Max seconds to wait for a rate limiter token
+
+    Returns:
+        True if the call is allowed, False if the circuit is open or the
+        rate limit is exhausted for longer than timeout
+    """
+    deadline = time.time() + timeout
+    while True:
+        try:
+            allowed, retry_after = _try_acquire(provider)
+        except Exception as e:
+            print(f"⚠️ Provider health store unavailable: {e}")
+            return True
+
+        if allowed:
+            return True
+        if retry_after < 0 or time.time() + retry_after > deadline:
+            return False
+        time.sleep(retry_after)
+
+
+def block_reason(provider: str) -> str:
+    """
+    Describe why acquire() refused a call, for error messages.
+
+    Returns:
+        "circuit open" or "rate limited"
+    """
+    return "rate limited" if is_available(provider) else "circuit open"
+
+
+def is_available(provider: str) -> bool:
+    """Return False if the provider's circuit is currently open (read-only)."""
+    try:
+        conn = _connect()
+        now = time.time()
+        record = _load(conn, provider, now)
+    except Exception:
+        return True
+    if record["state"] == OPEN:
+        return now - record["opened_at"] >= _cooldown()
+    if record["state"] == HALF_OPEN:
+        return now - record["probe_at"] >= _cooldown()
+    return True
+
+
+def remaining_quota(provider: str) -> float:
+    """
+    Return the share of the provider's rate-limit bucket currently
+    available (0.0-1.0, read-only). Returns 1.0 if the store is unavailable.
+    """
+    try:
+        conn = _connect()
+        now = time.time()
+        record = _load(conn, provider, now)
+    except Exception:
+        return 1.0
+    rate, burst = _limits(provider)
+    if burst <= 0:
+        return 1.0
+    tokens = min(burst, record["tokens"] + (now - record["refilled_at"]) * rate)
+    return max(tokens, 0.0) / burst
+
+
+def record_success(provider: str) -> None:
+    """Record a successful call; closes the circuit."""
+    _update(provider, success=True)
+
+
+def record_failure(provider: str) -> None:
+    """Record a failed call; may open the circuit."""
+    _update(provider, success=False)
+
+
+def _update(provider: str, success: bool) -> None:
+    try:
+        conn = _connect()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            record = _load(conn, provider, now)
+            if success:
+                record["state"] = CLOSED
+                record["failures"] = 0
+            else:
+                record["failures"] += 1
+                if record["state"] == HALF_OPEN or record["failures"] >= _failure_threshold():
+                    if record["state"] != OPEN:
+                        print(f"🔌 Circuit opened for provider '{provider}'")
+                    record["state"] = OPEN
+                    record["opened_at"] = now
+            _save(conn, provider, record)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    except Exception as e:
+        print(f"⚠️ Provider health update failed: {e}")
+
+
+def get_status() -> List[Dict]:
+    """Return the health record of every known provider."""
+    try:
+        rows = _connect().execute(
+            "SELECT provider, tokens, state, failures, opened_at FROM provider_health ORDER BY provider"
+        ).fetchall()
+    except Exception:
+        return []
+    return [
+        {"provider": p, "tokens": t, "state": s, "failures": f, "opened_at": o}
+        for p, t, s, f, o in rows
+    ]
@@ -0,0 +1,159 @@
+"""
+Query Index Module - Near-duplicate query lookup over SearchResult keywords
+
+Many chapter queries differ only in word order or an extra focus keyword,
+e.g. "新能源汽车 市场规模" vs "新能源汽车市场规模 发展历程". This module keeps
+an in-memory inverted index of character bigrams over the keywords of
+cached (live) SearchResult rows, so search_cache.lookup() can reuse a
+recent result whose keyword is similar enough.
+
+Similarity is the Dice coefficient over character bigram sets with
+whitespace removed, which is insensitive to word order and tolerant of
+an added keyword. The index is filled incrementally: new rows are added
+by save_search_to_db() and picked up from the database on refresh.
+
+Configuration (environment):
+- SEARCH_REUSE_THRESHOLD: minimum similarity for reuse (default 0.8, 0 disables)
+- SEARCH_REUSE_REFRESH: seconds between database refreshes (default 60)
+"""
+import os
+import time
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+from ai_engine.search_cache import normalize_query
+
+
+def char_bigrams(text: str) -> Set[str]:
+    """Character bigrams of a normalized query with whitespace removed."""
+    compact = "".join(normalize_query(text).split())
+    if len(compact) < 2:
+        return {compact} if compact else set()
+    return {compact[i:i + 2] for i in range(len(compact) - 1)}
+
+
+def similarity(a: str, b: str) -> float:
+    """Dice coefficient between the character bigram sets of two queries."""
+    grams_a, grams_b = char_bigrams(a), char_bigrams(b)
+    if not grams_a or not grams_b:
+        return 0.0
+    return 2 * len(grams_a & grams_b) / (len(grams_a) + len(grams_b))
+
+
+class QueryIndex:
+    """
+    Inverted character-bigram index over SearchResult keywords.
+
+    Entries map a SearchResult row id to its keyword bigrams and creation
+    time. Lookups score only rows sharing at least one bigram with the
+    query.
+    """
+
+    def __init__(self, refresh_interval: float = 60.0):
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._postings: Dict[str, Set[int]] = {}
+        self._entries: Dict[int, Tuple[Set[str], datetime]] = {}
+        # Highest row id loaded by refresh(); rows added locally don't move
+        # it, so rows other processes insert in between are still loaded
+        self._refresh_mark = 0
+        self._last_refresh = 0.0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, row_id: int, keyword: str, created_at: datetime) -> None:
+        """Add one SearchResult row to the index."""
+        grams = char_bigrams(keyword)
+        if not grams:
+            return
+        with self._lock:
+            if row_id in self._entries:
+                return
+            self._entries[row_id] = (grams, created_at)
+            for gram in grams:
+                self._postings.setdefault(gram, set()).add(row_id)
+
+    def refresh(self, force: bool = False) -> None:
+        """Load rows created since the last refresh (throttled)."""
+        if not force and time.time() - self._last_refresh < self.refresh_interval:
+            return
+        self._last_refresh = time.time()
+
+        from ai_engine.db import setup_django
+
+        setup_django()
+        from apps.reports.models import SearchResult
+
+        rows = (
+            SearchResult.objects
+            .filter(id__gt=self._refresh_mark, results_count__gt=0)
+            .exclude(cache_key="")
+            .order_by("id")
+            .values_list("id", "keyword", "created_at")
+        )
+        for row_id, keyword, created_at in rows.iterator():
+            self.add(row_id, keyword, created_at)
+            self._refresh_mark = max(self._refresh_mark, row_id)
+
+    def find(self, query: str, threshold: float,
+             created_after: Optional[datetime] = None) -> List[Tuple[int, float]]:
+        """
+        Find indexed rows similar to a query.
+
+        Args:
+            query: The search query
+            threshold: Minimum Dice similarity
+            created_after: Ignore rows created before this time
+
+        Returns:
+            List of (row_id, similarity), best first
+        """
+        grams = char_bigrams(query)
+        if not grams:
+            return []
+
+        with self._lock:
+            overlap: Dict[int, int] = {}
+            for gram in grams:
+                for row_id in self._postings.get(gram, ()):
+                    overlap[row_id] = overlap.get(row_id, 0) + 1
+
+            matches = []
+            for row_id, shared in overlap.items():
+                row_grams, created_at = self._entries[row_id]
+                if created_after and created_at < created_after:
+                    continue
+                score = 2 * shared / (len(grams) + len(row_grams))
+                if score >= threshold:
+                    matches.append((row_id, score))
+
+        # Prefer the most similar, then the newest row
+        matches.sort(key=lambda m: (m[1], m[0]), reverse=True)
+        return matches
+
+
+_index: Optional[QueryIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_query_index() -> QueryIndex:
+    """Get the process-wide query index."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = QueryIndex(float(os.getenv("SEARCH_REUSE_REFRESH", "60")))
+    return _index
+
+
+def get_reuse_threshold() -> Optional[float]:
+    """Read SEARCH_REUSE_THRESHOLD; returns None if reuse is disabled."""
+    try:
+        threshold = float(os.getenv("SEARCH_REUSE_THRESHOLD", "0.8"))
+    except ValueError:
+        return None
+    if threshold <= 0 or threshold > 1:
+        return None
+    return threshold
@@ -0,0 +1,71 @@
+"""
+Query Language Module - Fast language/market detection for search routing
+
+Most report topics are Chinese-language, Chinese-market queries, where
+Bocha usually returns more relevant results than Tavily. This module
+classifies a query as "cn" (Chinese language or mainland market) or
+"global" with cheap local rules, so the search registry can pick the
+provider order per query:
+
+- CJK character ratio of the query text
+- Mainland domain hints (.cn / .com.cn domains, site: filters)
+- Mainland market keywords in English queries (China, A-share, RMB, ...)
+"""
+import re
+from typing import Dict, List
+
+
+CN = "cn"
+GLOBAL = "global"
+
+# Minimum share of CJK characters (among non-space characters) for "cn"
+CJK_RATIO_THRESHOLD = 0.15
+
+# Providers preferred per market, best first
+MARKET_PREFERENCES: Dict[str, List[str]] = {
+    CN: ["bocha", "bocha_web"],
+    GLOBAL: ["tavily", "duckduckgo"],
+}
+
+_CJK = re.compile(r"[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]")
+_CN_DOMAIN = re.compile(r"(?:^|[\s./:])[\w-]+\.(?:com\.cn|gov\.cn|edu\.cn|org\.cn|net\.cn|cn)\b", re.IGNORECASE)
+_CN_MARKET = re.compile(
+    r"\b(?:china|chinese|mainland|prc|beijing|shanghai|shenzhen|guangzhou|hangzhou"
+    r"|a-shares?|csrc|rmb|renminbi|yuan|sse|szse|hkex)\b",
+    re.IGNORECASE,
+)
+
+
+def cjk_ratio(text: str) -> float:
+    """Share of CJK ideographs among the non-whitespace characters."""
+    chars = [c for c in text or "" if not c.isspace()]
+    if not chars:
+        return 0.0
+    return sum(1 for c in chars if _CJK.match(c)) / len(chars)
+
+
+def detect_market(query: str) -> str:
+    """
+    Classify a query as Chinese-market ("cn") or "global".
+
+    Returns:
+        "cn" if the query is mostly Chinese, targets a mainland domain or
+        names the mainland market; otherwise "global"
+    """
+    if cjk_ratio(query) >= CJK_RATIO_THRESHOLD:
+        return CN
+    if _CN_DOMAIN.search(query or "") or _CN_MARKET.search(query or ""):
+        return CN
+    return GLOBAL
+
+
+def preferred_order(market: str, candidates: List[str]) -> List[str]:
+    """
+    Order candidates by the static market preference.
+
+    Preferred providers come first in preference order; the others keep
+    their relative order.
+    """
+    preferred = MARKET_PREFERENCES.get(market, [])
+    rank = {name: i for i, name in enumerate(preferred)}
+    return sorted(candidates, key=lambda name: rank.get(name, len(preferred)))
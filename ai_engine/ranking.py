@@ -0,0 +1,179 @@
+"""
+Ranking Module - BM25 relevance ranking and token-budgeted context packing
+
+Chapter research used to include every snippet in provider order. This
+module scores snippets against the chapter title and focus with BM25 and
+packs the best ones into a token budget, keeping their original [Ref-N]
+ids so GlobalReferenceManager and the chapter references still line up.
+
+Tokenization is CJK-aware: runs of Chinese/Japanese/Korean characters are
+split into character bigrams, other text into lowercase words.
+"""
+import re
+import math
+from collections import Counter
+from typing import Dict, List, Optional
+
+
+_CJK_RUN = re.compile(r"[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\u3040-\u30ff\uac00-\ud7af]+")
+_WORD = re.compile(r"[a-z0-9]+(?:[.%][a-z0-9]+)*")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Tokenize mixed Chinese/English text.
+
+    CJK runs become overlapping character bigrams (a single character run
+    stays a unigram); other text becomes lowercase alphanumeric words.
+    """
+    text = (text or "").lower()
+    tokens: List[str] = []
+    last = 0
+    for match in _CJK_RUN.finditer(text):
+        tokens.extend(_WORD.findall(text[last:match.start()]))
+        run = match.group()
+        if len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+        last = match.end()
+    tokens.extend(_WORD.findall(text[last:]))
+    return tokens
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough LLM token estimate: one per CJK character, one per ~4 other chars.
+    """
+    cjk = sum(len(run) for run in _CJK_RUN.findall(text or ""))
+    other = len(text or "") - cjk
+    return cjk + (other + 3) // 4
+
+
+class BM25:
+    """
+    Okapi BM25 over a small in-memory corpus.
+
+    Usage:
+        bm25 = BM25([tokenize(doc) for doc in docs])
+        scores = bm25.score(tokenize(query))
+    """
+
+    def __init__(self, corpus: List[List[str]], k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.doc_freqs = [Counter(doc) for doc in corpus]
+        self.doc_lens = [len(doc) for doc in corpus]
+        self.avg_len = sum(self.doc_lens) / len(corpus) if corpus else 0.0
+
+        df: Counter = Counter()
+        for freqs in self.doc_freqs:
+            df.update(freqs.keys())
+        n = len(corpus)
+        self.idf = {term: math.log(1 + (n - freq + 0.5) / (freq + 0.5)) for term, freq in df.items()}
+
+    def score(self, query: List[str]) -> List[float]:
+        """BM25 score of every document for a tokenized query."""
+        scores = []
+        for freqs, length in zip(self.doc_freqs, self.doc_lens):
+            norm = self.k1 * (1 - self.b + self.b * length / self.avg_len) if self.avg_len else self.k1
+            total = 0.0
+            for term in set(query):
+                tf = freqs.get(term)
+                if tf:
+                    total += self.idf[term] * tf * (self.k1 + 1) / (tf + norm)
+            scores.append(total)
+        return scores
+
+
+def rank_sources(raw_data: List[Dict], query: str) -> List[Dict]:
+    """
+    Sort raw_data entries by BM25 relevance of title + snippet to a query.
+
+    Ties keep provider order.
+    """
+    if not raw_data:
+        return []
+    corpus = [tokenize(f"{item.get('title', '')} {item.get('snippet', '')}") for item in raw_data]
+    scores = BM25(corpus).score(tokenize(query))
+    order = sorted(range(len(raw_data)), key=lambda i: (-scores[i], i))
+    return [raw_data[i] for i in order]
+
+
+def pack_sources(raw_data: List[Dict], query: str, token_budget: int,
+                 max_snippet_chars: int = 350) -> List[Dict]:
+    """
+    Select the most relevant sources that fit a token budget.
+
+    Args:
+        raw_data: pre_search() raw_data entries (ref_id, title, snippet, url)
+        query: Text to rank against, e.g. chapter title + focus
+        token_budget: Max estimated tokens for the packed source blocks
+        max_snippet_chars: Snippet truncation per source
+
+    Returns:
+        Selected entries in relevance order, ref_id preserved, with the
+        snippet truncated to max_snippet_chars
+    """
+    packed = []
+    used = 0
+    for item in rank_sources(raw_data, query):
+        snippet = item.get("snippet", "")
+        if len(snippet) > max_snippet_chars:
+            snippet = snippet[:max_snippet_chars] + "..."
+        block = f"来源 {item.get('ref_id', '')}\n标题: {item.get('title', '')}\n内容: {snippet}\n链接: {item.get('url', '')}"
+        cost = estimate_tokens(block)
+        if used + cost > token_budget:
+            if packed:
+                continue
+            # Always keep the best source, even if it alone exceeds the budget
+        packed.append(dict(item, snippet=snippet))
+        used += cost
+    return packed
+
+
+def _extract_answer(search_results: str) -> str:
+    """Get the AI overview block from a formatted search_results string."""
+    if search_results.startswith("【AI 智能综述】"):
+        return search_results.split("\n\n---\n\n", 1)[0].split("\n", 1)[-1].strip()
+    return ""
+
+
+def pack_search_data(search_data: Dict, query: str, token_budget: int,
+                     answer_chars: Optional[int] = 600) -> Dict:
+    """
+    Return a copy of a pre_search() result packed into a token budget.
+
+    The AI overview (truncated to answer_chars) is kept first and counts
+    against the budget; sources are added in relevance order.
+
+    Returns:
+        pre_search()-style dict whose raw_data, references and
+        search_results contain only the packed sources, with the
+        original [Ref-N] ids
+    """
+    answer = search_data.get("ai_answer") or _extract_answer(search_data.get("search_results", ""))
+    if answer and answer_chars and len(answer) > answer_chars:
+        answer = answer[:answer_chars] + "..."
+
+    results = []
+    if answer:
+        results.append(f"【AI 智能综述】\n{answer}\n")
+    budget = max(token_budget - estimate_tokens(answer), 0)
+
+    packed = pack_sources(search_data.get("raw_data", []), query, budget)
+    for item in packed:
+        results.append(
+            f"来源 {item['ref_id']}\n"
+            f"标题: {item.get('title', '')}\n"
+            f"内容: {item['snippet']}\n"
+            f"链接: {item.get('url', '')}"
+        )
+
+    full_items = {item.get("ref_id"): item for item in search_data.get("raw_data", [])}
+    return dict(
+        search_data,
+        search_results="\n\n---\n\n".join(results),
+        references=[f"{item['ref_id']} {item.get('title', '')}, 链接: {item.get('url', '')}" for item in packed],
+        raw_data=[full_items.get(item["ref_id"], item) for item in packed],
+    )
@@ -0,0 +1,185 @@
+"""
+Provider Record/Replay Module - Deterministic offline runs of the pipeline
+
+Wraps calls to external providers (Tavily, Bocha, Jina, Firecrawl, ARK LLM)
+so their request/response pairs can be recorded to a compressed on-disk
+corpus and served back later without network access. This makes the
+report pipeline reproducible for regression tests and throughput
+benchmarks on an offline machine.
+
+Configuration (environment):
+- PROVIDER_MODE: "live" (default), "record" or "replay"
+- PROVIDER_CORPUS_DIR: corpus directory (default ./provider_corpus)
+- PROVIDER_REPLAY_LATENCY: replay with the recorded latency
+  multiplied by this factor (default 0 = no delay)
+
+Each call is stored as <corpus>/<provider>/<sha256 of request>.json.gz,
+so recording is safe from several processes at once. Only successful
+responses are recorded: callers pass an ok() check for providers that
+report failures as values (error dicts, non-200 codes), so a transient
+failure is never replayed as the provider's answer. Exceptions are never
+recorded.
+
+Usage:
+    response = replay.call("tavily", {"query": query}, lambda: live_call(query))
+"""
+import os
+import json
+import gzip
+import time
+import hashlib
+import tempfile
+from pathlib import Path
+from typing import Any, Callable, Dict, Generator, Iterable, Optional
+
+
+LIVE = "live"
+RECORD = "record"
+REPLAY = "replay"
+
+
+class ReplayMissError(RuntimeError):
+    """Raised in replay mode when no recording exists for a request."""
+
+
+def get_mode() -> str:
+    """Return the provider mode: live, record or replay."""
+    mode = os.getenv("PROVIDER_MODE", LIVE).strip().lower()
+    return mode if mode in (LIVE, RECORD, REPLAY) else LIVE
+
+
+def _corpus_dir() -> Path:
+    return Path(os.getenv("PROVIDER_CORPUS_DIR", "provider_corpus"))
+
+
+def request_key(provider: str, request: Dict[str, Any]) -> str:
+    """Stable key of a provider request."""
+    raw = json.dumps({"provider": provider, "request": request},
+                     sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _entry_path(provider: str, key: str) -> Path:
+    return _corpus_dir() / provider / f"{key}.json.gz"
+
+
+def _load(provider: str, request: Dict[str, Any]) -> Dict[str, Any]:
+    path = _entry_path(provider, request_key(provider, request))
+    if not path.exists():
+        raise ReplayMissError(f"No {provider} recording for request {request}")
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _save(provider: str, request: Dict[str, Any], response: Any, latency: float) -> None:
+    path = _entry_path(provider, request_key(provider, request))
+    path.parent.mkdir(parents=True, exist_ok=True)
+    entry = {
+        "provider": provider,
+        "request": request,
+        "response": response,
+        "latency": latency,
+        "recorded_at": time.time(),
+    }
+    # Write to a temp file and rename so readers never see partial entries
+    fd, tmp_path = tempfile.mkstemp(dir=str(path.parent), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as raw, gzip.open(raw, "wt", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False, default=str)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        print(f"⚠️ Failed to record {provider} response: {e}")
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+
+
+def _replay_delay(latency: float) -> None:
+    try:
+        factor = float(os.getenv("PROVIDER_REPLAY_LATENCY", "0"))
+    except ValueError:
+        factor = 0.0
+    if factor > 0 and latency > 0:
+        time.sleep(latency * factor)
+
+
+def call(provider: str, request: Dict[str, Any], fn: Callable[[], Any],
+         ok: Optional[Callable[[Any], bool]] = None) -> Any:
+    """
+    Run a provider call according to the provider mode.
+
+    Args:
+        provider: Provider name, used as the corpus subdirectory
+        request: JSON-serializable description of the request (no secrets)
+        fn: Zero-argument function performing the live call; its return
+            value must be JSON-serializable
+        ok: Optional check of a live response; failed responses are
+            returned but not recorded
+
+    Returns:
+        The live, recorded or replayed response
+
+    Raises:
+        ReplayMissError: In replay mode, if the request was never recorded
+    """
+    mode = get_mode()
+    if mode == LIVE:
+        return fn()
+
+    if mode == REPLAY:
+        entry = _load(provider, request)
+        _replay_delay(entry.get("latency", 0.0))
+        return entry["response"]
+
+    start = time.monotonic()
+    response = fn()
+    if ok is None or ok(response):
+        _save(provider, request, response, time.monotonic() - start)
+    return response
+
+
+def call_stream(provider: str, request: Dict[str, Any],
+                fn: Callable[[], Iterable[Any]],
+                ok: Optional[Callable[[list], bool]] = None) -> Generator[Any, None, None]:
+    """
+    Streaming counterpart of call() for generator-based providers.
+
+    In record mode the yielded items are passed through and saved once
+    the stream ends (including when the consumer stops early), unless
+    ok(items) rejects them. In replay
+    mode the recorded items are yielded, with the recorded latency spread
+    evenly across them.
+    """
+    mode = get_mode()
+    if mode == LIVE:
+        yield from fn()
+        return
+
+    if mode == REPLAY:
+        entry = _load(provider, request)
+        items = entry["response"]
+        for item in items:
+            _replay_delay(entry.get("latency", 0.0) / max(len(items), 1))
+            yield item
+        return
+
+    items = []
+    start = time.monotonic()
+    stream = iter(fn())
+    try:
+        for item in stream:
+            items.append(item)
+            yield item
+    finally:
+        if hasattr(stream, "close"):
+            stream.close()
+        if ok is None or ok(items):
+            _save(provider, request, items, time.monotonic() - start)
+
+
+def corpus_stats(provider: Optional[str] = None) -> Dict[str, int]:
+    """Count recorded entries per provider."""
+    root = _corpus_dir()
+    if not root.exists():
+        return {}
+    providers = [root / provider] if provider else [p for p in root.iterdir() if p.is_dir()]
+    return {p.name: len(list(p.glob("*.json.gz"))) for p in providers if p.exists()}
@@ -0,0 +1,192 @@
+"""
+Research Session Module - Report-scoped memory of searches, sources and crawls
+
+Chapters of one long report often retrieve the same URLs. Each
+generate_single_chapter() call used to search, save and format its
+sources in isolation, so overlapping chapter queries hit the providers
+again and the same snippets were sent to the LLM chapter after chapter;
+GlobalReferenceManager only merged the duplicates at the very end.
+
+A ResearchSession lives for one report and:
+1. Remembers every search result and crawl fetched for the report
+2. Serves repeated or near-identical chapter queries from memory
+   (character-bigram overlap of the query with the topic removed)
+3. Compacts a chapter's research context: sources already given to an
+   earlier chapter are listed as references only (ref id, title, URL),
+   so they can still be cited but their snippets are not repeated
+
+Configuration (environment):
+- RESEARCH_SESSION_QUERY_OVERLAP: minimum overlap for serving a query
+  from another query's result (default 0.8; 1 or more = exact repeats only)
+
+Usage:
+    session = ResearchSession(topic)
+    search_data = session.search(query, count=8)
+    context_data = session.compact(search_data, chapter_query, token_budget)
+"""
+import os
+import sys
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from ai_engine.fusion import canonicalize_url
+from ai_engine.pre_search import pre_search
+from ai_engine.ranking import pack_search_data
+from ai_engine.search_cache import normalize_query
+from ai_engine.speculative import focus_overlap
+
+
+def get_query_overlap() -> float:
+    """Read RESEARCH_SESSION_QUERY_OVERLAP (default 0.8)."""
+    try:
+        return float(os.getenv("RESEARCH_SESSION_QUERY_OVERLAP", "0.8"))
+    except ValueError:
+        return 0.8
+
+
+class ResearchSession:
+    """
+    Per-report memory of search results, sources and crawled pages.
+
+    Thread-safe, so it can be shared by chapter tasks running through
+    cl.make_async.
+    """
+
+    def __init__(self, topic: str, query_overlap: Optional[float] = None):
+        self.topic = topic
+        self.query_overlap = get_query_overlap() if query_overlap is None else query_overlap
+        self._lock = threading.Lock()
+        # Normalized query -> pre_search() result
+        self._results: Dict[str, Dict] = {}
+        # Canonical URL -> crawled page summary
+        self._crawls: Dict[str, str] = {}
+        # Canonical URLs already handed to a chapter in full
+        self._presented: set = set()
+        self._stats = {"searches": 0, "memory_hits": 0, "compacted_sources": 0}
+
+    def remember(self, query: str, search_data: Optional[Dict]) -> None:
+        """Record a search result (e.g. from a batch prefetch)."""
+        if not search_data or not search_data.get("raw_data"):
+            return
+        with self._lock:
+            self._results.setdefault(normalize_query(query), search_data)
+
+    def lookup(self, query: str) -> Optional[Dict]:
+        """
+        Find a remembered result for the same or a near-identical query.
+
+        Returns:
+            The remembered pre_search() result, or None
+        """
+        normalized = normalize_query(query)
+        with self._lock:
+            result = self._results.get(normalized)
+            if result is not None or self.query_overlap > 1:
+                return result
+
+            focus = self._strip_topic(normalized)
+            best, best_score = None, 0.0
+            for known_query, known_result in self._results.items():
+                score = focus_overlap(focus, self._strip_topic(known_query))
+                if score > best_score:
+                    best, best_score = known_result, score
+        return best if best_score >= self.query_overlap else None
+
+    def search(self, query: str, count: int = 10, **kwargs) -> Dict:
+        """
+        pre_search() through the session memory.
+
+        Results served from memory are marked session_hit=True; they were
+        already saved for this report and should not be saved again.
+        """
+        with self._lock:
+            self._stats["searches"] += 1
+
+        known = self.lookup(query)
+        if known is not None:
+            with self._lock:
+                self._stats["memory_hits"] += 1
+            print(f"🧠 Research session hit for: {query[:50]}")
+            return dict(known, session_hit=True)
+
+        result = pre_search(query, count=count, **kwargs)
+        self.remember(query, result)
+        return result
+
+    def remember_crawl(self, url: str, summary: str) -> None:
+        """Record the summary of a crawled page."""
+        key = canonicalize_url(url)
+        if key and summary:
+            with self._lock:
+                self._crawls[key] = summary
+
+    def get_crawl(self, url: str) -> Optional[str]:
+        """Summary of a page already crawled for this report, if any."""
+        with self._lock:
+            return self._crawls.get(canonicalize_url(url))
+
+    def split_known(self, raw_data: List[Dict]) -> Tuple[List[Dict], List[Dict]]:
+        """
+        Split sources into those new to the report's chapters and those
+        already presented to an earlier chapter.
+
+        Returns:
+            (new_sources, known_sources), each in the original order
+        """
+        new, known = [], []
+        with self._lock:
+            for item in raw_data:
+                key = canonicalize_url(item.get("url", ""))
+                (known if key and key in self._presented else new).append(item)
+        return new, known
+
+    def compact(self, search_data: Dict, query: str, token_budget: int = 0) -> Dict:
+        """
+        Build a chapter's research data with known sources as references only.
+
+        New sources are packed into token_budget (if > 0) by relevance to
+        query; sources presented to an earlier chapter keep their [Ref-N]
+        id and URL but not their snippet. The new sources are marked as
+        presented.
+
+        Returns:
+            pre_search()-style dict whose raw_data and references cover
+            both new and known sources (known ones last), plus known_count
+        """
+        new, known = self.split_known(search_data.get("raw_data", []))
+
+        if token_budget > 0:
+            data = pack_search_data(dict(search_data, raw_data=new), query, token_budget)
+        elif known:
+            data = pack_search_data(dict(search_data, raw_data=new), query, sys.maxsize, answer_chars=None)
+        else:
+            data = search_data
+
+        known_refs = [
+            f"{item.get('ref_id', '')} {item.get('title', '')}, 链接: {item.get('url', '')}"
+            for item in known
+        ]
+        blocks = [data["search_results"]] if data.get("search_results") else []
+        if known_refs:
+            blocks.append("【前文章节已提供的来源】（内容见前文章节，可继续引用）\n" + "\n".join(known_refs))
+
+        with self._lock:
+            self._presented.update(canonicalize_url(item.get("url", "")) for item in data["raw_data"])
+            self._stats["compacted_sources"] += len(known)
+
+        return dict(
+            data,
+            search_results="\n\n---\n\n".join(blocks),
+            references=list(data.get("references", [])) + known_refs,
+            raw_data=list(data["raw_data"]) + known,
+            known_count=len(known),
+        )
+
+    def get_stats(self) -> Dict[str, int]:
+        """Return session counters: searches, memory hits, compacted sources, pool sizes."""
+        with self._lock:
+            return dict(self._stats, presented=len(self._presented), crawls=len(self._crawls))
+
+    def _strip_topic(self, query: str) -> str:
+        stripped = query.replace(normalize_query(self.topic), " ").strip()
+        return stripped or query
@@ -0,0 +1,292 @@
+"""
+Search Cache Module - Read-through cache over stored SearchResult rows
+
+Every live search that callers persist through save_search_to_db() is
+tagged with a cache key built from the normalized query, the provider
+that answered, the requested result count and the freshness window.
+pre_search() consults this cache before dialing out, so repeat chapter
+queries such as "{topic} {focus}" are answered from the database.
+
+If no exact entry exists, a recent result for a near-duplicate query
+(see ai_engine.query_index) is reused and tagged "reuse:<provider>",
+provided it was cached for the same freshness window and at least the
+requested result count.
+
+TTLs depend on the freshness window and can be overridden per window
+with SEARCH_CACHE_TTL_<FRESHNESS> (seconds), e.g. SEARCH_CACHE_TTL_ONEDAY=1800.
+Set SEARCH_CACHE_ENABLED=false to bypass the cache entirely.
+
+A short-lived in-memory negative cache remembers, per provider and
+normalized query, that a search came back empty, timed out or failed, so
+pre_search() can skip that provider for the query until the entry
+expires. TTLs per outcome can be overridden with
+SEARCH_NEGATIVE_TTL_<OUTCOME> (seconds, 0 disables that outcome).
+"""
+import os
+import re
+import hashlib
+import time
+import threading
+import unicodedata
+from datetime import timedelta
+from typing import Dict, List, Optional, Tuple
+
+
+# Default TTL (seconds) per Bocha-style freshness window
+DEFAULT_TTLS = {
+    "oneDay": 60 * 60,
+    "oneWeek": 6 * 60 * 60,
+    "oneMonth": 24 * 60 * 60,
+    "oneYear": 3 * 24 * 60 * 60,
+    "noLimit": 7 * 24 * 60 * 60,
+}
+
+# Default negative-cache TTL (seconds) per failure outcome
+NEGATIVE_TTLS = {
+    "empty": 30 * 60,
+    "timeout": 2 * 60,
+    "error": 5 * 60,
+}
+
+_stats_lock = threading.Lock()
+_stats = {"hits": 0, "similar_hits": 0, "misses": 0, "negative_hits": 0}
+
+_negative_lock = threading.Lock()
+_negative: Dict[Tuple[str, str], Tuple[str, float]] = {}
+
+
+def is_enabled() -> bool:
+    """Return whether the search cache is enabled via environment."""
+    return os.getenv("SEARCH_CACHE_ENABLED", "true").lower() not in ("0", "false", "no", "off")
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalize a search query for cache keying.
+
+    Applies NFKC normalization (full-width -> half-width), lowercases
+    and collapses whitespace.
+    """
+    text = unicodedata.normalize("NFKC", query or "")
+    text = re.sub(r"\s+", " ", text.lower())
+    return text.strip()
+
+
+def make_cache_key(query: str, provider: str, count: int, freshness: str = "noLimit") -> str:
+    """Build the cache key for a (query, provider, count, freshness) tuple."""
+    raw = f"{normalize_query(query)}|{provider}|{count}|{freshness}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def get_ttl(freshness: str) -> int:
+    """
+    Get the cache TTL in seconds for a freshness window.
+
+    Environment variable SEARCH_CACHE_TTL_<FRESHNESS> takes priority.
+    """
+    override = os.getenv(f"SEARCH_CACHE_TTL_{freshness.upper()}")
+    if override:
+        try:
+            return int(override)
+        except ValueError:
+            pass
+    return DEFAULT_TTLS.get(freshness, DEFAULT_TTLS["noLimit"])
+
+
+def lookup(query: str, count: int, freshness: str = "noLimit",
+           providers: Optional[List[str]] = None) -> Optional[Dict]:
+    """
+    Look up a cached search result.
+
+    Args:
+        query: The search query
+        count: Requested number of results
+        freshness: Freshness window of the request
+        providers: Providers to check, in priority order
+
+    Returns:
+        A pre_search()-compatible dict, or None on a cache miss
+    """
+    providers = providers or ["tavily+bocha", "tavily", "bocha"]
+    result = None
+    outcome = "misses"
+
+    try:
+        from django.utils import timezone
+        from ai_engine.db import setup_django
+
+        setup_django()
+        from apps.reports.models import SearchResult
+
+        cutoff = timezone.now() - timedelta(seconds=get_ttl(freshness))
+        for provider in providers:
+            row = (
+                SearchResult.objects
+                .filter(
+                    cache_key=make_cache_key(query, provider, count, freshness),
+                    created_at__gte=cutoff,
+                    results_count__gt=0,
+                )
+                .order_by("-created_at")
+                .first()
+            )
+            if row:
+                result = _row_to_search_data(row)
+                outcome = "hits"
+                break
+
+        if result is None:
+            result = _lookup_similar(SearchResult, query, count, freshness, cutoff)
+            if result:
+                outcome = "similar_hits"
+    except Exception as e:
+        print(f"⚠️ Search cache lookup failed: {e}")
+
+    with _stats_lock:
+        _stats[outcome] += 1
+
+    return result
+
+
+def _lookup_similar(model, query: str, count: int, freshness: str, cutoff) -> Optional[Dict]:
+    """
+    Reuse a result of a near-duplicate query created after cutoff.
+
+    Only rows cached for the same freshness window and at least as many
+    results as requested are eligible, like an exact-key hit would be.
+    """
+    from ai_engine.query_index import get_query_index, get_reuse_threshold
+
+    threshold = get_reuse_threshold()
+    if threshold is None:
+        return None
+
+    index = get_query_index()
+    index.refresh()
+    matches = index.find(query, threshold, created_after=cutoff)
+    if not matches:
+        return None
+
+    rows = {
+        row.id: row
+        for row in model.objects.filter(
+            id__in=[row_id for row_id, _ in matches],
+            freshness=freshness,
+            requested_count__gte=count,
+        )
+    }
+    for row_id, score in matches:
+        row = rows.get(row_id)
+        if row is None:
+            continue
+        result = _row_to_search_data(row)
+        result["search_source"] = f"reuse:{row.search_source}"[:50]
+        print(f"♻️ Reusing results of similar query '{row.keyword[:50]}' (similarity {score:.2f})")
+        return result
+    return None
+
+
+def _row_to_search_data(row) -> Dict:
+    """Rebuild the pre_search() result structure from a SearchResult row."""
+    raw_data = row.results_json or []
+
+    # save_search_to_db() prefixes the formatted text with the keyword line
+    search_results = row.formatted_results or ""
+    if search_results.startswith("关键词:") and "\n\n" in search_results:
+        search_results = search_results.split("\n\n", 1)[1]
+
+    references = [
+        f"{item.get('ref_id', f'[Ref-{i}]')} {item.get('title', '无标题')}, 链接: {item.get('url', '')}"
+        for i, item in enumerate(raw_data, 1)
+    ]
+
+    return {
+        "search_results": search_results,
+        "references": references,
+        "raw_data": raw_data,
+        "search_source": row.search_source,
+        "cache_hit": True,
+    }
+
+
+def get_negative_ttl(outcome: str) -> int:
+    """
+    Get the negative-cache TTL in seconds for a failure outcome.
+
+    Environment variable SEARCH_NEGATIVE_TTL_<OUTCOME> takes priority.
+    """
+    override = os.getenv(f"SEARCH_NEGATIVE_TTL_{outcome.upper()}")
+    if override:
+        try:
+            return int(override)
+        except ValueError:
+            pass
+    return NEGATIVE_TTLS.get(outcome, NEGATIVE_TTLS["error"])
+
+
+def classify_failure(error) -> str:
+    """Classify an exception or error message as "timeout" or "error"."""
+    if isinstance(error, TimeoutError) or type(error).__name__.endswith("Timeout"):
+        return "timeout"
+    text = str(error).lower()
+    return "timeout" if "timed out" in text or "timeout" in text else "error"
+
+
+def record_negative(provider: str, query: str, outcome: str) -> None:
+    """
+    Remember that a provider failed a query.
+
+    Args:
+        provider: Provider name (tavily/bocha)
+        query: The search query
+        outcome: "empty", "timeout" or "error"
+    """
+    ttl = get_negative_ttl(outcome)
+    if ttl <= 0:
+        return
+    with _negative_lock:
+        _negative[(provider, normalize_query(query))] = (outcome, time.monotonic() + ttl)
+
+
+def check_negative(provider: str, query: str) -> Optional[str]:
+    """Return the cached failure outcome of a provider for a query, if any."""
+    key = (provider, normalize_query(query))
+    with _negative_lock:
+        entry = _negative.get(key)
+        if entry is None:
+            return None
+        outcome, expires = entry
+        if time.monotonic() >= expires:
+            del _negative[key]
+            return None
+    with _stats_lock:
+        _stats["negative_hits"] += 1
+    return outcome
+
+
+def clear_negative(provider: str, query: str) -> None:
+    """Forget a provider's failure for a query after it succeeded."""
+    with _negative_lock:
+        _negative.pop((provider, normalize_query(query)), None)
+
+
+def get_cache_stats() -> Dict[str, float]:
+    """Return hit/miss counters and the hit rate of this process."""
+    with _stats_lock:
+        hits, similar_hits, misses = _stats["hits"], _stats["similar_hits"], _stats["misses"]
+        negative_hits = _stats["negative_hits"]
+    total = hits + similar_hits + misses
+    return {
+        "hits": hits,
+        "similar_hits": similar_hits,
+        "misses": misses,
+        "negative_hits": negative_hits,
+        "hit_rate": (hits + similar_hits) / total if total else 0.0,
+    }
+
+
+def reset_cache_stats() -> None:
+    """Reset the hit/miss counters."""
+    with _stats_lock:
+        for key in _stats:
+            _stats[key] = 0
@@ -0,0 +1,655 @@
+"""
+Search Providers Module - One async interface and a health-routed registry
+
+Tavily, Bocha AI search, Bocha web search and DuckDuckGo used to be wired
+separately into pre_search() and each CrewAI tool. Here each is a
+SearchProvider with the same async search() method returning a
+SearchResponse of normalized SearchHit objects.
+
+The SearchRegistry routes a query across a list of candidate providers.
+Candidates are ordered by a score built from what this process has
+measured:
+- success rate (EWMA over recent calls)
+- latency (EWMA, seconds)
+- remaining rate-limit quota (provider_health token bucket)
+Providers whose circuit is open or which are not configured are skipped.
+
+When the query is known, routing is also language-aware (see
+ai_engine.query_language): the query is classified as Chinese-market or
+global, and providers not preferred for that market start with a score
+penalty. Once a provider has enough calls for a market, its measured
+win rate there (share of calls that returned results) replaces the
+static rule. With no measurements yet, the market preference order (then
+the caller's candidate order) is kept.
+
+Requests for more results than a provider returns per call are split
+into concurrent sub-requests (the original query plus market-specific
+query variants) whose hits are merged with reciprocal-rank fusion and
+de-duplicated (see search_deep()). Only the first sub-request asks for
+an AI answer.
+
+Configuration (environment):
+- SEARCH_ROUTING: "health" (default) or "static" to keep candidate order
+- SEARCH_MAX_SUBREQUESTS: max concurrent sub-requests per search (default 4)
+- SEARCH_LANGUAGE_ROUTING: set to false to ignore the query language
+- SEARCH_LANGUAGE_MIN_SAMPLES: calls per market before win rates
+  override the static rules (default 20)
+
+Usage:
+    registry = get_registry()
+    response = run_sync(registry.search("新能源汽车 市场规模", ["tavily", "bocha"], count=10))
+"""
+import os
+import math
+import time
+import asyncio
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from ai_engine import provider_health, replay
+from ai_engine.query_language import CN, MARKET_PREFERENCES, detect_market, preferred_order
+
+
+# EWMA smoothing factor and latency assumed before the first measurement
+EWMA_ALPHA = 0.3
+DEFAULT_LATENCY = 5.0
+# Latency (seconds) at which a provider's score is halved
+LATENCY_SCALE = 10.0
+# Score multiplier for providers not preferred for a query's market
+MARKET_PRIOR_PENALTY = 0.5
+
+# Query suffixes for sub-requests above a provider's per-call cap. Nested
+# freshness windows would mostly return the same top URLs again.
+SUBREQUEST_SUFFIXES = {
+    CN: ["数据", "报告", "最新动态"],
+    "global": ["statistics", "report", "latest news"],
+}
+
+
+@dataclass
+class SearchHit:
+    """One normalized search result."""
+    title: str
+    url: str
+    snippet: str = ""
+    site_name: str = ""
+    provider: str = ""
+    raw_content: str = ""
+
+    def to_source(self) -> Dict[str, Any]:
+        """Bocha-style web source dict as used by pre_search and fusion."""
+        source = {"name": self.title, "url": self.url, "snippet": self.snippet}
+        if self.site_name:
+            source["siteName"] = self.site_name
+        if self.raw_content:
+            source["raw_content"] = self.raw_content
+        return source
+
+
+@dataclass
+class SearchResponse:
+    """Result of one provider call."""
+    provider: str
+    hits: List[SearchHit] = field(default_factory=list)
+    answer: str = ""
+    modal_cards: List[Dict[str, Any]] = field(default_factory=list)
+    latency: float = 0.0
+    error: str = ""
+
+    @property
+    def ok(self) -> bool:
+        return not self.error
+
+    @property
+    def empty(self) -> bool:
+        return not self.hits and not self.answer
+
+
+class SearchProvider(ABC):
+    """
+    Base class for search providers.
+
+    Subclasses implement _search() as a blocking call; search() runs it
+    in a worker thread so providers can be awaited concurrently.
+    """
+    name: str = ""
+    # provider_health name used for circuit breaking and quota
+    health_key: str = ""
+    # Max results per request
+    max_results: int = 10
+    # Whether the freshness argument is honoured
+    supports_freshness: bool = False
+
+    def is_configured(self) -> bool:
+        """Whether the provider can be called (API key present, library installed)."""
+        return True
+
+    async def search(self, query: str, count: int = 10, freshness: str = "noLimit",
+                     **options) -> SearchResponse:
+        """Run a search and time it; exceptions become an error response."""
+        start = time.monotonic()
+        try:
+            response = await asyncio.to_thread(
+                self._search, query, min(count, self.max_results), freshness, **options
+            )
+        except Exception as e:
+            response = SearchResponse(provider=self.name, error=str(e) or type(e).__name__)
+        response.latency = time.monotonic() - start
+        return response
+
+    @abstractmethod
+    def _search(self, query: str, count: int, freshness: str, **options) -> SearchResponse:
+        """Blocking provider call."""
+
+
+class TavilyProvider(SearchProvider):
+    """Tavily search (English-first, optimized for AI agents)."""
+    name = "tavily"
+    health_key = "tavily"
+    max_results = 20
+
+    def is_configured(self) -> bool:
+        return bool(os.getenv("TAVILY_API_KEY")) or replay.get_mode() == replay.REPLAY
+
+    def _search(self, query: str, count: int, freshness: str, **options) -> SearchResponse:
+        from ai_engine.tavily_api import tavily_search, parse_tavily_response, get_include_raw_content
+
+        include_raw_content = options.get("include_raw_content")
+        if include_raw_content is None:
+            include_raw_content = get_include_raw_content()
+
+        raw_response = tavily_search(
+            query,
+            max_results=count,
+            search_depth=options.get("search_depth", "advanced"),
+            include_answer=options.get("answer", True),
+            api_key=os.getenv("TAVILY_API_KEY"),
+            include_raw_content=include_raw_content
+        )
+        if not raw_response.get("success"):
+            return SearchResponse(provider=self.name, error=raw_response.get("error", "Unknown error"))
+
+        parsed = parse_tavily_response(raw_response)
+        hits = [
+            SearchHit(
+                title=source.get("name", ""),
+                url=source.get("url", ""),
+                snippet=source.get("snippet", ""),
+                provider=self.name,
+                raw_content=source.get("raw_content") or "",
+            )
+            for source in parsed.get("web_sources", [])
+        ]
+        return SearchResponse(provider=self.name, hits=hits, answer=parsed.get("answer", ""))
+
+
+class BochaAIProvider(SearchProvider):
+    """
+    Bocha AI search: web sources, an AI answer and modal cards.
+
+    With answer_wait (or PRE_SEARCH_BOCHA_ANSWER_WAIT) set, the response
+    is streamed and returned at most answer_wait seconds after the source
+    list arrives, with whatever answer text came in by then.
+    """
+    name = "bocha"
+    health_key = "bocha"
+    max_results = 50
+    supports_freshness = True
+
+    def _search(self, query: str, count: int, freshness: str, **options) -> SearchResponse:
+        from ai_engine.bocha_api import bocha_ai_search, parse_bocha_response
+
+        answer = options.get("answer", True)
+        answer_wait = options.get("answer_wait")
+        if answer_wait is None:
+            answer_wait = _get_bocha_answer_wait()
+
+        if answer and answer_wait is not None:
+            parsed = _stream_bocha_sources(query, count, freshness, answer_wait)
+        else:
+            raw_response = bocha_ai_search(query, count=count, freshness=freshness, answer=answer, stream=False)
+            if raw_response.get("code", 200) != 200 and not raw_response.get("messages"):
+                return SearchResponse(provider=self.name, error=raw_response.get("msg", "Unknown error"))
+            parsed = parse_bocha_response(raw_response)
+
+        hits = [
+            SearchHit(
+                title=source.get("name", ""),
+                url=source.get("url", ""),
+                snippet=source.get("snippet") or source.get("summary", ""),
+                site_name=source.get("siteName", ""),
+                provider=self.name,
+            )
+            for source in parsed.get("web_sources", [])
+        ]
+        return SearchResponse(
+            provider=self.name,
+            hits=hits,
+            answer=parsed.get("answer", ""),
+            modal_cards=parsed.get("modal_cards", []),
+        )
+
+
+class BochaWebProvider(SearchProvider):
+    """Bocha web search (plain ranked results with page summaries)."""
+    name = "bocha_web"
+    health_key = "bocha"
+    max_results = 50
+    supports_freshness = True
+
+    API_URL = "https://api.bocha.cn/v1/web-search"
+
+    def _search(self, query: str, count: int, freshness: str, **options) -> SearchResponse:
+        payload = {
+            "query": query,
+            "freshness": freshness,
+            "summary": True,
+            "count": count
+        }
+        data = replay.call(
+            "bocha_web", payload, lambda: self._search_live(payload),
+            ok=lambda response: "error" not in response
+        )
+        if "error" in data:
+            return SearchResponse(provider=self.name, error=data["error"])
+
+        web_pages = data.get("data", {}).get("webPages", {}).get("value", [])
+        hits = [
+            SearchHit(
+                title=page.get("name", "无标题"),
+                url=page.get("url", ""),
+                snippet=page.get("snippet", ""),
+                site_name=page.get("siteName", ""),
+                provider=self.name,
+            )
+            for page in web_pages
+        ]
+        return SearchResponse(provider=self.name, hits=hits)
+
+    def _search_live(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        from ai_engine.http_client import get_session
+
+        if not provider_health.acquire(self.health_key, timeout=5):
+            return {"error": f"Bocha {provider_health.block_reason(self.health_key)}"}
+
+        api_key = os.getenv("BOCHA_API_KEY", "sk-accd71cb3f8b48789e34040d18337912")
+        headers = {
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json"
+        }
+        try:
+            response = get_session().post(self.API_URL, json=payload, headers=headers, timeout=30)
+            response.raise_for_status()
+            data = response.json()
+        except Exception as e:
+            provider_health.record_failure(self.health_key)
+            return {"error": f"Bocha web search failed: {e}"}
+        provider_health.record_success(self.health_key)
+        return data
+
+
+class DuckDuckGoProvider(SearchProvider):
+    """DuckDuckGo text search (no API key)."""
+    name = "duckduckgo"
+    health_key = "duckduckgo"
+    max_results = 10
+
+    def is_configured(self) -> bool:
+        try:
+            import duckduckgo_search  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    def _search(self, query: str, count: int, freshness: str, **options) -> SearchResponse:
+        request = {"query": query, "max_results": count, "region": options.get("region", "wt-wt")}
+        results = replay.call(
+            "duckduckgo", request, lambda: self._search_live(request),
+            ok=lambda response: not isinstance(response, dict)
+        )
+        if isinstance(results, dict):
+            return SearchResponse(provider=self.name, error=results.get("error", "Unknown error"))
+
+        hits = [
+            SearchHit(
+                title=result.get("title", ""),
+                url=result.get("href", ""),
+                snippet=result.get("body", ""),
+                provider=self.name,
+            )
+            for result in results
+        ]
+        return SearchResponse(provider=self.name, hits=hits)
+
+    def _search_live(self, request: Dict[str, Any]):
+        from duckduckgo_search import DDGS
+
+        if not provider_health.acquire(self.health_key, timeout=2):
+            return {"error": f"DuckDuckGo {provider_health.block_reason(self.health_key)}"}
+        try:
+            with DDGS() as ddgs:
+                results = list(ddgs.text(
+                    request["query"],
+                    max_results=request["max_results"],
+                    region=request["region"],
+                ))
+        except Exception as e:
+            provider_health.record_failure(self.health_key)
+            return {"error": f"DuckDuckGo search failed: {e}"}
+        provider_health.record_success(self.health_key)
+        return results
+
+
+def _get_bocha_answer_wait() -> Optional[float]:
+    """Read PRE_SEARCH_BOCHA_ANSWER_WAIT (seconds); unset disables streaming."""
+    value = os.getenv("PRE_SEARCH_BOCHA_ANSWER_WAIT", "").strip()
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def _stream_bocha_sources(query: str, count: int, freshness: str, answer_wait: float) -> dict:
+    """
+    Stream a Bocha search and stop answer_wait seconds after sources arrive.
+
+    Returns:
+        parse_bocha_response()-style dict
+    """
+    from ai_engine.bocha_api import iter_bocha_ai_search, BochaStreamParser
+
+    parser = BochaStreamParser()
+    deadline = None
+    stream = iter_bocha_ai_search(query, count=count, freshness=freshness, answer=True)
+    try:
+        for msg in stream:
+            if msg.get("type") == "error":
+                if not parser.web_sources:
+                    raise RuntimeError(f"Bocha stream error: {msg.get('content')}")
+                break
+
+            parser.feed(msg)
+            if parser.web_sources and msg.get("type") != "source" and deadline is None:
+                # Source list is complete once the answer starts
+                deadline = time.monotonic() + answer_wait
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+    finally:
+        stream.close()
+
+    return parser.result()
+
+
+class SearchRegistry:
+    """
+    Registered providers plus per-provider EWMA latency and success rate.
+
+    Usage:
+        registry.rank(["tavily", "bocha"])           # routing order
+        await registry.search(query, ["tavily", "bocha"])   # first useful response
+    """
+
+    def __init__(self):
+        self._providers: Dict[str, SearchProvider] = {}
+        self._lock = threading.Lock()
+        self._latency: Dict[str, float] = {}
+        self._success: Dict[str, float] = {}
+        self._calls: Dict[str, int] = {}
+        # (market, provider) -> [calls, wins]
+        self._market_stats: Dict[tuple, List[int]] = {}
+
+    def register(self, provider: SearchProvider) -> None:
+        self._providers[provider.name] = provider
+
+    def get(self, name: str) -> SearchProvider:
+        return self._providers[name]
+
+    def names(self) -> List[str]:
+        return list(self._providers)
+
+    def is_usable(self, name: str) -> bool:
+        """Registered, configured and with a closed (or probing) circuit."""
+        provider = self._providers.get(name)
+        return bool(
+            provider
+            and provider.is_configured()
+            and provider_health.is_available(provider.health_key)
+        )
+
+    def record(self, response: SearchResponse, market: Optional[str] = None) -> None:
+        """
+        Fold one response into the provider's latency and success EWMAs,
+        and into its win rate for the query's market if given.
+        """
+        name = response.provider
+        success = 1.0 if response.ok and not response.empty else 0.0
+        with self._lock:
+            if market:
+                stats = self._market_stats.setdefault((market, name), [0, 0])
+                stats[0] += 1
+                stats[1] += int(success)
+            previous = self._latency.get(name)
+            self._latency[name] = response.latency if previous is None else (
+                EWMA_ALPHA * response.latency + (1 - EWMA_ALPHA) * previous
+            )
+            self._success[name] = EWMA_ALPHA * success + (1 - EWMA_ALPHA) * self._success.get(name, 1.0)
+            self._calls[name] = self._calls.get(name, 0) + 1
+
+    def score(self, name: str) -> float:
+        """Routing score: success rate x quota, discounted by latency."""
+        with self._lock:
+            latency = self._latency.get(name, DEFAULT_LATENCY)
+            success = self._success.get(name, 1.0)
+        quota = provider_health.remaining_quota(self._providers[name].health_key)
+        # An empty bucket means waiting; keep a floor so the order stays defined
+        return success * max(quota, 0.05) / (1 + latency / LATENCY_SCALE)
+
+    def market_weight(self, name: str, market: str) -> float:
+        """
+        Score multiplier of a provider for a market: its measured win rate
+        once it has enough calls there, otherwise the static preference.
+        """
+        with self._lock:
+            calls, wins = self._market_stats.get((market, name), (0, 0))
+        if calls >= int(os.getenv("SEARCH_LANGUAGE_MIN_SAMPLES", "20")):
+            return wins / calls
+        return 1.0 if name in MARKET_PREFERENCES.get(market, []) else MARKET_PRIOR_PENALTY
+
+    def rank(self, candidates: List[str], query: Optional[str] = None) -> List[str]:
+        """
+        Order usable candidates for a query.
+
+        Ties (e.g. before any measurement) keep the market preference
+        order, then the candidate order.
+        """
+        usable = [name for name in candidates if self.is_usable(name)]
+        market = _query_market(query)
+        if market:
+            usable = preferred_order(market, usable)
+        if os.getenv("SEARCH_ROUTING", "health").lower() == "static":
+            return usable
+        scores = {name: self.score(name) for name in usable}
+        if market:
+            scores = {name: score * self.market_weight(name, market) for name, score in scores.items()}
+        return sorted(usable, key=lambda name: -scores[name])
+
+    async def search_with(self, name: str, query: str, count: int = 10,
+                          freshness: str = "noLimit", **options) -> SearchResponse:
+        """Search with one specific provider and record its performance."""
+        response = await self._providers[name].search(query, count, freshness, **options)
+        self.record(response, _query_market(query))
+        return response
+
+    async def search_deep(self, name: str, query: str, count: int = 10,
+                          freshness: str = "noLimit", **options) -> SearchResponse:
+        """
+        Like search_with(), but serves counts above the provider's
+        max_results with concurrent sub-requests merged into one response.
+
+        The first sub-request is always the original query; only it asks
+        for an AI answer, and the answer and modal cards come from it.
+        Fails only if every sub-request failed.
+        """
+        from ai_engine.fusion import drop_near_duplicates, rrf_fuse
+
+        provider = self._providers[name]
+        plan = plan_subrequests(provider, query, count, freshness)
+        if len(plan) == 1:
+            return await self.search_with(name, query, count, freshness, **options)
+
+        print(f"📑 Splitting {name} search for {count} results into {len(plan)} sub-requests")
+        # Variants only add sources; asking each for an answer wastes quota
+        sub_options = dict(options, answer=False)
+        responses = await asyncio.gather(*[
+            self.search_with(name, sub_query, sub_count, sub_freshness, **(options if i == 0 else sub_options))
+            for i, (sub_query, sub_freshness, sub_count) in enumerate(plan)
+        ])
+
+        ranked = {
+            f"{name}#{i}": [hit.to_source() for hit in response.hits]
+            for i, response in enumerate(responses) if response.hits
+        }
+        merged = drop_near_duplicates(rrf_fuse(ranked))[:count]
+        first = responses[0]
+        errors = [response.error for response in responses if response.error]
+        return SearchResponse(
+            provider=name,
+            hits=[
+                SearchHit(
+                    title=source.get("name", ""),
+                    url=source.get("url", ""),
+                    snippet=source.get("snippet", ""),
+                    site_name=source.get("siteName", ""),
+                    provider=name,
+                    raw_content=source.get("raw_content", ""),
+                )
+                for source in merged
+            ],
+            answer=first.answer,
+            modal_cards=first.modal_cards,
+            latency=max(response.latency for response in responses),
+            error=errors[0] if len(errors) == len(responses) else "",
+        )
+
+    async def search(self, query: str, candidates: List[str], count: int = 10,
+                     freshness: str = "noLimit", **options) -> SearchResponse:
+        """
+        Try candidates in routing order until one returns results.
+
+        Returns:
+            The first non-empty response, or the last response (empty or
+            error) if none had results
+        """
+        ranked = self.rank(candidates, query)
+        if not ranked:
+            return SearchResponse(provider="none", error="No search provider available")
+
+        response = None
+        for name in ranked:
+            response = await self.search_deep(name, query, count, freshness, **options)
+            if response.ok and not response.empty:
+                return response
+            print(f"⚠️ {name} search {'failed: ' + response.error if response.error else 'returned nothing'}")
+        return response
+
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        """Measured latency, success rate, call count and score per provider."""
+        with self._lock:
+            measured = {
+                name: {
+                    "latency": self._latency.get(name),
+                    "success_rate": self._success.get(name),
+                    "calls": self._calls.get(name, 0),
+                }
+                for name in self._providers
+            }
+        for name, stats in measured.items():
+            stats["score"] = self.score(name)
+        return measured
+
+    def get_market_stats(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """Calls and win rate per market and provider."""
+        with self._lock:
+            items = list(self._market_stats.items())
+        stats: Dict[str, Dict[str, Dict[str, float]]] = {}
+        for (market, name), (calls, wins) in items:
+            stats.setdefault(market, {})[name] = {
+                "calls": calls,
+                "win_rate": wins / calls if calls else 0.0,
+            }
+        return stats
+
+
+def plan_subrequests(provider: SearchProvider, query: str, count: int,
+                     freshness: str = "noLimit") -> List[Tuple[str, str, int]]:
+    """
+    Split a search into (query, freshness, count) sub-requests that each
+    fit the provider's max_results.
+
+    The original request comes first. Extra sub-requests use query
+    variants for the query's market, which return mostly different pages
+    than the original query. At most SEARCH_MAX_SUBREQUESTS are planned.
+    """
+    per_call = provider.max_results
+    if count <= per_call:
+        return [(query, freshness, count)]
+
+    try:
+        max_subrequests = int(os.getenv("SEARCH_MAX_SUBREQUESTS", "4"))
+    except ValueError:
+        max_subrequests = 4
+    needed = min(math.ceil(count / per_call), max(max_subrequests, 1))
+
+    suffixes = SUBREQUEST_SUFFIXES.get(detect_market(query), SUBREQUEST_SUFFIXES["global"])
+    plan = [(query, freshness, per_call)]
+    plan += [(f"{query} {suffix}", freshness, per_call) for suffix in suffixes]
+    return plan[:needed]
+
+
+def _query_market(query: Optional[str]) -> Optional[str]:
+    """Market of a query, or None if language routing is off or unknown."""
+    if not query:
+        return None
+    if os.getenv("SEARCH_LANGUAGE_ROUTING", "true").lower() in ("0", "false", "no", "off"):
+        return None
+    return detect_market(query)
+
+
+_registry: Optional[SearchRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> SearchRegistry:
+    """Get the process-wide registry with the built-in providers."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                registry = SearchRegistry()
+                for provider in (TavilyProvider(), BochaAIProvider(), BochaWebProvider(), DuckDuckGoProvider()):
+                    registry.register(provider)
+                _registry = registry
+    return _registry
+
+
+# Runs coroutines for callers that already have an event loop in this thread
+_sync_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="search-sync")
+
+
+def run_sync(coro):
+    """
+    Run a coroutine from synchronous code.
+
+    Safe inside a running event loop (e.g. a CrewAI tool called from
+    Chainlit): the coroutine then runs on its own loop in a worker thread.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    return _sync_executor.submit(asyncio.run, coro).result()
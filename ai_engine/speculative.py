@@ -0,0 +1,186 @@
+"""
+Speculative Prefetch Module - Search predicted chapters while the outline is generated
+
+generate_long_report() used to wait 5-20s for the outline LLM call before
+issuing any search. Most outlines cover the same dimensions as
+get_default_outline() (市场规模, 竞争格局, 技术发展...), so this module
+starts searches for those predicted focuses as soon as the topic is known.
+
+Once the real outline arrives, each chapter is matched to at most one
+prediction by the character-bigram overlap of its focus (with the topic
+removed, since every query shares it). Overlap is measured against the
+shorter focus, as LLM focuses are usually a subset of the predicted
+keywords. Matched chapters reuse the prediction's result (without its
+cache key, since it answers the predicted query, not the chapter's);
+unmatched predictions are cancelled and unmatched chapters are searched
+normally with pre_search_many().
+
+Each report spends about one provider search per predicted chapter
+(5 with the default outline) in addition to the chapters' own searches,
+so prefetching is opt-in.
+
+Configuration (environment):
+- SPECULATIVE_PREFETCH_ENABLED: set to true to enable (default false)
+- SPECULATIVE_MATCH_THRESHOLD: minimum focus overlap (default 0.4)
+
+Usage:
+    prefetcher = SpeculativePrefetcher(topic, count=8)
+    prefetcher.start()
+    outline = await generate_report_outline(topic)
+    research = prefetcher.resolve(outline)
+"""
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from ai_engine.pre_search import pre_search, pre_search_many
+from ai_engine.query_index import char_bigrams
+
+
+def is_enabled() -> bool:
+    """Return whether speculative prefetch is enabled via environment."""
+    return os.getenv("SPECULATIVE_PREFETCH_ENABLED", "false").lower() in ("1", "true", "yes", "on")
+
+
+def get_match_threshold() -> float:
+    """Read SPECULATIVE_MATCH_THRESHOLD (default 0.4)."""
+    try:
+        return float(os.getenv("SPECULATIVE_MATCH_THRESHOLD", "0.4"))
+    except ValueError:
+        return 0.4
+
+
+def _strip_topic(topic: str, focus: str) -> str:
+    """Remove the shared topic so similarity reflects the focus keywords."""
+    stripped = focus.replace(topic, " ").strip()
+    return stripped or focus
+
+
+def focus_overlap(a: str, b: str) -> float:
+    """Share of the smaller character-bigram set found in the other one."""
+    grams_a, grams_b = char_bigrams(a), char_bigrams(b)
+    if not grams_a or not grams_b:
+        return 0.0
+    return len(grams_a & grams_b) / min(len(grams_a), len(grams_b))
+
+
+class SpeculativePrefetcher:
+    """
+    Runs searches for predicted chapter queries in the background.
+
+    Predictions default to the focuses of get_default_outline(topic).
+    Each prediction is searched with the same query format as the real
+    chapters (build_chapter_query), so matched results are exactly what
+    pre_search() would return for the predicted focus.
+    """
+
+    def __init__(
+        self,
+        topic: str,
+        count: int = 10,
+        predictions: Optional[List[Dict]] = None,
+        threshold: Optional[float] = None
+    ):
+        from ai_engine.generator import get_default_outline
+
+        self.topic = topic
+        self.count = count
+        self.predictions = predictions if predictions is not None else get_default_outline(topic)
+        self.threshold = get_match_threshold() if threshold is None else threshold
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._futures: Dict[str, Future] = {}
+
+    def start(self) -> None:
+        """Submit a search for every predicted chapter query."""
+        from ai_engine.generator import build_chapter_query
+
+        if self._executor or not self.predictions:
+            return
+
+        queries = list(dict.fromkeys(build_chapter_query(self.topic, p) for p in self.predictions))
+        self._executor = ThreadPoolExecutor(max_workers=len(queries), thread_name_prefix="speculative")
+        for query in queries:
+            self._futures[query] = self._executor.submit(pre_search, query, self.count)
+        print(f"🔮 Speculative prefetch: {len(queries)} predicted chapter queries")
+
+    def match(self, outline: List[Dict]) -> Dict[str, str]:
+        """
+        Assign real chapter queries to predicted queries.
+
+        Pairs are assigned greedily from the most similar down, so each
+        prediction serves at most one chapter.
+
+        Returns:
+            Dict mapping real chapter query -> predicted query
+        """
+        from ai_engine.generator import build_chapter_query
+
+        candidates = []
+        for chapter_info in outline:
+            real_query = build_chapter_query(self.topic, chapter_info)
+            real_focus = _strip_topic(self.topic, chapter_info.get("focus", ""))
+            for predicted_query in self._futures:
+                predicted_focus = _strip_topic(self.topic, predicted_query)
+                score = focus_overlap(real_focus, predicted_focus)
+                if score >= self.threshold:
+                    candidates.append((score, real_query, predicted_query))
+
+        matches: Dict[str, str] = {}
+        used = set()
+        for score, real_query, predicted_query in sorted(candidates, reverse=True):
+            if real_query in matches or predicted_query in used:
+                continue
+            matches[real_query] = predicted_query
+            used.add(predicted_query)
+        return matches
+
+    def resolve(self, outline: List[Dict]) -> Dict[str, Dict]:
+        """
+        Build chapter research for the real outline.
+
+        Waits for matched predictions, cancels the rest and searches the
+        unmatched chapters with pre_search_many().
+
+        Returns:
+            Dict mapping each chapter's search query to its pre_search() result
+        """
+        from ai_engine.generator import build_chapter_query
+
+        matches = self.match(outline)
+        for predicted_query, future in self._futures.items():
+            if predicted_query not in matches.values():
+                # Only cancels searches that have not started; running ones
+                # finish in the background and their results are dropped
+                future.cancel()
+
+        research: Dict[str, Dict] = {}
+        for real_query, predicted_query in matches.items():
+            try:
+                result = self._futures[predicted_query].result()
+            except Exception as e:
+                print(f"⚠️ Speculative search failed for '{predicted_query[:50]}': {e}")
+                continue
+            # The cache key belongs to the predicted query; saving the result
+            # under the chapter's keyword must not cache it for that keyword
+            research[real_query] = {
+                k: v for k, v in result.items() if k not in ("cache_key", "requested_count", "freshness")
+            }
+
+        remaining = [
+            query for query in dict.fromkeys(build_chapter_query(self.topic, c) for c in outline)
+            if query not in research
+        ]
+        print(f"🔮 Speculative prefetch: {len(research)} chapters matched, {len(remaining)} searched now")
+        if remaining:
+            research.update(pre_search_many(remaining, count=self.count))
+
+        self.shutdown()
+        return research
+
+    def shutdown(self) -> None:
+        """Cancel pending predictions and release the worker pool."""
+        for future in self._futures.values():
+            future.cancel()
+        if self._executor:
+            self._executor.shutdown(wait=False)
+            self._executor = None
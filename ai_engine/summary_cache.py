@@ -0,0 +1,228 @@
+"""
+Summary Cache Module - Content-hash cache for LLM summaries
+
+Popular industry pages and snippets show up in most reports, and
+BochaWebSearchTool / DeepReadTool used to re-summarize them every time.
+Summaries are cached under a hash of (normalized content, prompt
+version, model), so a cached summary is reused only for the same text,
+the same prompt and the same model. Bump a tool's prompt version when
+its prompt changes.
+
+Two tiers:
+1. An in-process LRU bounded by entry count and total summary characters
+2. A SQLite file shared across processes, bounded by entry count with
+   least-recently-used eviction
+
+DeepReadTool additionally keeps persisting page summaries into
+CrawledContent.summary alongside the crawled page.
+
+The cache fails open: any error in either tier is logged and treated as
+a miss, so summarization never fails because of the cache.
+
+Configuration (environment):
+- SUMMARY_CACHE_ENABLED: set to false to disable (default true)
+- SUMMARY_CACHE_MAX_ENTRIES / SUMMARY_CACHE_MAX_CHARS: in-memory bounds
+  (default 1000 entries / 2,000,000 characters)
+- SUMMARY_CACHE_DB: SQLite file (default backend/db/summary_cache.sqlite3;
+  empty string keeps the cache in memory only)
+- SUMMARY_CACHE_DB_MAX_ENTRIES: persistent bound (default 50000)
+
+Usage:
+    summary = summary_cache.get(content, "page-v1", model)
+    if summary is None:
+        summary = summarize(content)
+        summary_cache.put(content, "page-v1", model, summary)
+"""
+import os
+import re
+import time
+import sqlite3
+import hashlib
+import threading
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional
+
+
+# Run persistent-tier eviction once per this many inserts
+_EVICT_EVERY = 100
+
+_lock = threading.Lock()
+_memory: "OrderedDict[str, str]" = OrderedDict()
+_memory_chars = 0
+_stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+_inserts = 0
+
+_local = threading.local()
+
+
+def is_enabled() -> bool:
+    """Return whether the summary cache is enabled via environment."""
+    return os.getenv("SUMMARY_CACHE_ENABLED", "true").lower() not in ("0", "false", "no", "off")
+
+
+def normalize_content(content: str) -> str:
+    """NFKC-normalize content and collapse whitespace for hashing."""
+    text = unicodedata.normalize("NFKC", content or "")
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def make_key(content: str, prompt_version: str, model: str) -> str:
+    """Build the cache key for a (content, prompt version, model) tuple."""
+    raw = f"{prompt_version}|{model}|{normalize_content(content)}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
+
+def _max_entries() -> int:
+    return _env_int("SUMMARY_CACHE_MAX_ENTRIES", 1000)
+
+
+def _max_chars() -> int:
+    return _env_int("SUMMARY_CACHE_MAX_CHARS", 2000000)
+
+
+def _db_path() -> Optional[Path]:
+    default = Path(__file__).resolve().parent.parent / "backend" / "db" / "summary_cache.sqlite3"
+    value = os.getenv("SUMMARY_CACHE_DB", str(default))
+    return Path(value) if value else None
+
+
+def _connect() -> Optional[sqlite3.Connection]:
+    """Get this thread's connection to the persistent tier, creating the schema."""
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        path = _db_path()
+        if path is None:
+            return None
+        path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(path), timeout=5, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS summary_cache (
+                key TEXT PRIMARY KEY,
+                summary TEXT NOT NULL,
+                last_used REAL NOT NULL
+            )
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS summary_cache_last_used ON summary_cache (last_used)")
+        _local.conn = conn
+    return conn
+
+
+def _remember(key: str, summary: str) -> None:
+    """Insert into the in-memory LRU and evict down to its bounds."""
+    global _memory_chars
+    with _lock:
+        if key in _memory:
+            _memory_chars -= len(_memory.pop(key))
+        _memory[key] = summary
+        _memory_chars += len(summary)
+        max_entries, max_chars = _max_entries(), _max_chars()
+        while _memory and (len(_memory) > max_entries or _memory_chars > max_chars):
+            _, evicted = _memory.popitem(last=False)
+            _memory_chars -= len(evicted)
+
+
+def get(content: str, prompt_version: str, model: str) -> Optional[str]:
+    """
+    Look up a cached summary.
+
+    Args:
+        content: The exact text that was (or would be) sent for summarization
+        prompt_version: Version tag of the summarization prompt
+        model: Model identifier
+
+    Returns:
+        The cached summary, or None on a miss
+    """
+    if not is_enabled():
+        return None
+
+    key = make_key(content, prompt_version, model)
+    with _lock:
+        summary = _memory.get(key)
+        if summary is not None:
+            _memory.move_to_end(key)
+            _stats["memory_hits"] += 1
+            return summary
+
+    try:
+        conn = _connect()
+        if conn is not None:
+            row = conn.execute("SELECT summary FROM summary_cache WHERE key = ?", (key,)).fetchone()
+            if row:
+                conn.execute("UPDATE summary_cache SET last_used = ? WHERE key = ?", (time.time(), key))
+                _remember(key, row[0])
+                with _lock:
+                    _stats["disk_hits"] += 1
+                return row[0]
+    except Exception as e:
+        print(f"⚠️ Summary cache lookup failed: {e}")
+
+    with _lock:
+        _stats["misses"] += 1
+    return None
+
+
+def put(content: str, prompt_version: str, model: str, summary: str) -> None:
+    """Store a summary in both tiers."""
+    global _inserts
+    if not is_enabled() or not summary:
+        return
+
+    try:
+        key = make_key(content, prompt_version, model)
+        _remember(key, summary)
+        conn = _connect()
+        if conn is None:
+            return
+        conn.execute(
+            "INSERT OR REPLACE INTO summary_cache (key, summary, last_used) VALUES (?, ?, ?)",
+            (key, summary, time.time()),
+        )
+        with _lock:
+            _inserts += 1
+            evict = _inserts % _EVICT_EVERY == 0
+        if evict:
+            _evict_persistent(conn)
+    except Exception as e:
+        print(f"⚠️ Summary cache store failed: {e}")
+
+
+def _evict_persistent(conn: sqlite3.Connection) -> None:
+    """Drop least-recently-used rows beyond SUMMARY_CACHE_DB_MAX_ENTRIES."""
+    max_entries = _env_int("SUMMARY_CACHE_DB_MAX_ENTRIES", 50000)
+    (count,) = conn.execute("SELECT COUNT(*) FROM summary_cache").fetchone()
+    if count > max_entries:
+        conn.execute(
+            "DELETE FROM summary_cache WHERE key IN "
+            "(SELECT key FROM summary_cache ORDER BY last_used ASC LIMIT ?)",
+            (count - max_entries,),
+        )
+
+
+def get_stats() -> Dict[str, float]:
+    """Return hit/miss counters and in-memory usage of this process."""
+    with _lock:
+        stats = dict(_stats, entries=len(_memory), chars=_memory_chars)
+    total = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+    stats["hit_rate"] = (stats["memory_hits"] + stats["disk_hits"]) / total if total else 0.0
+    return stats
+
+
+def clear_memory() -> None:
+    """Empty the in-memory tier (the persistent tier is kept)."""
+    global _memory_chars
+    with _lock:
+        _memory.clear()
+        _memory_chars = 0
@@ -15,7 +15,8 @@ def tavily_search(
     max_results: int = 10,
     search_depth: str = "advanced",
     include_answer: bool = True,
-    api_key: Optional[str] = None
+    api_key: Optional[str] = None,
+    include_raw_content: bool = False
 ) -> Dict[str, Any]:
     """
     Perform a search using Tavily Search API (official SDK).
@@ -26,6 +27,8 @@ def tavily_search(
         search_depth: "basic" for fast, "advanced" for comprehensive
         include_answer: Whether to include AI-generated answer
         api_key: Optional API key override
+        include_raw_content: Also return each page's full parsed content,
+            so deep reads of these URLs can skip a crawl
         
     Returns:
         Dict containing search results and metadata
@@ -33,6 +36,43 @@ def tavily_search(
     if not api_key:
         api_key = os.getenv("TAVILY_API_KEY")
     
+    from ai_engine import replay
+    
+    request = {
+        "query": query,
+        "max_results": min(max_results, 20),
+        "search_depth": search_depth,
+        "include_answer": include_answer
+    }
+    if include_raw_content:
+        # Only keyed when set, so corpora recorded without it still replay
+        request["include_raw_content"] = True
+    return replay.call(
+        "tavily",
+        request,
+        lambda: _tavily_search_live(
+            query, max_results, search_depth, include_answer, api_key, include_raw_content
+        ),
+        ok=lambda response: bool(response.get("success"))
+    )
+
+
+def get_include_raw_content() -> bool:
+    """Read TAVILY_INCLUDE_RAW_CONTENT (default false)."""
+    return os.getenv("TAVILY_INCLUDE_RAW_CONTENT", "false").lower() in ("1", "true", "yes", "on")
+
+
+def _tavily_search_live(
+    query: str,
+    max_results: int,
+    search_depth: str,
+    include_answer: bool,
+    api_key: Optional[str],
+    include_raw_content: bool = False
+) -> Dict[str, Any]:
+    """
+    Live Tavily search guarded by the provider health registry.
+    """
     if not api_key:
         return {
             "success": False,
@@ -40,6 +80,38 @@ def tavily_search(
             "results": []
         }
     
+    from ai_engine import provider_health
+    
+    if not provider_health.acquire("tavily", timeout=5):
+        return {
+            "success": False,
+            "error": f"Tavily {provider_health.block_reason('tavily')}",
+            "results": []
+        }
+    
+    result = _tavily_search_sdk(
+        query, max_results, search_depth, include_answer, api_key, include_raw_content
+    )
+    
+    if result.get("success"):
+        provider_health.record_success("tavily")
+    else:
+        provider_health.record_failure("tavily")
+    
+    return result
+
+
+def _tavily_search_sdk(
+    query: str,
+    max_results: int,
+    search_depth: str,
+    include_answer: bool,
+    api_key: str,
+    include_raw_content: bool = False
+) -> Dict[str, Any]:
+    """
+    Tavily search using the official SDK, falling back to REST if not installed.
+    """
     try:
         from tavily import TavilyClient
         
@@ -49,7 +121,8 @@ def tavily_search(
             query=query,
             max_results=min(max_results, 20),
             search_depth=search_depth,
-            include_answer=include_answer
+            include_answer=include_answer,
+            include_raw_content=include_raw_content
         )
         
         return {
@@ -62,7 +135,9 @@ def tavily_search(
         
     except ImportError:
         # Fallback to REST API if SDK not installed
-        return _tavily_search_rest(query, max_results, search_depth, include_answer, api_key)
+        return _tavily_search_rest(
+            query, max_results, search_depth, include_answer, api_key, include_raw_content
+        )
     except Exception as e:
         return {
             "success": False,
@@ -76,12 +151,13 @@ def _tavily_search_rest(
     max_results: int,
     search_depth: str,
     include_answer: bool,
-    api_key: str
+    api_key: str,
+    include_raw_content: bool = False
 ) -> Dict[str, Any]:
     """
     Fallback: Tavily search using REST API directly.
     """
-    import requests
+    from ai_engine.http_client import get_session
     
     api_url = "https://api.tavily.com/search"
     
@@ -90,11 +166,12 @@ def _tavily_search_rest(
         "query": query,
         "max_results": min(max_results, 20),
         "search_depth": search_depth,
-        "include_answer": include_answer
+        "include_answer": include_answer,
+        "include_raw_content": include_raw_content
     }
     
     try:
-        response = requests.post(
+        response = get_session().post(
             api_url,
             json=payload,
             timeout=30
@@ -4,30 +4,167 @@ Custom tools for CrewAI agents.
 This module defines tools that agents can use to perform actions,
 such as searching the web or crawling websites for data.
 """
-from typing import Optional
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
 from crewai.tools import BaseTool
 from pydantic import Field
 
 
+# Summary cache prompt versions; bump when the matching prompt changes
+SNIPPET_PROMPT_VERSION = "snippet-v1"
+SNIPPET_BATCH_PROMPT_VERSION = "snippet-batch-v1"
+PAGE_PROMPT_VERSION = "page-v1"
+
+_llm_clients: Dict[Tuple[str, int], object] = {}
+_llm_clients_lock = threading.Lock()
+
+# Deep read strategies in default priority order
+CRAWL_METHODS = ["jina", "firecrawl", "beautifulsoup"]
+
+# Domain -> crawl method that last produced usable content for it
+_domain_winners: Dict[str, str] = {}
+_domain_winners_lock = threading.Lock()
+_MAX_DOMAIN_WINNERS = 5000
+
+_crawl_executor = None
+_crawl_executor_lock = threading.Lock()
+
+
+def _summarizer_model() -> str:
+    """Model used for snippet summarization."""
+    return f"openai/{os.environ.get('ARK_MODEL_ENDPOINT', 'ep-20250103154042-lzccq')}"
+
+
+def _get_summarizer_llm(max_tokens: int):
+    """
+    Get a shared crewai LLM client for the ARK summarization model.
+    
+    Clients are cached per (model, max_tokens) so tools don't rebuild
+    one for every snippet.
+    """
+    from crewai import LLM
+    
+    model = _summarizer_model()
+    key = (model, max_tokens)
+    with _llm_clients_lock:
+        client = _llm_clients.get(key)
+        if client is None:
+            client = LLM(
+                model=model,
+                api_key=os.environ.get("ARK_API_KEY"),
+                base_url=os.environ.get("ARK_BASE_URL", "https://ark.cn-beijing.volces.com/api/v3"),
+                max_tokens=max_tokens
+            )
+            _llm_clients[key] = client
+    return client
+
+
+def _ark_call(request: Dict, fn) -> str:
+    """
+    Run a summarizer LLM call through replay.
+    
+    The ARK circuit breaker and rate limit apply to live calls only, so
+    replayed summaries don't depend on the live provider's health.
+    
+    Raises:
+        RuntimeError: If the ARK circuit is open or rate limited
+    """
+    from ai_engine import provider_health, replay
+    
+    def live():
+        if not provider_health.acquire("ark", timeout=5):
+            raise RuntimeError(f"ARK {provider_health.block_reason('ark')}")
+        try:
+            result = fn()
+        except Exception:
+            provider_health.record_failure("ark")
+            raise
+        provider_health.record_success("ark")
+        return result
+    
+    return replay.call("ark", request, live)
+
+
+def _get_crawl_executor():
+    """Shared thread pool for racing deep read strategies."""
+    global _crawl_executor
+    if _crawl_executor is None:
+        from concurrent.futures import ThreadPoolExecutor
+        
+        with _crawl_executor_lock:
+            if _crawl_executor is None:
+                _crawl_executor = ThreadPoolExecutor(
+                    max_workers=int(os.getenv("DEEP_READ_RACE_WORKERS", "16")),
+                    thread_name_prefix="deep-read"
+                )
+    return _crawl_executor
+
+
+def _get_deep_read_hedge_delay() -> Optional[float]:
+    """Read DEEP_READ_HEDGE_DELAY (seconds); unset or invalid disables racing."""
+    value = os.getenv("DEEP_READ_HEDGE_DELAY", "").strip()
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        return None
+
+
+def _crawl_domain(url: str) -> str:
+    from urllib.parse import urlsplit
+    
+    host = (urlsplit(url).hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+def _record_domain_winner(url: str, method: str) -> None:
+    """Remember which crawl method worked for a URL's domain."""
+    domain = _crawl_domain(url)
+    if not domain:
+        return
+    with _domain_winners_lock:
+        if domain not in _domain_winners and len(_domain_winners) >= _MAX_DOMAIN_WINNERS:
+            _domain_winners.clear()
+        _domain_winners[domain] = method
+
+
+def get_domain_winners() -> Dict[str, str]:
+    """Return the remembered per-domain winning crawl methods."""
+    with _domain_winners_lock:
+        return dict(_domain_winners)
+
+
+def _truncate_snippet(snippet: str) -> str:
+    """Fallback summary: the snippet cut to 150 characters."""
+    return snippet[:150] + "..." if len(snippet) > 150 else snippet
+
+
 class DuckDuckGoSearchTool(BaseTool):
     """
-    Tool for searching the web using DuckDuckGo.
+    Tool for searching the web, DuckDuckGo first.
 
-    This is a wrapper around the duckduckgo-search library
-    that provides web search capabilities to agents.
+    Queries go through the search registry over DuckDuckGo, Tavily and
+    Bocha web search, so results may come from any of them when
+    DuckDuckGo is rate limited or unhealthy.
     """
 
     name: str = "DuckDuckGo Search"
     description: str = (
-        "Search the web using DuckDuckGo. "
+        "Search the web (DuckDuckGo, falling back to Tavily or Bocha web search). "
         "Use this tool when you need to find current information about "
         "a topic, company, market trends, or any other web-searchable data. "
         "Input should be a search query string."
     )
+    providers: List[str] = Field(
+        default_factory=lambda: ["duckduckgo", "tavily", "bocha_web"],
+        description="Candidate search providers, routed by the search registry"
+    )
 
     def _run(self, query: str) -> str:
         """
-        Execute a web search using DuckDuckGo.
+        Execute a web search through the search registry.
 
         Args:
             query: The search query string
@@ -36,41 +173,27 @@ class DuckDuckGoSearchTool(BaseTool):
             Search results as a formatted string
         """
         try:
-            from duckduckgo_search import DDGS
-            import time
+            from ai_engine.search_providers import get_registry, run_sync
 
-            results = []
-            
-            # Try with different configurations
-            try:
-                with DDGS() as ddgs:
-                    # Fetch top 5 search results with timeout
-                    search_results = list(ddgs.text(
-                        query, 
-                        max_results=5,
-                        region="wt-wt",  # Worldwide
-                    ))
-                    
-                    for result in search_results:
-                        results.append(
-                            f"Title: {result.get('title', 'N/A')}\n"
-                            f"URL: {result.get('href', 'N/A')}\n"
-                            f"Summary: {result.get('body', 'N/A')}\n"
-                        )
-            except Exception as e:
-                # If first attempt fails, try with a small delay
-                time.sleep(1)
-                with DDGS() as ddgs:
-                    search_results = list(ddgs.text(query, max_results=3))
-                    for result in search_results:
-                        results.append(
-                            f"Title: {result.get('title', 'N/A')}\n"
-                            f"URL: {result.get('href', 'N/A')}\n"
-                            f"Summary: {result.get('body', 'N/A')}\n"
-                        )
+            # DuckDuckGo first; the registry falls back to healthier
+            # providers instead of retrying a rate-limited one
+            response = run_sync(get_registry().search(query, self.providers, count=5))
+
+            results = [
+                f"Title: {hit.title or 'N/A'}\n"
+                f"URL: {hit.url or 'N/A'}\n"
+                f"Summary: {hit.snippet or 'N/A'}\n"
+                for hit in response.hits
+            ]
 
             if results:
                 return "\n---\n".join(results)
+
+            if response.error:
+                return (
+                    f"Search temporarily unavailable for '{query}': {response.error}. "
+                    "Please proceed with analysis using available knowledge."
+                )
             
             # If still no results, return a helpful message
             return (
@@ -79,11 +202,6 @@ class DuckDuckGoSearchTool(BaseTool):
                 "The agent should proceed with available knowledge."
             )
 
-        except ImportError:
-            return (
-                "Error: duckduckgo-search library not installed. "
-                "Please install it with: pip install duckduckgo-search"
-            )
         except Exception as e:
             # Return error but allow agent to continue
             return (
@@ -125,20 +243,14 @@ class WebCrawlerTool(BaseTool):
         try:
             # Placeholder: Attempt to use Crawl4AI if available
             # For MVP, fall back to a simple requests-based approach
-            import requests
-            from html import unescape
-            import re
+            from ai_engine.extraction import extract
+            from ai_engine.fetch import fetch_page
 
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()
+            # Streaming, byte-capped fetch; binaries are rejected, PDFs read as text
+            page = fetch_page(url, timeout=10)
 
-            # Basic HTML cleanup (remove scripts, styles, tags)
-            content = response.text
-            content = re.sub(r"<script[^>]*>.*?</script>", "", content, flags=re.DOTALL)
-            content = re.sub(r"<style[^>]*>.*?</style>", "", content, flags=re.DOTALL)
-            content = re.sub(r"<[^>]+>", " ", content)
-            content = unescape(content)
-            content = re.sub(r"\s+", " ", content).strip()
+            # Main content without scripts, navigation and other boilerplate
+            content = extract(page.text) if page.is_html else page.text.strip()
 
             # Truncate if too long
             if len(content) > self.max_content_length:
@@ -155,7 +267,7 @@ class BochaWebSearchTool(BaseTool):
     Map-Reduce 智能搜索工具 - 使用博查AI搜索并自动总结每条结果。
     
     实现 Map-Reduce 模式：
-    1. Map: 对每条搜索结果调用 LLM 进行独立总结
+    1. Map: 并行调用 LLM 总结每条搜索结果（或批量模式下一次调用总结全部结果）
     2. Reduce: 聚合所有总结返回给 Agent
     
     这样可以极大减少 Token 消耗，防止上下文溢出。
@@ -167,6 +279,22 @@ class BochaWebSearchTool(BaseTool):
         "返回精简的摘要和引用编号，可用于报告中的学术引用。"
         "输入应为搜索关键词字符串。"
     )
+    max_workers: int = Field(
+        default_factory=lambda: int(os.getenv("BOCHA_SUMMARY_CONCURRENCY", "5")),
+        description="Maximum concurrent LLM calls in the map phase"
+    )
+    batch_summaries: bool = Field(
+        default_factory=lambda: os.getenv("BOCHA_SUMMARY_BATCH", "false").lower() in ("1", "true", "yes", "on"),
+        description="Summarize all results with one LLM call, falling back per item"
+    )
+    summary_mode: Optional[str] = Field(
+        default=None,
+        description="'llm' or 'extractive'; None uses SUMMARY_MODE_SNIPPET / SUMMARY_MODE"
+    )
+    providers: List[str] = Field(
+        default_factory=lambda: ["bocha_web", "tavily", "duckduckgo"],
+        description="Candidate search providers, routed by the search registry"
+    )
 
     def _run(self, query: str) -> str:
         """
@@ -178,30 +306,19 @@ class BochaWebSearchTool(BaseTool):
         Returns:
             Summarized search results with citation numbers
         """
-        import os
-        import requests
-        
-        api_key = os.getenv("BOCHA_API_KEY", "sk-accd71cb3f8b48789e34040d18337912")
-        api_url = "https://api.bocha.cn/v1/web-search"
-        
-        headers = {
-            "Authorization": f"Bearer {api_key}",
-            "Content-Type": "application/json"
-        }
-        
-        payload = {
-            "query": query,
-            "freshness": "noLimit",
-            "summary": True,
-            "count": 5  # Reduced count since we're summarizing each
-        }
+        from ai_engine.search_providers import get_registry, run_sync
+        from ai_engine.search_cache import classify_failure
         
         try:
-            response = requests.post(api_url, json=payload, headers=headers, timeout=30)
-            response.raise_for_status()
+            # Reduced count since we're summarizing each
+            response = run_sync(get_registry().search(query, self.providers, count=5))
+            
+            if response.error and not response.hits:
+                if classify_failure(response.error) == "timeout":
+                    return f"搜索超时，请稍后重试。关键词：{query}"
+                return f"搜索请求失败：{response.error}。请检查网络连接。"
             
-            data = response.json()
-            web_pages = data.get("data", {}).get("webPages", {}).get("value", [])
+            web_pages = [hit.to_source() for hit in response.hits]
             
             if not web_pages:
                 return f"未找到与 '{query}' 相关的搜索结果。"
@@ -211,16 +328,16 @@ class BochaWebSearchTool(BaseTool):
             results_for_db = []
             reference_list = []
             
-            for i, page in enumerate(web_pages, 1):
+            # === MAP PHASE: Summarize all results with LLM ===
+            summaries = self._summarize_pages(web_pages)
+            
+            for i, (page, summary) in enumerate(zip(web_pages, summaries), 1):
                 ref_id = f"[Ref-{i}]"
                 title = page.get("name", "无标题")
                 raw_snippet = page.get("snippet", "")
                 site_name = page.get("siteName", "")
                 url = page.get("url", "")
                 
-                # === MAP PHASE: Summarize each result with LLM ===
-                summary = self._summarize_snippet(raw_snippet, title)
-                
                 # Store for database (full data)
                 results_for_db.append({
                     "ref_id": ref_id,
@@ -258,22 +375,117 @@ class BochaWebSearchTool(BaseTool):
                 full_output = f"## 搜索「{query}」找到 {len(web_pages)} 条结果\n\n"
                 for item in results_for_db:
                     full_output += f"{item['ref_id']}\n标题: {item['title']}\n摘要: {item['snippet']}\n链接: {item['url']}\n\n---\n\n"
-                self._save_search_result(query, web_pages, full_output, results_for_db)
+                self._save_search_result(query, web_pages, full_output, results_for_db,
+                                         search_source=response.provider)
             except Exception as save_error:
                 print(f"Warning: Failed to save search result: {save_error}")
             
             return output_for_llm
             
-        except requests.exceptions.Timeout:
-            return f"搜索超时，请稍后重试。关键词：{query}"
-        except requests.exceptions.RequestException as e:
-            return f"搜索请求失败：{str(e)}。请检查网络连接。"
         except Exception as e:
             return f"搜索出错：{str(e)}。请使用已有知识继续分析。"
     
+    def _summarize_pages(self, web_pages: list) -> List[str]:
+        """
+        Map Phase: Summarize every search result.
+        
+        In extractive mode no LLM is called (see ai_engine.extractive). In
+        batch mode all snippets go to the LLM in one prompt; items the
+        batch response doesn't cover are summarized individually. Individual
+        calls run concurrently (up to max_workers), so the phase costs about
+        one LLM round trip instead of one per result.
+        
+        Returns:
+            One summary per page, in order
+        """
+        from concurrent.futures import ThreadPoolExecutor
+        from ai_engine import extractive
+        
+        items = [(page.get("snippet", ""), page.get("name", "无标题")) for page in web_pages]
+        
+        if extractive.get_summary_mode("snippet", self.summary_mode) == extractive.EXTRACTIVE:
+            return [
+                extractive.summarize_snippet(snippet) if len(snippet) >= 50 else (snippet or "无详细内容")
+                for snippet, _ in items
+            ]
+        
+        summaries: List[Optional[str]] = [None] * len(items)
+        
+        if self.batch_summaries:
+            summaries = self._summarize_batch(items)
+        
+        pending = [i for i, summary in enumerate(summaries) if summary is None]
+        if pending:
+            workers = max(1, min(self.max_workers, len(pending)))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bocha-summary") as pool:
+                results = pool.map(lambda i: self._summarize_snippet(*items[i]), pending)
+                for i, summary in zip(pending, results):
+                    summaries[i] = summary
+        
+        return summaries
+    
+    def _summarize_batch(self, items: List[Tuple[str, str]]) -> List[Optional[str]]:
+        """
+        Summarize several (snippet, title) pairs with a single LLM call.
+        
+        Returns:
+            One summary per item; None for items missing from the response
+            or if the call or JSON parsing failed
+        """
+        import json
+        import re
+        from ai_engine import summary_cache
+        
+        model = _summarizer_model()
+        summaries: List[Optional[str]] = [None] * len(items)
+        blocks = []
+        for i, (snippet, title) in enumerate(items):
+            if not snippet or len(snippet) < 50:
+                summaries[i] = snippet if snippet else "无详细内容"
+                continue
+            summaries[i] = summary_cache.get(f"{title}\n{snippet[:500]}", SNIPPET_BATCH_PROMPT_VERSION, model)
+            if summaries[i] is None:
+                blocks.append(f"[{i + 1}] 标题：{title}\n内容：{snippet[:500]}")
+        
+        if not blocks:
+            return summaries
+        
+        batch_prompt = (
+            "请分别用2句话总结以下每条内容的关键事实（保持客观，不要废话）。\n"
+            '只输出 JSON 数组，格式：[{"id": 编号, "summary": "总结"}]\n\n'
+            + "\n\n".join(blocks)
+        )
+        
+        try:
+            max_tokens = min(150 * len(blocks), 1500)
+            summarizer = _get_summarizer_llm(max_tokens)
+            result = _ark_call(
+                {"model": model, "prompt": batch_prompt, "max_tokens": max_tokens},
+                lambda: summarizer.call(messages=[{"role": "user", "content": batch_prompt}])
+            )
+            
+            json_match = re.search(r'\[[\s\S]*\]', result or "")
+            parsed = json.loads(json_match.group()) if json_match else []
+            for entry in parsed:
+                if not isinstance(entry, dict):
+                    continue
+                try:
+                    index = int(entry.get("id")) - 1
+                except (TypeError, ValueError):
+                    continue
+                summary = str(entry.get("summary") or "").strip()
+                if 0 <= index < len(items) and summaries[index] is None and len(summary) > 10:
+                    summaries[index] = summary[:200]
+                    snippet, title = items[index]
+                    summary_cache.put(f"{title}\n{snippet[:500]}", SNIPPET_BATCH_PROMPT_VERSION, model, summaries[index])
+        except Exception as e:
+            print(f"Batch summarization fallback: {e}")
+        
+        return summaries
+    
     def _summarize_snippet(self, snippet: str, title: str) -> str:
         """
-        Map Phase: Summarize a single snippet using LLM.
+        Summarize a single snippet using LLM.
         
         Args:
             snippet: The raw text to summarize
@@ -286,16 +498,15 @@ class BochaWebSearchTool(BaseTool):
             return snippet if snippet else "无详细内容"
         
         try:
-            import os
-            from crewai import LLM
+            from ai_engine import summary_cache
             
-            # Use the same ARK LLM for summarization
-            summarizer = LLM(
-                model=f"openai/{os.environ.get('ARK_MODEL_ENDPOINT', 'ep-20250103154042-lzccq')}",
-                api_key=os.environ.get("ARK_API_KEY"),
-                base_url=os.environ.get("ARK_BASE_URL", "https://ark.cn-beijing.volces.com/api/v3"),
-                max_tokens=150  # Keep summaries short
-            )
+            cache_text = f"{title}\n{snippet[:500]}"
+            cached = summary_cache.get(cache_text, SNIPPET_PROMPT_VERSION, _summarizer_model())
+            if cached is not None:
+                return cached
+            
+            # Use the same ARK LLM for summarization, kept short
+            summarizer = _get_summarizer_llm(150)
             
             # Micro-prompt for fast summarization
             micro_prompt = (
@@ -305,36 +516,31 @@ class BochaWebSearchTool(BaseTool):
             )
             
             # Call LLM for summarization
-            result = summarizer.call(messages=[{"role": "user", "content": micro_prompt}])
+            result = _ark_call(
+                {"model": _summarizer_model(), "prompt": micro_prompt, "max_tokens": 150},
+                lambda: summarizer.call(messages=[{"role": "user", "content": micro_prompt}])
+            )
             
             if result and len(result) > 10:
-                return result.strip()[:200]  # Limit summary length
+                summary = result.strip()[:200]  # Limit summary length
+                summary_cache.put(cache_text, SNIPPET_PROMPT_VERSION, _summarizer_model(), summary)
+                return summary
             else:
                 # Fallback to truncation if LLM fails
-                return snippet[:150] + "..." if len(snippet) > 150 else snippet
+                return _truncate_snippet(snippet)
                 
         except Exception as e:
             # Fallback: simple truncation if summarization fails
             print(f"Summarization fallback: {e}")
-            return snippet[:150] + "..." if len(snippet) > 150 else snippet
+            return _truncate_snippet(snippet)
     
-    def _save_search_result(self, keyword: str, web_pages: list, formatted: str, results_json: list):
+    def _save_search_result(self, keyword: str, web_pages: list, formatted: str, results_json: list,
+                            search_source: str = "bocha"):
         """Save search result to database."""
         try:
-            import os
-            import sys
-            from pathlib import Path
-            
-            backend_dir = Path(__file__).resolve().parent.parent / "backend"
-            if str(backend_dir) not in sys.path:
-                sys.path.insert(0, str(backend_dir))
-            
-            os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
-            
-            import django
-            if not django.apps.apps.ready:
-                django.setup()
+            from ai_engine.db import setup_django
             
+            setup_django()
             from apps.reports.models import SearchResult
             
             SearchResult.objects.create(
@@ -342,7 +548,7 @@ class BochaWebSearchTool(BaseTool):
                 results_count=len(web_pages),
                 results_json=results_json,
                 formatted_results=formatted,
-                search_source="bocha"
+                search_source=search_source
             )
         except Exception as e:
             print(f"Database save error: {e}")
@@ -358,6 +564,10 @@ class BochaAISearchTool(BaseTool):
         "适合需要精准回答或专业百科信息的查询。"
         "输入应为搜索关键词字符串。"
     )
+    providers: List[str] = Field(
+        default_factory=lambda: ["bocha", "tavily"],
+        description="Candidate search providers, routed by the search registry"
+    )
 
     def _run(self, query: str) -> str:
         """
@@ -370,14 +580,15 @@ class BochaAISearchTool(BaseTool):
             AI generated answer with references
         """
         try:
-            from ai_engine.bocha_api import bocha_ai_search, parse_bocha_response
+            from ai_engine.search_providers import get_registry, run_sync
             
-            raw_response = bocha_ai_search(query, count=10, answer=True, stream=False)
-            parsed = parse_bocha_response(raw_response)
+            response = run_sync(get_registry().search(query, self.providers, count=10))
+            if response.error and response.empty:
+                return f"AI Search failed: {response.error}"
             
-            web_sources = parsed.get("web_sources", [])
-            answer = parsed.get("answer", "")
-            cards = parsed.get("modal_cards", [])
+            web_sources = [hit.to_source() for hit in response.hits]
+            answer = response.answer
+            cards = response.modal_cards
             
             # Save to DB (optional, reusing existing logic if relevant but structure differs)
             # For now just format output for Agent
@@ -409,10 +620,19 @@ class DeepReadTool(BaseTool):
     """
     Deep Web Reader Tool - Read full web page content and summarize it.
     
-    Priority order:
+    Pages crawled recently (or revalidated with a conditional GET) and
+    pages whose content came with a search result are served from
+    CrawledContent without a re-crawl (see ai_engine.crawl_cache).
+    Otherwise, priority order:
     1. Jina AI Reader (free, no key required) - DEFAULT
     2. Firecrawl (if API key set)
-    3. Basic BeautifulSoup crawler (fallback)
+    3. Basic crawler: direct fetch + main-content extraction (fallback;
+       stored with crawl method "beautifulsoup")
+    
+    The method that last worked for a domain is tried first. With
+    DEEP_READ_HEDGE_DELAY set, methods are raced: each next method starts
+    after the hedge delay (or as soon as all running ones failed) and the
+    first usable result wins.
     """
     name: str = "Deep Web Reader"
     description: str = (
@@ -420,6 +640,14 @@ class DeepReadTool(BaseTool):
         "适用于需要深入了解某个具体网页内容的场景。"
         "输入应为完整的 URL 地址。"
     )
+    summary_mode: Optional[str] = Field(
+        default=None,
+        description="'llm' or 'extractive'; None uses SUMMARY_MODE_PAGE / SUMMARY_MODE"
+    )
+    hedge_delay: Optional[float] = Field(
+        default_factory=_get_deep_read_hedge_delay,
+        description="Seconds before racing the next crawl method; None = sequential"
+    )
 
     def _run(self, url: str) -> str:
         """
@@ -431,98 +659,161 @@ class DeepReadTool(BaseTool):
         Returns:
             Summarized content from the web page
         """
-        import os
-        
-        crawl_method = "other"
-        raw_content = ""
-        summary = ""
-        success = False
-        error_msg = ""
-        
         # =====================
-        # Method 1: Jina AI Reader (FREE, Default)
+        # Method 0: Stored crawl or search-provided content (see crawl_cache)
         # =====================
-        try:
-            content = self._jina_read(url)
-            if content and len(content) > 100:
-                raw_content = content
-                crawl_method = "jina"
-                summary = self._summarize_content(url, content)
-                success = True
-                self._save_to_db(url, raw_content, summary, crawl_method, success)
-                return summary
-        except Exception as e:
-            print(f"Jina Reader error: {e}")
-            error_msg = str(e)
+        from ai_engine import crawl_cache
+        
+        stored = crawl_cache.get_fresh(url)
+        if stored is not None:
+            # Stored summaries are LLM summaries; extractive mode re-extracts
+            if stored.summary and not self._is_extractive():
+                return stored.summary
+            summary, storable = self._summarize_content(url, stored.raw_content)
+            if storable and not stored.summary:
+                stored.summary = summary
+                try:
+                    stored.save(update_fields=["summary"])
+                except Exception as e:
+                    print(f"Database save error: {e}")
+            return summary
         
         # =====================
-        # Method 2: Firecrawl (if API key available)
+        # Methods 1-3: Jina, Firecrawl, BeautifulSoup
         # =====================
-        firecrawl_key = os.getenv("FIRECRAWL_API_KEY")
+        methods = self._crawl_order(url)
+        if self.hedge_delay is None:
+            crawl_method, content, error_msg = self._crawl_sequential(url, methods)
+        else:
+            crawl_method, content, error_msg = self._crawl_racing(url, methods, self.hedge_delay)
+        
+        if not content:
+            self._save_to_db(url, "", "", crawl_method, False, error_msg or "No content returned")
+            if error_msg:
+                return f"Failed to read {url}: {error_msg}"
+            return f"Failed to read content from {url}"
         
-        if firecrawl_key:
+        if self._is_usable(content):
+            _record_domain_winner(url, crawl_method)
+        if crawl_method != "beautifulsoup":
+            # Reader services don't pass on the origin's ETag / Last-Modified;
+            # a background HEAD request captures them
+            crawl_cache.capture_validators(url)
+        summary, storable = self._summarize_content(url, content)
+        self._save_to_db(url, content, summary if storable else "", crawl_method, True)
+        return summary
+
+    def _crawl_order(self, url: str) -> List[str]:
+        """Available crawl methods, the domain's last winner first."""
+        methods = [
+            method for method in CRAWL_METHODS
+            if method != "firecrawl" or os.getenv("FIRECRAWL_API_KEY")
+        ]
+        with _domain_winners_lock:
+            winner = _domain_winners.get(_crawl_domain(url))
+        if winner in methods:
+            methods.remove(winner)
+            methods.insert(0, winner)
+        return methods
+
+    @staticmethod
+    def _is_usable(content: str) -> bool:
+        """Quality check for crawled content."""
+        return bool(content) and len(content) > 100
+
+    def _fetch_content(self, method: str, url: str) -> str:
+        """
+        Fetch a page with one crawl method.
+
+        Raises:
+            ImportError: If the method's optional dependency is missing
+        """
+        if method == "jina":
+            return self._jina_read(url)
+        if method == "firecrawl":
+            return self._firecrawl_read(url)
+        return self._basic_crawl(url)
+
+    def _crawl_sequential(self, url: str, methods: List[str]) -> Tuple[str, str, str]:
+        """
+        Try crawl methods one after another.
+
+        Returns:
+            (method, content, error); content is the first usable result,
+            else a short non-empty fallback result, else ""
+        """
+        fallback = ("other", "")
+        error_msg = ""
+        for method in methods:
             try:
-                from firecrawl import FirecrawlApp
-                app = FirecrawlApp(api_key=firecrawl_key)
-                
-                scrape_result = app.scrape_url(url, params={'formats': ['markdown']})
-                content = scrape_result.get('markdown', '')
-                
-                if content:
-                    raw_content = content
-                    crawl_method = "firecrawl"
-                    summary = self._summarize_content(url, content)
-                    success = True
-                    self._save_to_db(url, raw_content, summary, crawl_method, success)
-                    return summary
-                    
+                content = self._fetch_content(method, url)
             except ImportError:
-                pass
+                continue
             except Exception as e:
-                print(f"Firecrawl error: {e}")
+                print(f"{method} crawl error: {e}")
                 error_msg = str(e)
+                continue
+            if self._is_usable(content):
+                return method, content, ""
+            if content and not fallback[1]:
+                fallback = (method, content)
+        return fallback[0], fallback[1], "" if fallback[1] else error_msg
+
+    def _crawl_racing(self, url: str, methods: List[str], hedge_delay: float) -> Tuple[str, str, str]:
+        """
+        Race crawl methods: start the next one every hedge_delay seconds,
+        or immediately when all running methods have failed.
+
+        Returns:
+            Same as _crawl_sequential(); losers still running are abandoned
+        """
+        from concurrent.futures import wait, FIRST_COMPLETED
         
-        # =====================
-        # Method 3: Basic BeautifulSoup crawler (Fallback)
-        # =====================
-        try:
-            content = self._basic_crawl(url)
-            if content:
-                raw_content = content
-                crawl_method = "beautifulsoup"
-                summary = self._summarize_content(url, content)
-                success = True
-                self._save_to_db(url, raw_content, summary, crawl_method, success)
-                return summary
-            
-            # Save failure
-            self._save_to_db(url, "", "", crawl_method, False, "No content returned")
-            return f"Failed to read content from {url}"
-            
-        except Exception as e:
-            self._save_to_db(url, "", "", crawl_method, False, str(e))
-            return f"Failed to read {url}: {str(e)}"
+        executor = _get_crawl_executor()
+        queue = list(methods)
+        pending = {}
+        fallback = ("other", "")
+        error_msg = ""
+        
+        while queue or pending:
+            if queue:
+                method = queue.pop(0)
+                pending[executor.submit(self._fetch_content, method, url)] = method
+            
+            timeout = hedge_delay if queue else None
+            done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                method = pending.pop(future)
+                try:
+                    content = future.result()
+                except ImportError:
+                    continue
+                except Exception as e:
+                    print(f"{method} crawl error: {e}")
+                    error_msg = str(e)
+                    continue
+                if self._is_usable(content):
+                    for loser in pending:
+                        loser.cancel()
+                    if method != methods[0]:
+                        print(f"🏁 Deep read of {url[:60]} won by {method}")
+                    return method, content, ""
+                if content and not fallback[1]:
+                    fallback = (method, content)
+        
+        return fallback[0], fallback[1], "" if fallback[1] else error_msg
 
     def _save_to_db(self, url: str, raw_content: str, summary: str, 
                     method: str, success: bool, error_msg: str = ""):
         """Save crawl result to database."""
         try:
-            import sys
-            import os
-            from pathlib import Path
-            
-            backend_dir = Path(__file__).resolve().parent.parent / "backend"
-            if str(backend_dir) not in sys.path:
-                sys.path.insert(0, str(backend_dir))
-            
-            os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
-            
-            import django
-            if not django.apps.apps.ready:
-                django.setup()
+            from ai_engine.db import setup_django
             
+            setup_django()
             from apps.reports.models import CrawledContent
+            from ai_engine.crawl_cache import take_validators
             
+            etag, last_modified = take_validators(url)
             CrawledContent.objects.create(
                 url=url[:2000],  # Respect max_length
                 raw_content=raw_content[:50000] if raw_content else "",  # Limit size
@@ -530,7 +821,9 @@ class DeepReadTool(BaseTool):
                 content_length=len(raw_content) if raw_content else 0,
                 crawl_method=method,
                 success=success,
-                error_message=error_msg
+                error_message=error_msg,
+                etag=etag,
+                last_modified=last_modified
             )
         except Exception as e:
             print(f"Database save error: {e}")
@@ -540,7 +833,13 @@ class DeepReadTool(BaseTool):
         Use Jina AI Reader (free) to convert URL to Markdown.
         Simply prefix the URL with https://r.jina.ai/
         """
-        import requests
+        from ai_engine import replay
+        
+        return replay.call("jina", {"url": url}, lambda: self._jina_read_live(url))
+
+    def _jina_read_live(self, url: str) -> str:
+        """Fetch a URL through the Jina AI Reader."""
+        from ai_engine.http_client import get_session
         
         jina_url = f"https://r.jina.ai/{url}"
         
@@ -549,49 +848,84 @@ class DeepReadTool(BaseTool):
             "User-Agent": "Mozilla/5.0 (compatible; DeepSonar/1.0)"
         }
         
-        response = requests.get(jina_url, headers=headers, timeout=30)
+        response = get_session().get(jina_url, headers=headers, timeout=30)
         response.raise_for_status()
         
         return response.text
 
+    def _firecrawl_read(self, url: str) -> str:
+        """Scrape a URL to Markdown with Firecrawl (requires FIRECRAWL_API_KEY)."""
+        from firecrawl import FirecrawlApp
+        from ai_engine import replay
+        
+        app = FirecrawlApp(api_key=os.getenv("FIRECRAWL_API_KEY"))
+        return replay.call(
+            "firecrawl",
+            {"url": url},
+            lambda: app.scrape_url(url, params={'formats': ['markdown']}).get('markdown', '')
+        )
+
     def _basic_crawl(self, url: str) -> str:
-        """Basic fallback crawler using requests and BeautifulSoup."""
-        import requests
-        from bs4 import BeautifulSoup
+        """Basic fallback crawler: direct fetch plus ai_engine.extraction."""
+        from ai_engine import replay
+        
+        return replay.call("crawl", {"url": url}, lambda: self._basic_crawl_live(url))
+
+    def _basic_crawl_live(self, url: str) -> str:
+        """Fetch a URL directly and extract its main content as Markdown (or PDF/plain text)."""
+        from ai_engine.crawl_cache import note_validators
+        from ai_engine.extraction import extract
+        from ai_engine.fetch import fetch_page
         
         headers = {
             "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7)"
         }
         
-        response = requests.get(url, headers=headers, timeout=15)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.text, "html.parser")
+        # Streaming, byte-capped fetch; binaries are rejected, PDFs read as text
+        page = fetch_page(url, timeout=15, headers=headers)
+        note_validators(url, page.etag, page.last_modified)
         
-        # Remove script and style elements
-        for script in soup(["script", "style", "nav", "footer", "header", "aside"]):
-            script.decompose()
+        if not page.is_html:
+            return page.text.strip()
+        # Main content without navigation, sidebars and footers
+        return extract(page.text, markdown=True)
+
+    def _is_extractive(self) -> bool:
+        """Whether page summaries are extractive instead of LLM-written."""
+        from ai_engine import extractive
         
-        # Get text
-        text = soup.get_text(separator="\n", strip=True)
-        
-        # Clean up whitespace
-        lines = [line.strip() for line in text.splitlines() if line.strip()]
-        return "\n".join(lines[:200])  # Limit to first 200 lines
+        return extractive.get_summary_mode("page", self.summary_mode) == extractive.EXTRACTIVE
 
-    def _summarize_content(self, url: str, content: str) -> str:
-        """Summarize long content using LLM."""
+    def _summarize_content(self, url: str, content: str) -> Tuple[str, bool]:
+        """
+        Summarize long content using LLM.
+        
+        Returns:
+            (summary, storable); only LLM summaries and short pages kept
+            as-is are storable in CrawledContent.summary, so extractive
+            summaries and truncation fallbacks are never served as LLM
+            summaries later
+        """
         import os
         from litellm import completion
+        from ai_engine import extractive, summary_cache
         
         # If content is short, return as-is
         if len(content) < 1500:
-            return f"【来源: {url}】\n\n{content}"
+            return f"【来源: {url}】\n\n{content}", True
         
         # Truncate for summarization (context limit protection)
         truncated = content[:8000]
         
+        if self._is_extractive():
+            return f"【来源: {url}】\n\n{extractive.summarize_page(truncated)}", False
+        model = os.getenv("ARK_MODEL_ENDPOINT", "openai/ep-20250603140551-tp9lt")
+        
         try:
+            cached = summary_cache.get(truncated, PAGE_PROMPT_VERSION, model)
+            if cached is not None:
+                return f"【来源: {url}】\n\n{cached}", True
+            
             summary_prompt = f"""
 请将以下网页内容总结为 500 字以内的精华摘要，保留关键数据、观点和结论：
 
@@ -606,20 +940,22 @@ class DeepReadTool(BaseTool):
 4. 使用简洁的要点形式
 """
             
-            response = completion(
-                model=os.getenv("ARK_MODEL_ENDPOINT", "openai/ep-20250603140551-tp9lt"),
-                messages=[{"role": "user", "content": summary_prompt}],
-                api_key=os.getenv("ARK_API_KEY"),
-                base_url=os.getenv("ARK_BASE_URL", "https://ark.cn-beijing.volces.com/api/v3"),
-                max_tokens=800
-            )
-            
-            summary = response.choices[0].message.content.strip()
-            return f"【来源: {url}】\n\n{summary}"
+            summary = _ark_call(
+                {"model": model, "prompt": summary_prompt, "max_tokens": 800},
+                lambda: completion(
+                    model=model,
+                    messages=[{"role": "user", "content": summary_prompt}],
+                    api_key=os.getenv("ARK_API_KEY"),
+                    base_url=os.getenv("ARK_BASE_URL", "https://ark.cn-beijing.volces.com/api/v3"),
+                    max_tokens=800
+                ).choices[0].message.content
+            ).strip()
+            summary_cache.put(truncated, PAGE_PROMPT_VERSION, model, summary)
+            return f"【来源: {url}】\n\n{summary}", True
             
         except Exception as e:
             # If summarization fails, return truncated content
-            return f"【来源: {url}】\n\n{truncated[:1500]}..."
+            return f"【来源: {url}】\n\n{truncated[:1500]}...", False
 
 
 # Instantiate tools for easy import
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.9 on 2026-10-16 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0005_crawledcontent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='searchresult',
+            name='cache_key',
+            field=models.CharField(blank=True, db_index=True, help_text='搜索缓存键 (规范化查询 + 来源 + 数量 + 时效)', max_length=64),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.9 on 2026-10-16 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0006_searchresult_cache_key'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='crawledcontent',
+            name='crawl_method',
+            field=models.CharField(choices=[('jina', 'Jina AI Reader'), ('firecrawl', 'Firecrawl'), ('beautifulsoup', 'BeautifulSoup'), ('tavily', 'Tavily Raw Content'), ('other', 'Other')], default='jina', help_text='爬取方式', max_length=20),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.9 on 2026-10-16 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0007_crawledcontent_tavily_method'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='crawledcontent',
+            name='etag',
+            field=models.CharField(blank=True, help_text='源站 ETag（用于条件请求重新验证）', max_length=256),
+        ),
+        migrations.AddField(
+            model_name='crawledcontent',
+            name='last_modified',
+            field=models.CharField(blank=True, help_text='源站 Last-Modified（用于条件请求重新验证）', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='crawledcontent',
+            name='validated_at',
+            field=models.DateTimeField(blank=True, help_text='最近一次确认内容未变化的时间', null=True),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.9 on 2026-10-16 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0008_crawledcontent_validators'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='searchresult',
+            name='requested_count',
+            field=models.IntegerField(default=0, help_text='请求的结果数量（近似查询复用时匹配）'),
+        ),
+        migrations.AddField(
+            model_name='searchresult',
+            name='freshness',
+            field=models.CharField(blank=True, help_text='请求的时效范围（近似查询复用时匹配）', max_length=20),
+        ),
+    ]
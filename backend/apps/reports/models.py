@@ -196,6 +196,21 @@ class SearchResult(models.Model):
         default="bocha",
         help_text="搜索来源 (bocha, duckduckgo, etc.)"
     )
+    cache_key = models.CharField(
+        max_length=64,
+        blank=True,
+        db_index=True,
+        help_text="搜索缓存键 (规范化查询 + 来源 + 数量 + 时效)"
+    )
+    requested_count = models.IntegerField(
+        default=0,
+        help_text="请求的结果数量（近似查询复用时匹配）"
+    )
+    freshness = models.CharField(
+        max_length=20,
+        blank=True,
+        help_text="请求的时效范围（近似查询复用时匹配）"
+    )
     created_at = models.DateTimeField(
         default=timezone.now,
         help_text="搜索时间"
@@ -221,6 +236,7 @@ class CrawledContent(models.Model):
         JINA = "jina", "Jina AI Reader"
         FIRECRAWL = "firecrawl", "Firecrawl"
         BEAUTIFULSOUP = "beautifulsoup", "BeautifulSoup"
+        TAVILY = "tavily", "Tavily Raw Content"
         OTHER = "other", "Other"
 
     url = models.URLField(
@@ -262,6 +278,21 @@ class CrawledContent(models.Model):
         blank=True,
         help_text="错误信息（如果失败）"
     )
+    etag = models.CharField(
+        max_length=256,
+        blank=True,
+        help_text="源站 ETag（用于条件请求重新验证）"
+    )
+    last_modified = models.CharField(
+        max_length=64,
+        blank=True,
+        help_text="源站 Last-Modified（用于条件请求重新验证）"
+    )
+    validated_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="最近一次确认内容未变化的时间"
+    )
     created_at = models.DateTimeField(
         default=timezone.now,
         help_text="爬取时间"
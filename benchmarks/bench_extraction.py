@@ -0,0 +1,125 @@
+"""
+Benchmark: HTML main-content extraction vs. the previous crawler implementations.
+
+Runs ai_engine.extraction and the two implementations it replaced over
+the saved pages in benchmarks/corpus/*.html (or the files given on the
+command line) and reports pages/sec plus extracted-text quality. Quality
+is token precision/recall/F1 against the page's main text in the
+matching .txt file (CJK bigrams and English words, see
+ai_engine.ranking.tokenize): low precision means navigation and other
+noise was kept, low recall means article text was lost.
+
+Baselines:
+- bs4: DeepReadTool._basic_crawl (BeautifulSoup html.parser, first 200 lines)
+- regex: WebCrawlerTool._run (regex tag stripping)
+
+Usage:
+    python benchmarks/bench_extraction.py
+    python benchmarks/bench_extraction.py --repeat 50 page.html
+"""
+import re
+import sys
+import time
+import argparse
+import statistics
+from collections import Counter
+from html import unescape
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from ai_engine import extraction
+from ai_engine.ranking import tokenize
+
+
+CORPUS_DIR = Path(__file__).resolve().parent / "corpus"
+
+
+def legacy_bs4(html):
+    """Previous DeepReadTool._basic_crawl text extraction."""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    for script in soup(["script", "style", "nav", "footer", "header", "aside"]):
+        script.decompose()
+    text = soup.get_text(separator="\n", strip=True)
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    return "\n".join(lines[:200])
+
+
+def legacy_regex(html):
+    """Previous WebCrawlerTool._run text extraction (without truncation)."""
+    content = re.sub(r"<script[^>]*>.*?</script>", "", html, flags=re.DOTALL)
+    content = re.sub(r"<style[^>]*>.*?</style>", "", content, flags=re.DOTALL)
+    content = re.sub(r"<[^>]+>", " ", content)
+    content = unescape(content)
+    return re.sub(r"\s+", " ", content).strip()
+
+
+def quality(extracted, expected):
+    """Token precision, recall and F1 of extracted text against the expected text."""
+    got, want = Counter(tokenize(extracted)), Counter(tokenize(expected))
+    overlap = sum((got & want).values())
+    precision = overlap / max(sum(got.values()), 1)
+    recall = overlap / max(sum(want.values()), 1)
+    f1 = 2 * precision * recall / (precision + recall) if overlap else 0.0
+    return precision, recall, f1
+
+
+def load_pages(files):
+    paths = [Path(f) for f in files] or sorted(CORPUS_DIR.glob("*.html"))
+    pages = []
+    for path in paths:
+        expected = path.with_suffix(".txt")
+        pages.append((
+            path.stem,
+            path.read_text(encoding="utf-8"),
+            expected.read_text(encoding="utf-8") if expected.exists() else None,
+        ))
+    return pages
+
+
+def run(name, extract, pages, repeat, verbose):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        outputs = [extract(html) for _, html, _ in pages]
+    elapsed = time.perf_counter() - start
+
+    scores = [quality(out, expected) for out, (_, _, expected) in zip(outputs, pages) if expected]
+    print(f"\n[{name}] {len(pages) * repeat / elapsed:.1f} pages/sec")
+    if scores:
+        print(f"  precision {statistics.mean(s[0] for s in scores):.3f}, "
+              f"recall {statistics.mean(s[1] for s in scores):.3f}, "
+              f"F1 {statistics.mean(s[2] for s in scores):.3f}")
+    if verbose:
+        for (page, _, expected), out in zip(pages, outputs):
+            if expected:
+                p, r, f = quality(out, expected)
+                print(f"    {page:<28} P {p:.3f}  R {r:.3f}  F1 {f:.3f}  ({len(out)} chars)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("files", nargs="*", help="HTML files (default: benchmarks/corpus/*.html)")
+    parser.add_argument("--repeat", type=int, default=20, help="Passes over the pages for timing")
+    parser.add_argument("--markdown", action="store_true", help="Benchmark Markdown output")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Show per-page quality")
+    args = parser.parse_args()
+
+    pages = load_pages(args.files)
+    if not pages:
+        parser.error("no HTML pages found")
+    print(f"Corpus: {len(pages)} pages, parser backend: {extraction.get_parser_name()}")
+
+    run("extraction", lambda html: extraction.extract(html, markdown=args.markdown), pages, args.repeat, args.verbose)
+    run("regex (WebCrawlerTool)", legacy_regex, pages, args.repeat, args.verbose)
+    try:
+        import bs4  # noqa: F401
+    except ImportError:
+        print("\n[bs4 (DeepReadTool)] skipped: beautifulsoup4 not installed")
+    else:
+        run("bs4 (DeepReadTool)", legacy_bs4, pages, args.repeat, args.verbose)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Benchmark: extractive summarizer vs. the ARK LLM summarizer.
+
+Compares latency and output size of the two DeepReadTool page summary
+paths on the same texts. Texts come from files given on the command line
+or, with --from-db N, from the N most recent successful CrawledContent
+rows. The LLM path only runs with --llm (it needs ARK_API_KEY, or a
+recorded corpus with PROVIDER_MODE=replay); the summary cache is disabled
+so every call is measured.
+
+Usage:
+    python benchmarks/bench_summarizer.py page1.md page2.md
+    python benchmarks/bench_summarizer.py --from-db 20 --llm
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+os.environ["SUMMARY_CACHE_ENABLED"] = "false"
+
+from ai_engine import extractive
+from ai_engine.ranking import estimate_tokens
+
+
+def load_texts(args):
+    texts = [Path(path).read_text(encoding="utf-8") for path in args.files]
+    if args.from_db:
+        from ai_engine.db import setup_django
+
+        setup_django()
+        from apps.reports.models import CrawledContent
+
+        rows = (
+            CrawledContent.objects
+            .filter(success=True, content_length__gte=1500)
+            .order_by("-created_at")
+            .values_list("raw_content", flat=True)[:args.from_db]
+        )
+        texts.extend(rows)
+    return [text for text in texts if len(text) >= 1500]
+
+
+def run(name, summarize, texts):
+    latencies, sizes, tokens = [], [], []
+    for text in texts:
+        start = time.perf_counter()
+        summary = summarize(text)
+        latencies.append((time.perf_counter() - start) * 1000)
+        sizes.append(len(summary))
+        tokens.append(estimate_tokens(summary))
+
+    print(f"\n[{name}] {len(texts)} texts")
+    print(f"  latency ms: mean {statistics.mean(latencies):.1f}, "
+          f"p50 {statistics.median(latencies):.1f}, max {max(latencies):.1f}")
+    print(f"  output chars: mean {statistics.mean(sizes):.0f}, "
+          f"est. tokens: mean {statistics.mean(tokens):.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("files", nargs="*", help="Text/markdown files to summarize")
+    parser.add_argument("--from-db", type=int, default=0, help="Use the N latest crawled pages")
+    parser.add_argument("--llm", action="store_true", help="Also benchmark the ARK LLM path")
+    args = parser.parse_args()
+
+    texts = load_texts(args)
+    if not texts:
+        parser.error("no input texts of at least 1500 characters")
+
+    input_chars = [len(text[:8000]) for text in texts]
+    print(f"Input: {len(texts)} texts, mean {statistics.mean(input_chars):.0f} chars (truncated to 8000)")
+
+    run("extractive", lambda text: extractive.summarize_page(text[:8000]), texts)
+
+    if args.llm:
+        from ai_engine.tools import DeepReadTool
+
+        tool = DeepReadTool(summary_mode=extractive.LLM)
+        run("llm", lambda text: tool._summarize_content("", text), texts)
+
+
+if __name__ == "__main__":
+    main()
@@ -864,21 +864,52 @@ async def generate_long_report(topic: str, log_stream, log_msg, init_msg, report
     from ai_engine.generator import (
         generate_report_outline, 
         generate_single_chapter,
+        prefetch_chapter_research,
+        build_chapter_query,
         summarize_chapter
     )
     
+    from ai_engine.research_session import ResearchSession
+    
     # Initialize reference manager
     ref_manager = GlobalReferenceManager()
     
-    # --- Step 1: Generate Outline ---
-    await log_stream.log("   → 正在调用 AI 生成大纲...")
+    # Report-scoped memory of searches, so chapters share sources
+    research_session = ResearchSession(topic)
     
-    outline = await generate_report_outline(topic)
+    from ai_engine.speculative import SpeculativePrefetcher, is_enabled as speculative_enabled
     
-    await log_stream.log(f"   ✅ 大纲生成完成，共 {len(outline)} 章:")
-    for ch in outline:
-        await log_stream.log(f"      • {ch['title']}")
-    await log_stream.log("")
+    # Start searching the usual chapter focuses while the outline is generated
+    prefetcher = None
+    if speculative_enabled():
+        prefetcher = SpeculativePrefetcher(topic, count=8)
+        prefetcher.start()
+    
+    # Stop pending predictions if the outline fails or the task is cancelled
+    try:
+        # --- Step 1: Generate Outline ---
+        await log_stream.log("   → 正在调用 AI 生成大纲...")
+        
+        outline = await generate_report_outline(topic)
+        
+        await log_stream.log(f"   ✅ 大纲生成完成，共 {len(outline)} 章:")
+        for ch in outline:
+            await log_stream.log(f"      • {ch['title']}")
+        await log_stream.log("")
+        
+        # Fetch research for all chapters in one bounded-parallel batch
+        await log_stream.log("   → 正在并行检索各章节资料...")
+        try:
+            if prefetcher:
+                chapter_research = await cl.make_async(lambda: prefetcher.resolve(outline))()
+            else:
+                chapter_research = await prefetch_chapter_research(topic, outline, search_count=8)
+        except Exception as e:
+            await log_stream.log(f"   ⚠️ 批量检索失败，将逐章检索: {e}")
+            chapter_research = {}
+    finally:
+        if prefetcher:
+            prefetcher.shutdown()
     
     # Initialize report body
     full_report = f"# {topic} 深度行业分析报告\n\n"
@@ -920,7 +951,9 @@ async def generate_long_report(topic: str, log_stream, log_msg, init_msg, report
                 previous_summary=previous_context,
                 search_count=8,
                 log_callback=chapter_log_callback,
-                report=report
+                report=report,
+                search_data=chapter_research.get(build_chapter_query(topic, chapter_info)),
+                session=research_session
             )
             
             # Process references (deduplicate and rewrite IDs)
@@ -950,6 +983,12 @@ async def generate_long_report(topic: str, log_stream, log_msg, init_msg, report
     
     ref_count = ref_manager.get_ref_count()
     await log_stream.log(f"   ✅ 参考文献整理完成，共 {ref_count} 条唯一引用")
+    session_stats = research_session.get_stats()
+    if session_stats["memory_hits"] or session_stats["compacted_sources"]:
+        await log_stream.log(
+            f"   🧠 复用检索 {session_stats['memory_hits']} 次，"
+            f"跨章节去重来源 {session_stats['compacted_sources']} 条"
+        )
     await log_stream.log("")
     await log_stream.log("━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
     await log_stream.log("🎉 报告生成完成！")